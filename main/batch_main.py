@@ -1,44 +1,89 @@
 import asyncio
+import argparse
 import json
 import logging
 import sys
 from pathlib import Path
-from typing import Any
+from typing import Any, List
 from playwright.async_api import async_playwright
 
 import reporter
 from cataloger import DashboardCataloger
 from utils import setup_logger, current_worker_id
+from page_pool import PagePool
+from bot_core import launch_browser_context, apply_storage_state, SessionExpiredError
+from network_filter import NetworkFilter
+from memory_budget import get_byte_budget, peak_rss_mb
+from telemetry import log_summary, write_summary, start_metrics_server
+from llm_usage import LLMBudgetExceededError, budget_exceeded, log_usage_summary, process_usage_summary
+from profiler import SamplingProfiler, finish_profile
+from loop_watchdog import LoopWatchdog
+from image_pool import get_image_pool
+from utils import save_requeue_urls
 
-from config import MAX_CONCURRENT_TASKS, VIEWPORT
+from config import MAX_CONCURRENT_TASKS, HEADLESS, AUTH_STATE_FILE, REQUEUE_FILE, BROWSER_PROFILE_DIR, OUTPUT_DIR, METRICS_PORT, LOOP_WATCHDOG_ENABLED
 
 logger = setup_logger("BatchManager")
 
 # Configurações do Batch
 URLS_FILE = "urls.json"
 
-async def process_single_url(url: str, semaphore: asyncio.Semaphore, shared_context: Any, file_lock: asyncio.Lock, worker_idx: int):
+async def process_single_url(
+    url: str,
+    semaphore: asyncio.Semaphore,
+    shared_context: Any,
+    file_lock: asyncio.Lock,
+    worker_idx: int,
+    page_pool: PagePool = None,
+    headless: bool = False,
+    session_expired: asyncio.Event = None,
+    requeued: List[str] = None
+):
     """
     Worker que processa uma única URL respeitando o semáforo.
-    Usa shared_context para manter sessão de login única.
+    Usa shared_context para manter sessão de login única e, se houver,
+    retira abas pré-aquecidas do page_pool.
+
+    Se a sessão expirar (headless), sinaliza session_expired: os demais workers
+    param de tentar e todas as URLs afetadas vão para `requeued`.
     """
     # Define contexto para logs deste worker
     token = current_worker_id.set(f"Worker-{worker_idx}")
     
     async with semaphore:
+        if session_expired and session_expired.is_set():
+            logger.warning(f"⏭️ [REQUEUE] Sessão expirada. Re-enfileirando sem tentar: {url}")
+            requeued.append(url)
+            current_worker_id.reset(token)
+            return
+
+        if budget_exceeded():
+            logger.warning(f"⏭️ [BUDGET] Orçamento de LLM atingido. Pulando: {url}")
+            current_worker_id.reset(token)
+            return
+
         logger.info(f"🚦 [START] Iniciando worker para: {url}")
         try:
             # Passa o CONTEXTO compartilhado, não apenas o browser
-            cataloger = DashboardCataloger(shared_context=shared_context, file_lock=file_lock)
+            cataloger = DashboardCataloger(shared_context=shared_context, file_lock=file_lock, page_pool=page_pool, headless=headless)
             await cataloger.process_dashboard(url)
             logger.info(f"🏁 [DONE] Finalizado com sucesso: {url}")
+        except LLMBudgetExceededError as e:
+            # Checkpoint do dashboard fica na pasta WIP: retomado na próxima execução
+            logger.error(f"💸 [BUDGET] {e} Interrompido: {url}")
+        except SessionExpiredError as e:
+            logger.error(f"🔒 [REQUEUE] {e}")
+            if session_expired:
+                session_expired.set()
+            if requeued is not None:
+                requeued.append(url)
         except Exception as e:
             logger.error(f"❌ [ERROR] Falha no worker ({url}): {e}")
             
     # Opcional em async, mas boa prática limpar
     current_worker_id.reset(token)
 
-async def main():
+async def main(headless: bool = HEADLESS, profile: bool = False):
     # 1. Carrega URLs
     try:
         urls_path = Path(URLS_FILE)
@@ -50,6 +95,17 @@ async def main():
         # Filtra strings vazias
         urls = [u for u in urls if u and u.strip()]
         
+        # URLs re-enfileiradas por sessão expirada em execuções anteriores vão na frente
+        requeue_path = Path(REQUEUE_FILE)
+        if requeue_path.exists():
+            try:
+                pending = json.loads(requeue_path.read_text(encoding='utf-8'))
+                urls = pending + urls
+                # O arquivo só é consumido ao fim do lote: um crash/Ctrl+C não perde a fila
+                logger.info(f"🔁 {len(pending)} URLs re-enfileiradas adicionadas à fila.")
+            except Exception as e:
+                logger.warning(f"Erro ao ler {REQUEUE_FILE}: {e}")
+        
         # Deduplicação (mantendo ordem)
         seen = set()
         unique_urls = []
@@ -78,61 +134,91 @@ async def main():
     # 2. Setup de Concorrência
     semaphore = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
     file_lock = asyncio.Lock()
+    session_expired = asyncio.Event()
+    requeued: List[str] = []
+    batch_finished = False
     
     # 3. Inicia Navegador Compartilhado (Mãe)
     logger.info("🚀 Iniciando Motor Batch (Modo Persistente)...")
-    
-    launch_args = [
-        "--disable-blink-features=AutomationControlled",
-        "--no-sandbox",
-        "--disable-infobars"
-    ]
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    watchdog = None
+    if LOOP_WATCHDOG_ENABLED:
+        watchdog = LoopWatchdog() # Bloqueios do loop travam todas as abas: loga a pilha e soma por callsite
+        watchdog.start()
+    profiler = None
+    if profile:
+        profiler = SamplingProfiler()
+        profiler.start()
 
-    async with async_playwright() as p:
-        # Tenta usar Chrome do Sistema (Stealth Mode)
-        try:
-            browser = await p.chromium.launch(
-                headless=False,
-                channel="chrome", 
-                args=launch_args,
-                ignore_default_args=["--enable-automation"]
-            )
-            logger.info("✅ Google Chrome (System) iniciado para Batch.")
-        except Exception as e:
-             logger.warning(f"⚠️ Falha Chrome System ({e}). Usando Chromium bundled.")
-             browser = await p.chromium.launch(headless=False, args=launch_args)
+    # Processos de imagem sobem em paralelo com o navegador
+    image_warm_up = asyncio.create_task(get_image_pool().warm_up())
 
+    async with async_playwright() as p:
         # 4. CRIA CONTEXTO MESTRE (onde o login vai viver)
+        # Tenta usar Chrome do Sistema (Stealth Mode). Com BROWSER_PROFILE_DIR, o contexto usa
+        # perfil persistente: cache HTTP em disco compartilhado por todos os workers e execuções.
         # Todos os workers vão criar abas (pages) dentro deste contexto
-        context = await browser.new_context(
-            viewport=VIEWPORT,
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+        browser, context = await launch_browser_context(p, headless=headless, profile_dir=BROWSER_PROFILE_DIR)
+        has_state = await apply_storage_state(context)
+        await NetworkFilter().install(context)
+        
+        if headless:
+            if not has_state:
+                logger.warning(f"⚠️ Modo headless sem '{AUTH_STATE_FILE}'. Rode 'python login.py' antes para painéis com SSO.")
+            logger.info("🕶️ Contexto Mestre criado (headless). Sessões expiradas serão re-enfileiradas.")
+        else:
+            logger.info("🍪 Contexto Mestre criado. Faça login agora (se necessário) na primeira aba que abrir!")
         
-        logger.info("🍪 Contexto Mestre criado. Faça login agora (se necessário) na primeira aba que abrir!")
+        # 4.1 Pool de abas pré-aquecidas (uma por worker, recicladas após N usos)
+        page_pool = PagePool(context, size=min(MAX_CONCURRENT_TASKS, max(len(urls), 1)))
+        await page_pool.start()
+        await image_warm_up
         
         try:
             # 5. Cria e agenda tarefas
             tasks = []
             for i, url in enumerate(urls):
                 task = asyncio.create_task(
-                    process_single_url(url, semaphore, context, file_lock, i+1)
+                    process_single_url(
+                        url, semaphore, context, file_lock, i+1, page_pool,
+                        headless=headless, session_expired=session_expired, requeued=requeued
+                    ),
+                    name=f"Worker-{i+1}" # Atribuição de tempo por worker no profiler
                 )
                 tasks.append(task)
             
             # 6. Aguarda conclusão
             logger.info("⏳ Aguardando conclusão dos workers...")
             await asyncio.gather(*tasks)
+            batch_finished = True
+            logger.info(f"🧠 Pico de memória (RSS) do processo: {peak_rss_mb()} MB "
+                        f"(imagens em trânsito, pico: {get_byte_budget().peak / 1024 / 1024:.1f} MB)")
+            extra = {"llm": process_usage_summary()}
+            if watchdog:
+                watchdog.stop()
+                watchdog.log_report()
+                extra["event_loop"] = watchdog.summary()
+            log_summary()
+            log_usage_summary()
+            metrics_path = write_summary(OUTPUT_DIR, extra=extra)
+            if metrics_path:
+                logger.info(f"⏱️ Métricas de tempo (p50/p95 por fase) salvas em: {metrics_path}")
             
         except KeyboardInterrupt:
             logger.warning("🛑 Interrompido pelo usuário.")
         except Exception as e:
             logger.error(f"❌ Erro no processamento em lote: {e}")
+        finally:
+            finish_profile(profiler, OUTPUT_DIR)
+            get_image_pool().close()
         
-        # ATENÇÃO: NÃO fechamos navegador para preservar sessão/login
-        logger.info("\n🏁 Processamento em lote finalizado.")
-        logger.info("🌍 O navegador permanecerá ABERTO para preservar a sessão/login.")
-        logger.info("⚠️ Para fechar, feche a janela manualmente ou pare o kernel.")
+        if batch_finished:
+            # Fila anterior já passou pelos workers; o que expirar de novo é regravado abaixo
+            Path(REQUEUE_FILE).unlink(missing_ok=True)
+        if requeued:
+            save_requeue_urls(REQUEUE_FILE, requeued)
+            logger.error(f"🔒 Sessão expirada: {len(requeued)} URLs re-enfileiradas em '{REQUEUE_FILE}'. Rode 'python login.py' e execute novamente.")
         
         # Gera relatório estático final
         try:
@@ -140,6 +226,20 @@ async def main():
         except Exception as e:
             logger.error(f"Erro ao gerar relatorio final: {e}")
         
+        if headless:
+            # Servidor de catálogo: não há janela para preservar, encerra o processo
+            logger.info("\n🏁 Processamento em lote finalizado (headless).")
+            await page_pool.close()
+            await context.close()
+            if browser:
+                await browser.close()
+            return
+        
+        # ATENÇÃO: NÃO fechamos navegador para preservar sessão/login
+        logger.info("\n🏁 Processamento em lote finalizado.")
+        logger.info("🌍 O navegador permanecerá ABERTO para preservar a sessão/login.")
+        logger.info("⚠️ Para fechar, feche a janela manualmente ou pare o kernel.")
+        
         # Mantém o script rodando para não derrubar o navegador
         logger.info("💤 Aguardando... (Ctrl+C para sair)")
         try:
@@ -147,11 +247,20 @@ async def main():
                 await asyncio.sleep(60)
         except KeyboardInterrupt:
             logger.info("👋 Encerrando...")
+            await page_pool.close()
             await context.close()
-            await browser.close()
+            if browser:
+                await browser.close()
 
 if __name__ == "__main__":
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    
+    parser = argparse.ArgumentParser(description="Catalogação em lote (paralela) de dashboards.")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS,
+                        help=f"Roda sem janela, reutilizando a sessão salva em '{AUTH_STATE_FILE}' (ver login.py).")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profiler por amostragem: lag do event loop, tempo por worker/função e flame graph em runs/.")
+    args = parser.parse_args()
         
-    asyncio.run(main())
+    asyncio.run(main(headless=args.headless, profile=args.profile))
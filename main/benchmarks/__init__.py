@@ -0,0 +1,26 @@
+"""
+Benchmarks dos caminhos quentes de captura, deduplicação e persistência.
+
+Rodar a partir de main/:
+
+    python -m benchmarks                       # compara com benchmarks/baseline.json
+    python -m benchmarks --save-baseline       # grava/atualiza a baseline desta máquina
+    python -m benchmarks -k collect_data       # só os benchmarks que contêm o termo
+    python -m benchmarks --quick               # pula os tamanhos maiores (10k runs, 50 tiles)
+
+Uma piora acima do limite (padrão: 25%) em relação à baseline faz o
+comando sair com código 1, então ele pode servir de gate no CI. Gere a
+baseline na própria máquina que vai comparar: tempos de outra máquina não
+são comparáveis.
+"""
+
+import os
+import sys
+
+# Benchmarks rodam offline: o Cataloger é instanciado sem GEMINI_API_KEY
+os.environ.setdefault("LLM_BACKEND", "fake")
+
+# Imports planos (config, utils...) mesmo com o cwd trocado durante os benchmarks de disco
+_MAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _MAIN_DIR not in sys.path:
+    sys.path.insert(0, _MAIN_DIR)
@@ -0,0 +1,59 @@
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+from benchmarks import harness
+from benchmarks import bench_capture, bench_dom, bench_frames, bench_storage  # noqa: F401 (registram os benchmarks)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks com gate de regressão")
+    parser.add_argument("-k", dest="pattern", default="", help="Roda só os benchmarks cujo id contém o termo")
+    parser.add_argument("--quick", action="store_true", help="Pula os tamanhos maiores (10k runs, 50 tiles)")
+    parser.add_argument("--repeat", type=int, default=harness.REPEAT, help="Amostras por benchmark")
+    parser.add_argument("--baseline", type=Path, default=harness.BASELINE_FILE, help="Arquivo JSON da baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como nova baseline")
+    parser.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD, help="Piora relativa tolerada (0.25 = 25%%)")
+    parser.add_argument("--output", type=Path, help="Grava os resultados desta execução em JSON")
+    parser.add_argument("--require-baseline", action="store_true", default=bool(os.environ.get("CI")),
+                        help="Falha (código 2) se não houver baseline. Padrão com a variável de ambiente CI definida")
+    args = parser.parse_args()
+
+    print(f"⏱️ Benchmarks ({'rápido' if args.quick else 'completo'}):")
+    results = harness.run_benchmarks(args.pattern, quick=args.quick, repeat=args.repeat)
+    if not results:
+        if harness.SKIPPED:
+            print(f"⚠️ Todos os {len(harness.SKIPPED)} benchmarks selecionados foram pulados.")
+            return 0
+        print("❌ Nenhum benchmark corresponde ao filtro.")
+        return 1
+
+    if args.output:
+        args.output.write_text(json.dumps({"machine": harness.machine_info(), "results": results}, indent=2), encoding="utf-8")
+
+    if args.save_baseline:
+        harness.save_baseline(results, args.baseline)
+        print(f"\n💾 Baseline gravada em {args.baseline} ({len(results)} benchmarks).")
+        return 0
+
+    baseline = harness.load_baseline(args.baseline)
+    if baseline is None:
+        if args.require_baseline:
+            # Sem baseline o gate não compara nada: no CI isso tem que falhar, não passar em silêncio
+            print(f"\n❌ Sem baseline em {args.baseline} (--require-baseline). Gere com --save-baseline na máquina de CI.")
+            return 2
+        print(f"\n⚠️ Sem baseline em {args.baseline}. Rode com --save-baseline para criar.")
+        return 0
+
+    regressions = harness.compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) pioraram mais de {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\n✅ Nenhuma regressão acima de {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Captura e deduplicação: pHash por ROI, tela de erro, costura de scroll, pool de imagem e busca em seen_hashes."""
+
+import io
+import random
+import asyncio
+
+import numpy as np
+import imagehash
+from PIL import Image, ImageDraw
+
+from config import ROI_CROP, VIEWPORT, DUPLICATE_THRESHOLD
+from utils import compute_phash, is_error_screen
+from bot_core import SCROLL_OVERLAP_PX
+from image_pool import ImageWorkerPool, stitch_images
+from click_strategy import ConcentricSearchClicker
+from benchmarks.harness import benchmark, on_teardown
+
+
+def synthetic_screenshot(width: int = VIEWPORT["width"], height: int = VIEWPORT["height"], seed: int = 0) -> Image.Image:
+    """Print determinístico com cara de dashboard (fundo cinza, cards e barras coloridas)."""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (223, 227, 234))
+    draw = ImageDraw.Draw(image)
+    for top in range(24, height - 300, 320):
+        for left in range(24, width - 400, 470):
+            draw.rectangle((left, top, left + 450, top + 300), fill=(255, 255, 255))
+            color = tuple(rng.randint(30, 200) for _ in range(3))
+            for n in range(8):
+                bar = rng.randint(20, 240)
+                draw.rectangle((left + 20 + n * 52, top + 280 - bar, left + 60 + n * 52, top + 280), fill=color)
+    return image
+
+
+def _start_pool(workers: int):
+    """Pool de imagem aquecido num event loop próprio; ambos encerrados ao fim do benchmark."""
+    pool = ImageWorkerPool(workers=workers)
+    loop = asyncio.new_event_loop()
+
+    def stop():
+        pool.close()
+        loop.close()
+    on_teardown(stop)
+    loop.run_until_complete(pool.warm_up())
+    return pool, loop
+
+
+def _png_bytes(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@benchmark("compute_phash", param="nav_type", values=list(ROI_CROP))
+def bench_compute_phash(nav_type):
+    image = synthetic_screenshot()
+    return lambda: compute_phash(image, nav_type)
+
+
+@benchmark("is_error_screen", param="height", values=[VIEWPORT["height"], 3200])
+def bench_is_error_screen(height):
+    image = synthetic_screenshot(height=height)
+    return lambda: is_error_screen(image)
+
+
+@benchmark("stitch_screenshots", param="tiles", values=[2, 10, 50], slow=[50])
+def bench_stitch_screenshots(tiles):
+    client_height = VIEWPORT["height"]
+    step = client_height - SCROLL_OVERLAP_PX
+    scroll_height = step * (tiles - 1) + client_height
+    screenshots = [_png_bytes(synthetic_screenshot(seed=n)) for n in range(tiles)]
+    positions = [n * step for n in range(tiles)]
+    return lambda: stitch_images(screenshots, positions, client_height, scroll_height)
+
+
+@benchmark("image_pool_inspect", param="workers", values=[0, 1])
+def bench_image_pool_inspect(workers):
+    # Ida e volta completa (memória compartilhada + decode + pHash + tela de erro) de um frame do viewport
+    png = _png_bytes(synthetic_screenshot())
+    pool, loop = _start_pool(workers)
+    return lambda: loop.run_until_complete(pool.inspect(png, "native_footer"))
+
+
+@benchmark("image_pool_stitch_png", param="tiles", values=[2, 10])
+def bench_image_pool_stitch_png(tiles):
+    client_height = VIEWPORT["height"]
+    step = client_height - SCROLL_OVERLAP_PX
+    scroll_height = step * (tiles - 1) + client_height
+    screenshots = [_png_bytes(synthetic_screenshot(seed=n)) for n in range(tiles)]
+    positions = [n * step for n in range(tiles)]
+    pool, loop = _start_pool(1)
+    return lambda: loop.run_until_complete(pool.stitch_png(screenshots, positions, client_height, scroll_height))
+
+
+@benchmark("is_duplicate", param="seen", values=[10, 100, 1000])
+def bench_is_duplicate(seen):
+    # Pior caso: página nova (nenhum hash próximo), a lista inteira é percorrida
+    rng = np.random.default_rng(seen)
+    seen_hashes = [imagehash.ImageHash(rng.random((8, 8)) > 0.5) for _ in range(seen)]
+    current = imagehash.ImageHash(rng.random((8, 8)) > 0.5)
+    seen_hashes = [h for h in seen_hashes if current - h >= DUPLICATE_THRESHOLD]
+    clicker = ConcentricSearchClicker(None, [(0, 0)], VIEWPORT)
+    return lambda: clicker._is_duplicate(current, seen_hashes)
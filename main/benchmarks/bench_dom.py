@@ -0,0 +1,72 @@
+"""DOM: detecção do container de scroll em relatórios grandes (varredura completa vs. sondagem vs. cache) e sondagem de navegação."""
+
+from bot_core import FIND_SCROLL_CONTAINER_JS, KNOWN_SCROLL_CONTAINERS, SCROLL_MARK_ATTR
+from fixture_server import LAYOUTS, fixture_url
+from benchmarks.browser import browser_session
+from benchmarks.harness import benchmark
+
+NODE_COUNTS = [1000, 10000, 50000]
+
+
+def synthetic_report_html(nodes: int) -> str:
+    """Relatório com `nodes` elementos (visuais aninhados) dentro de um container com scroll, sem classe conhecida."""
+    visuals = nodes // 10
+    cells = "".join(
+        f"<div class='visual-container'><div class='visual'><div><div><span>v{i}</span><svg><g><rect/><rect/></g></svg></div></div></div></div>"
+        for i in range(visuals)
+    )
+    return (
+        "<html><body style='margin:0;overflow:hidden'>"
+        "<div class='report-host' style='height:100vh;overflow-y:auto'>"
+        f"<div class='report-pages' style='display:grid;grid-template-columns:repeat(8, 1fr);height:6000px'>{cells}</div>"
+        "</div></body></html>"
+    )
+
+
+def _load(nodes: int):
+    session = browser_session()
+    session.run(session.page.set_content(synthetic_report_html(nodes)))
+    session.driver.reset_scroll_cache()
+    return session
+
+
+def _find_args(probe: bool, full_scan: bool) -> dict:
+    return {
+        "minAreaRatio": 0.6,
+        "knownSelectors": ", ".join(KNOWN_SCROLL_CONTAINERS),
+        "markAttr": SCROLL_MARK_ATTR,
+        "probe": probe,
+        "fullScan": full_scan
+    }
+
+
+@benchmark("scroll_container_full_scan", param="nodes", values=NODE_COUNTS, slow=[50000])
+def bench_scroll_container_full_scan(nodes):
+    # Comportamento anterior: querySelectorAll('*') + getBoundingClientRect em todo nó com scroll
+    session = _load(nodes)
+    args = _find_args(probe=False, full_scan=True)
+    return lambda: session.run(session.page.evaluate(FIND_SCROLL_CONTAINER_JS, args))
+
+
+@benchmark("scroll_container_probe", param="nodes", values=NODE_COUNTS, slow=[50000])
+def bench_scroll_container_probe(nodes):
+    # Primeira chamada após a navegação: containers conhecidos + ancestrais do centro
+    session = _load(nodes)
+    args = _find_args(probe=True, full_scan=False)
+    return lambda: session.run(session.page.evaluate(FIND_SCROLL_CONTAINER_JS, args))
+
+
+@benchmark("scroll_container_cached", param="nodes", values=NODE_COUNTS, slow=[50000])
+def bench_scroll_container_cached(nodes):
+    # Chamadas seguintes (cada get_full_page_screenshot_bytes): só relê as alturas do container marcado
+    session = _load(nodes)
+    session.run(session.driver._find_scroll_container())
+    return lambda: session.run(session.driver._find_scroll_container())
+
+
+@benchmark("navigation_probe", param="layout", values=list(LAYOUTS))
+def bench_navigation_probe(layout):
+    # Substitui o Scout (chamada ao LLM, segundos) quando reconhece a plataforma; top_tabs/left_list das fixtures não têm role='tab' (miss)
+    session = browser_session()
+    session.run(session.page.goto(fixture_url(session.base_url, layout), wait_until="load"))
+    return lambda: session.run(session.driver.probe_navigation())
@@ -0,0 +1,49 @@
+"""Frames de comparação (latência por modo de captura, decodificar + pHash por formato) e a captura completa persistida."""
+
+import io
+
+from config import VIEWPORT, HASH_JPEG_QUALITY, HASH_CAPTURE_SCALE
+from utils import compute_phash, crop_roi_image
+from bot_core import FRAME_CAPTURE_MODES
+from image_pool import _decode
+from fixture_server import fixture_url
+from benchmarks.bench_capture import synthetic_screenshot
+from benchmarks.browser import browser_session
+from benchmarks.harness import benchmark
+
+@benchmark("frame_latency", param="mode", values=list(FRAME_CAPTURE_MODES))
+def bench_frame_latency(mode):
+    # Captura da ROI no Chromium + transferência + decodificação + pHash: o custo de cada poll de estabilidade
+    session = browser_session()
+    session.run(session.page.goto(fixture_url(session.base_url, "native_footer"), wait_until="load"))
+
+    async def frame():
+        data = await session.driver.capture_frame("native_footer", mode=mode)
+        return compute_phash(_decode(data))
+    return lambda: session.run(frame())
+
+
+@benchmark("frame_decode_phash", param="format", values=["png", "jpeg", "jpeg_roi"])
+def bench_frame_decode_phash(fmt):
+    # png = viewport inteira como antes; jpeg_roi = ROI native_footer reduzida por HASH_CAPTURE_SCALE (modo "cdp")
+    buffer = io.BytesIO()
+    image = synthetic_screenshot()
+    if fmt == "jpeg_roi":
+        roi = crop_roi_image(image, "native_footer")
+        roi = roi.resize((int(roi.width * HASH_CAPTURE_SCALE), int(roi.height * HASH_CAPTURE_SCALE)))
+        roi.save(buffer, format="JPEG", quality=HASH_JPEG_QUALITY)
+    elif fmt == "jpeg":
+        image.save(buffer, format="JPEG", quality=HASH_JPEG_QUALITY)
+    else:
+        image.save(buffer, format="PNG")
+    data = buffer.getvalue()
+    return lambda: compute_phash(_decode(data))
+
+
+@benchmark("full_page_capture", param="height", values=[VIEWPORT["height"], 3200], slow=[3200])
+def bench_full_page_capture(height):
+    # Captura persistida de uma página já estável (uma vez por página aceita); 3200 px = scroll + costura
+    session = browser_session()
+    session.run(session.page.goto(fixture_url(session.base_url, "top_tabs", height=height), wait_until="load"))
+    session.driver.reset_scroll_cache()
+    return lambda: session.run(session.driver.get_full_page_screenshot_bytes(stable=True))
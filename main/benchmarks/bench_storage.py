@@ -0,0 +1,78 @@
+"""Persistência: reporter.collect_data sobre árvores runs/ sintéticas e o ledger processed_urls.json."""
+
+import json
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+
+import reporter
+from cataloger import DashboardCataloger
+from run_index import rebuild_run_index
+from benchmarks.harness import benchmark, workspace, chdir, on_teardown
+
+PAGES_PER_RUN = 3
+
+
+def build_runs_tree(root, runs: int) -> None:
+    """runs/<pasta>/catalog_*.json + screenshots/, no formato gravado pelo Cataloger."""
+    base_time = datetime(2026, 1, 1)
+    for i in range(runs):
+        folder = root / "runs" / f"20260101_{i:06d}_Painel_{i}"
+        (folder / "screenshots").mkdir(parents=True)
+        pages = []
+        for p in range(PAGES_PER_RUN):
+            filename = "00_home.png" if p == 0 else f"{p:02d}_target.png"
+            content = f"png-{i}-{p}".encode()
+            (folder / "screenshots" / filename).write_bytes(content)
+            pages.append({
+                "id": p,
+                "label": "Home" if p == 0 else f"Página {p}",
+                "filename": filename,
+                "sha256": hashlib.sha256(content).hexdigest(),
+                "analysis": {"titulo_painel": f"Painel {i}", "objetivo_macro": "Benchmark", "dominio_negocio": "Vendas"}
+            })
+        catalog = {
+            "run_id": f"20260101_{i:06d}",
+            "url": f"https://example.com/report/{i}",
+            "timestamp": (base_time + timedelta(minutes=i)).isoformat(),
+            "pages": pages
+        }
+        (folder / f"catalog_Painel_{i}.json").write_text(json.dumps(catalog), encoding="utf-8")
+
+
+@benchmark("collect_data", param="runs", values=[100, 1000, 10000], slow=[10000])
+def bench_collect_data(runs):
+    # Build incremental (manifesto e imagens do build anterior já existem): o caso comum
+    root = workspace()
+    build_runs_tree(root, runs)
+    with chdir(root):
+        rebuild_run_index("runs")
+        report_path, images_path = reporter.setup_report_dir()
+        manifest = {"runs": {}}
+        reporter.collect_data(images_path, manifest)
+
+    def run():
+        with chdir(root):
+            reporter.collect_data(images_path, manifest)
+    return run
+
+
+@benchmark("write_processed_entry", param="ledger", values=[100, 1000, 10000])
+def bench_write_processed_entry(ledger):
+    root = workspace()
+    (root / "runs").mkdir()
+    entries = {
+        f"https://example.com/report/{i}": {"processed_at": datetime.now().isoformat(), "run_id": f"run_{i}", "log_path": f"runs/{i}/catalog.json"}
+        for i in range(ledger)
+    }
+    (root / "runs" / "processed_urls.json").write_text(json.dumps(entries, indent=2), encoding="utf-8")
+
+    loop = asyncio.new_event_loop()
+    on_teardown(loop.close)
+    with chdir(root):
+        cataloger = DashboardCataloger()
+
+    def run():
+        with chdir(root):
+            loop.run_until_complete(cataloger._write_processed_entry("https://example.com/report/0", "run_0", "runs/0/catalog.json"))
+    return run
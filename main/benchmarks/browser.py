@@ -0,0 +1,82 @@
+"""Chromium headless compartilhado pelos benchmarks de navegador (pulados se o Chromium não estiver instalado)."""
+
+import asyncio
+from typing import Any, Awaitable, Dict, Optional
+
+from config import VIEWPORT
+from bot_core import BrowserDriver
+from fixture_server import FixtureServer
+from benchmarks.harness import SkipBenchmark, on_cleanup
+
+
+class BrowserSession:
+    """
+    Navegador, aba e servidor de fixtures de uma execução da suíte.
+
+    Attributes:
+        driver: BrowserDriver sobre a aba (sem contexto próprio: close() não é chamado).
+        base_url: URL do servidor de fixtures.
+    """
+
+    def __init__(self, driver: BrowserDriver, base_url: str, loop: asyncio.AbstractEventLoop):
+        self.driver = driver
+        self.base_url = base_url
+        self.loop = loop
+
+    @property
+    def page(self) -> Any:
+        return self.driver.page
+
+    def run(self, coro: Awaitable) -> Any:
+        return self.loop.run_until_complete(coro)
+
+
+_session: Optional[BrowserSession] = None
+_error: Optional[str] = None
+
+
+def browser_session() -> BrowserSession:
+    """Sobe o Chromium na primeira chamada (uma vez por execução); SkipBenchmark se indisponível."""
+    global _session, _error
+    if _session is not None:
+        return _session
+    if _error is not None:
+        raise SkipBenchmark(_error)
+
+    from playwright.async_api import async_playwright
+
+    loop = asyncio.new_event_loop()
+    server = FixtureServer(port=0)
+    server.start()
+
+    async def start():
+        playwright = await async_playwright().start()
+        try:
+            browser = await playwright.chromium.launch(headless=True)
+        except Exception:
+            await playwright.stop()
+            raise
+        return playwright, browser, await browser.new_page(viewport=VIEWPORT)
+
+    try:
+        playwright, browser, page = loop.run_until_complete(start())
+    except Exception as e:
+        server.stop()
+        loop.close()
+        _error = f"Chromium indisponível ({type(e).__name__}); rode 'playwright install chromium'"
+        raise SkipBenchmark(_error)
+
+    driver = BrowserDriver()
+    driver.page = page
+    _session = BrowserSession(driver, server.base_url, loop)
+
+    def stop():
+        global _session
+        loop.run_until_complete(driver._detach_cdp_session())
+        loop.run_until_complete(browser.close())
+        loop.run_until_complete(playwright.stop())
+        loop.close()
+        server.stop()
+        _session = None
+    on_cleanup(stop)
+    return _session
@@ -0,0 +1,231 @@
+"""
+Registro, medição e comparação com baseline (estilo asv, sem dependências).
+
+Cada benchmark é uma função de preparo decorada com @benchmark. Ela recebe um
+valor do parâmetro e devolve a função a ser cronometrada; o preparo (gerar
+imagens, árvores de runs...) não entra na medição.
+"""
+
+import io
+import os
+import json
+import time
+import shutil
+import platform
+import statistics
+import tempfile
+import contextlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+BASELINE_VERSION = 1
+
+DEFAULT_THRESHOLD = 0.25   # Piora relativa tolerada antes de falhar
+MIN_DELTA_S = 0.0005       # Diferenças absolutas abaixo disso são ruído (0.5 ms)
+MIN_SAMPLE_TIME_S = 0.2    # Cada amostra repete a chamada até somar esse tempo
+REPEAT = 5                 # Amostras por benchmark (a mediana é comparada)
+
+# nome -> (função de preparo, valores do parâmetro, nome do parâmetro, valores pulados em --quick)
+_REGISTRY: Dict[str, Tuple[Callable, List[Any], str, List[Any]]] = {}
+_workspaces: List[str] = []
+_cleanups: List[Callable[[], None]] = []
+_teardowns: List[Callable[[], None]] = []
+SKIPPED: List[str] = []  # Ids pulados na última execução (SkipBenchmark)
+
+
+class SkipBenchmark(Exception):
+    """Lançada pelo preparo quando o ambiente não permite o benchmark (ex: sem Chromium instalado)."""
+
+
+def benchmark(name: str, param: str = "", values: Optional[List[Any]] = None, slow: Optional[List[Any]] = None):
+    """
+    Registra um benchmark parametrizado.
+
+        @benchmark("stitch_screenshots", param="tiles", values=[2, 10, 50], slow=[50])
+        def bench_stitch(tiles):
+            ...  # preparo
+            return lambda: stitch_images(...)
+    """
+    def decorator(setup):
+        _REGISTRY[name] = (setup, list(values) if values is not None else [None], param, list(slow or []))
+        return setup
+    return decorator
+
+
+def workspace(prefix: str = "bench_") -> Path:
+    """Pasta temporária removida ao fim da execução (árvores de runs, ledgers...)."""
+    path = tempfile.mkdtemp(prefix=prefix)
+    _workspaces.append(path)
+    return Path(path)
+
+
+def on_cleanup(fn: Callable[[], None]) -> None:
+    """Registra um encerramento para o fim da execução (navegador, servidor de fixtures...)."""
+    _cleanups.append(fn)
+
+
+def on_teardown(fn: Callable[[], None]) -> None:
+    """Registra um encerramento para o fim do benchmark atual (pools de processos, event loops...)."""
+    _teardowns.append(fn)
+
+
+def _run_teardowns() -> None:
+    while _teardowns:
+        _teardowns.pop()()
+
+
+def cleanup_workspaces() -> None:
+    _run_teardowns()
+    while _cleanups:
+        _cleanups.pop()()
+    while _workspaces:
+        shutil.rmtree(_workspaces.pop(), ignore_errors=True)
+
+
+@contextlib.contextmanager
+def chdir(path: Path):
+    """Troca o cwd (reporter/run_index usam caminhos relativos a main/)."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def measure(fn: Callable[[], Any], repeat: int = REPEAT, min_sample_time: float = MIN_SAMPLE_TIME_S) -> Dict[str, Any]:
+    """
+    Cronometra `fn` (segundos por chamada).
+
+    Calibra quantas chamadas cabem em min_sample_time (como o timeit.autorange)
+    e coleta `repeat` amostras. A saída do reporter (print) é descartada.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_sample_time or number >= 1_000_000:
+                break
+            number *= 10 if elapsed < min_sample_time / 10 else 2
+
+        samples = [elapsed / number]
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append((time.perf_counter() - start) / number)
+
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "number": number,
+        "repeat": repeat
+    }
+
+
+def run_benchmarks(pattern: str = "", quick: bool = False, repeat: int = REPEAT) -> Dict[str, Dict[str, Any]]:
+    """Executa os benchmarks registrados. Chave: "<nome>[<param>=<valor>]"."""
+    results = {}
+    SKIPPED.clear()
+    try:
+        for name, (setup, values, param, slow) in _REGISTRY.items():
+            for value in values:
+                if quick and value in slow:
+                    continue
+                bench_id = f"{name}[{param}={value}]" if param else name
+                if pattern and pattern not in bench_id:
+                    continue
+                try:
+                    try:
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            fn = setup(value) if param else setup()
+                    except SkipBenchmark as e:
+                        print(f"   {bench_id:<44} {'pulado':>10}  ({e})")
+                        SKIPPED.append(bench_id)
+                        continue
+                    results[bench_id] = measure(fn, repeat=repeat)
+                finally:
+                    _run_teardowns()
+                print(f"   {bench_id:<44} {_fmt(results[bench_id]['median_s']):>10}  (x{results[bench_id]['number']})")
+    finally:
+        cleanup_workspaces()
+    return results
+
+
+def _fmt(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        "node": platform.node(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        return None
+    if baseline.get("version") != BASELINE_VERSION:
+        print(f"! Baseline {path} em versão diferente. Regrave com --save-baseline.")
+        return None
+    return baseline
+
+
+def save_baseline(results: Dict[str, Dict[str, Any]], path: Path = BASELINE_FILE) -> None:
+    """Atualiza a baseline (benchmarks não executados agora são mantidos)."""
+    baseline = load_baseline(path) or {"version": BASELINE_VERSION, "results": {}}
+    baseline["results"].update(results)
+    baseline["machine"] = machine_info()
+    baseline["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(baseline, indent=2, sort_keys=True))
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_name)
+        raise
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Compara as medianas com a baseline e exibe a tabela.
+
+    Returns:
+        Ids dos benchmarks que pioraram além do limite.
+    """
+    regressions = []
+    base_results = baseline.get("results", {})
+    if baseline.get("machine", {}).get("node") not in (None, platform.node()):
+        print(f"! Baseline gerada em outra máquina ({baseline['machine']['node']}): comparação pouco confiável.")
+
+    print(f"\n   {'benchmark':<44} {'baseline':>10} {'atual':>10} {'delta':>8}")
+    for bench_id, current in results.items():
+        base = base_results.get(bench_id)
+        if base is None:
+            print(f"   {bench_id:<44} {'-':>10} {_fmt(current['median_s']):>10} {'novo':>8}")
+            continue
+        delta = current["median_s"] / base["median_s"] - 1 if base["median_s"] else 0.0
+        regressed = delta > threshold and current["median_s"] - base["median_s"] > MIN_DELTA_S
+        status = "  ❌ REGRESSÃO" if regressed else ""
+        print(f"   {bench_id:<44} {_fmt(base['median_s']):>10} {_fmt(current['median_s']):>10} {delta:>+7.0%}{status}")
+        if regressed:
+            regressions.append(bench_id)
+    return regressions
@@ -0,0 +1,170 @@
+"""
+Armazenamento de screenshots endereçado por conteúdo (runs/blobs/).
+
+Cada imagem é gravada uma única vez em blobs/<sha[:2]>/<sha256>.png e as
+pastas de run recebem um hardlink (screenshots/<arquivo>.png aponta para o
+blob). Re-catalogar um painel que não mudou não ocupa disco novo, e o
+restante do código continua lendo screenshots/ normalmente.
+
+- Coleta de lixo: um blob cujo inode não aparece em nenhuma pasta de run
+  não é referenciado e pode ser removido (`python blob_store.py gc`). Links
+  fora de runs/ (ex: imagens do relatório) não seguram o blob, e blobs
+  usados recentemente (BLOB_GC_GRACE_SECONDS) são mantidos.
+  Sem suporte a hardlink (ex: FAT, volumes distintos), o run recebe uma cópia
+  e o GC não remove nada (não há como saber quais blobs estão em uso).
+"""
+
+import os
+import sys
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Set, Tuple
+
+from config import BLOB_STORE_DIR, BLOB_GC_GRACE_SECONDS, OUTPUT_DIR
+from utils import setup_logger
+
+logger = setup_logger("BlobStore")
+
+
+class BlobStore:
+    """
+    Store de blobs PNG por SHA-256.
+
+    Attributes:
+        root: Pasta raiz do store (padrão: runs/blobs).
+        runs_dir: Pasta das runs (links ali dentro contam como referência no GC).
+    """
+
+    def __init__(self, root: str = BLOB_STORE_DIR, runs_dir: str = OUTPUT_DIR):
+        self.root = Path(root)
+        self.runs_dir = Path(runs_dir)
+
+    def blob_path(self, sha256: str, ext: str = ".png") -> Path:
+        return self.root / sha256[:2] / f"{sha256}{ext}"
+
+    def put(self, data: bytes) -> str:
+        """
+        Grava o conteúdo no store (se ainda não existir) e retorna o SHA-256.
+
+        A escrita é atômica (arquivo temporário + rename), então um blob
+        existente está sempre completo. Reusar um blob renova o mtime, o que
+        o protege do GC até o link_into seguinte.
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(sha256)
+        if path.exists():
+            try:
+                os.utime(path)
+                return sha256
+            except FileNotFoundError:
+                pass  # Removido pelo GC entre o exists() e o utime(): grava de novo
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return sha256
+
+    def _hardlinks_supported(self) -> bool:
+        """Testa se o store consegue criar hardlinks dentro de runs_dir (senão link_into copia)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.runs_dir.mkdir(parents=True, exist_ok=True)
+        fd, probe = tempfile.mkstemp(dir=self.root, prefix=".link_probe.")
+        os.close(fd)
+        probe_link = self.runs_dir / f"{os.path.basename(probe)}.link"
+        try:
+            os.link(probe, probe_link)
+            os.unlink(probe_link)
+            return True
+        except OSError:
+            return False
+        finally:
+            os.unlink(probe)
+
+    def _run_inodes(self) -> Set[Tuple[int, int]]:
+        """Inodes das imagens com hardlink nas pastas de run (fora do próprio store)."""
+        inodes = set()
+        if not self.runs_dir.exists():
+            return inodes
+        root = self.root.resolve()
+        for dirpath, dirnames, filenames in os.walk(self.runs_dir):
+            if Path(dirpath).resolve() == root:
+                dirnames.clear()
+                continue
+            for name in filenames:
+                if not name.endswith(".png"):
+                    continue
+                st = os.stat(os.path.join(dirpath, name))
+                if st.st_nlink > 1:
+                    inodes.add((st.st_dev, st.st_ino))
+        return inodes
+
+    def link_into(self, sha256: str, dest: Path) -> None:
+        """Materializa o blob em `dest` (hardlink; cópia se o sistema de arquivos não suportar)."""
+        src = self.blob_path(sha256)
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            if os.path.samefile(src, dest):
+                return
+            dest.unlink()
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copy2(src, dest)
+
+    def save(self, data: bytes, dest: Path) -> str:
+        """Atalho: put() + link_into(). Retorna o SHA-256."""
+        sha256 = self.put(data)
+        self.link_into(sha256, dest)
+        return sha256
+
+    def gc(self, dry_run: bool = False) -> Tuple[int, int]:
+        """
+        Remove blobs sem referência (nenhum hardlink em pastas de run).
+
+        Só contam links dentro de runs_dir: st_nlink sozinho incluiria os
+        hardlinks do relatório (reporter.link_or_copy) e manteria blobs de
+        runs já apagadas. Blobs com mtime dentro da janela de BLOB_GC_GRACE_SECONDS
+        antes da varredura são mantidos: um put() + link_into() em andamento
+        não perde o blob. Sem hardlinks (runs recebem cópias), não remove nada.
+
+        Returns:
+            (blobs removidos, bytes liberados)
+        """
+        if not self._hardlinks_supported():
+            logger.warning("⚠️ Sistema de arquivos sem hardlink entre o store e as runs: GC de blobs ignorado.")
+            return 0, 0
+
+        cutoff = time.time() - BLOB_GC_GRACE_SECONDS
+        referenced = self._run_inodes()
+        removed, freed = 0, 0
+        for path in self.root.glob("??/*.png"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if st.st_nlink > 1 and (st.st_dev, st.st_ino) in referenced:
+                continue
+            if st.st_mtime >= cutoff:
+                continue
+            removed += 1
+            freed += st.st_size
+            if not dry_run:
+                path.unlink()
+                if not any(path.parent.iterdir()):
+                    path.parent.rmdir()
+
+        action = "seriam removidos" if dry_run else "removidos"
+        logger.info(f"🧹 GC de blobs: {removed} {action} ({freed / 1024 / 1024:.1f} MB).")
+        return removed, freed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "gc":
+        print("Uso: python blob_store.py gc [--dry-run]")
+        sys.exit(1)
+    BlobStore().gc(dry_run="--dry-run" in sys.argv)
@@ -1,17 +1,312 @@
 import asyncio
-import io
+import base64
+import time
+from pathlib import Path
 from typing import Optional, List, Tuple, Dict, Any
 from playwright.async_api import async_playwright
-from PIL import Image
-from config import VIEWPORT
-from utils import setup_logger, are_urls_equivalent
+import json
+from config import VIEWPORT, AUTH_STATE_FILE, LOGIN_REDIRECT_TIMEOUT_MS, HASH_CAPTURE_MODE, HASH_JPEG_QUALITY, HASH_CAPTURE_SCALE
+from utils import setup_logger, are_urls_equivalent, roi_clip
+from network_filter import NetworkFilter, reset_page_stats, get_page_stats
+from telemetry import traced
+from image_pool import get_image_pool
 
 logger = setup_logger("BotCore")
 
+# Modos de captura dos frames de comparação (HASH_CAPTURE_MODE)
+FRAME_CAPTURE_MODES = ("png", "jpeg", "cdp")
+
+# Detecção do container de scroll
+SCROLL_MARK_ATTR = "data-bi-scroll-container"  # Marca o container encontrado (seletor único e estável para o cache)
+KNOWN_SCROLL_CONTAINERS = [  # Containers de relatório conhecidos, testados antes de qualquer varredura
+    ".exploreCanvas",            # Power BI (canvas do relatório)
+    ".displayAreaViewport",      # Power BI ("Ajustar à largura")
+    ".scrollRegion",             # Power BI Embedded
+    "main[role='main']",         # Databricks / Looker (área principal)
+]
+
+# Localiza o container com scroll vertical de maior área que ocupe >= minAreaRatio da viewport.
+# Todo elemento dentro da viewport com área > 50% dela contém o ponto central, então bastam os
+# containers conhecidos + os ancestrais do centro; a varredura de todos os nós (lenta em
+# relatórios com dezenas de milhares de elementos) só roda se isso não achar nada.
+FIND_SCROLL_CONTAINER_JS = """({minAreaRatio, knownSelectors, markAttr, probe, fullScan}) => {
+    const viewportArea = window.innerWidth * window.innerHeight;
+    const seen = new Set();
+    let best = null;
+    let bestArea = 0;
+    let bestVia = null;
+
+    const consider = (el, via) => {
+        if (!el || seen.has(el)) return;
+        seen.add(el);
+        if (el.scrollHeight <= el.clientHeight + 10) return;
+
+        const rect = el.getBoundingClientRect();
+        if (rect.width < 100 || rect.height < 100) return;
+
+        // Guarda o de maior área (mais resiliente que "primeiro encontrado")
+        const elementArea = rect.width * rect.height;
+        if (elementArea / viewportArea < minAreaRatio || elementArea <= bestArea) return;
+        best = el;
+        bestArea = elementArea;
+        bestVia = via;
+    };
+
+    if (probe) {
+        for (const el of document.querySelectorAll(knownSelectors)) consider(el, "known");
+        for (let el = document.elementFromPoint(window.innerWidth / 2, window.innerHeight / 2); el; el = el.parentElement) {
+            consider(el, "probe");
+        }
+    }
+    if (!best && fullScan) {
+        for (const el of document.querySelectorAll('*')) consider(el, "scan");
+    }
+    if (!best) return null;
+
+    for (const el of document.querySelectorAll('[' + markAttr + ']')) {
+        if (el !== best) el.removeAttribute(markAttr);
+    }
+    best.setAttribute(markAttr, '1');
+
+    let label = best.tagName.toLowerCase();
+    if (best.id) {
+        label = '#' + best.id;
+    } else if (best.className) {
+        const classes = best.className.toString().split(/\\s+/).filter(c => c && !c.includes(':'));
+        if (classes.length > 0) label += '.' + classes[0];
+    }
+
+    return {
+        selector: '[' + markAttr + ']',
+        label: label,
+        via: bestVia,
+        scrollHeight: best.scrollHeight,
+        clientHeight: best.clientHeight,
+        canScroll: true,
+        areaRatio: Math.round(bestArea / viewportArea * 100)
+    };
+}"""
+
+# Container já conhecido (cache): só relê as alturas
+READ_SCROLL_CONTAINER_JS = """(selector) => {
+    const el = document.querySelector(selector);
+    if (!el) return null;
+    return {
+        selector: selector,
+        scrollHeight: el.scrollHeight,
+        clientHeight: el.clientHeight,
+        canScroll: el.scrollHeight > el.clientHeight + 10
+    };
+}"""
+
+# Botão "Próxima Página" do rodapé nativo do Power BI (ordenados por precisão)
+NATIVE_NEXT_SELECTORS = [
+    "button[aria-label='Próxima Página']",
+    "button[aria-label='Next Page']",
+    "button i.pbi-glyph-chevronrightmedium",
+    ".pbi-glyph-chevronrightmedium",
+]
+
+# Sondagem de navegação pelo DOM (antes do Scout). O rodapé nativo e as faixas de abas
+# (role='tablist') só são aceitos quando a plataforma é reconhecida pelo host ou por uma marca
+# no DOM: em páginas desconhecidas (tabelas paginadas, portais, login) o Scout ainda decide
+# se aquilo é um dashboard.
+PLATFORM_HOST_HINTS = {
+    "powerbi": ["powerbi.com", "fabric.microsoft.com"],
+    "databricks": ["databricks"],
+    "tableau": ["tableau"],
+    "looker": ["looker"],
+    "qlik": ["qlik"],
+}
+PLATFORM_DOM_MARKERS = {
+    "databricks": "[data-navigation-tab-id]",
+    "powerbi": ".exploreCanvas, .displayAreaViewport, [class*='pbi-glyph']",
+    "tableau": "tableau-viz, #tableau_base_layout",
+}
+
+PROBE_NAVIGATION_JS = """({nextSelectors, hostHints, domMarkers, minTabs}) => {
+    const vw = window.innerWidth, vh = window.innerHeight;
+    const clean = (text) => (text || '').replace(/\\s+/g, ' ').trim();
+    const visibleRect = (el) => {
+        const r = el.getBoundingClientRect();
+        if (r.width <= 0 || r.height <= 0) return null;
+        if (r.right <= 0 || r.bottom <= 0 || r.left >= vw || r.top >= vh) return null;
+        const style = getComputedStyle(el);
+        if (style.visibility === 'hidden' || style.display === 'none') return null;
+        return r;
+    };
+    const center = (r) => ({x: (r.left + r.width / 2) / vw, y: (r.top + r.height / 2) / vh});
+
+    const host = location.hostname.toLowerCase();
+    let platform = null;
+    for (const [name, hints] of Object.entries(hostHints)) {
+        if (hints.some(h => host.includes(h))) { platform = name; break; }
+    }
+    if (!platform) {
+        for (const [name, selector] of Object.entries(domMarkers)) {
+            if (document.querySelector(selector)) { platform = name; break; }
+        }
+    }
+
+    // 1. Rodapé nativo do Power BI: botão "Próxima Página" + contador "1 de N" nos ancestrais
+    // (só em Power BI: grids paginados de outras plataformas têm o mesmo botão)
+    for (const selector of (platform === 'powerbi' ? nextSelectors : [])) {
+        const el = document.querySelector(selector);
+        if (!el) continue;
+        const button = el.closest('button') || el;
+        const rect = visibleRect(button);
+        if (!rect) continue;
+        let counter = null;
+        for (let node = button.parentElement, depth = 0; node && depth < 4 && !counter; node = node.parentElement, depth++) {
+            const match = clean(node.innerText).match(/\\d+\\s*(?:de|of|\\/)\\s*\\d+/i);
+            if (match) counter = match[0];
+        }
+        // Sem contador não há como saber quantos cliques dar
+        if (!counter) continue;
+        return {
+            platform: 'powerbi', navType: 'native_footer', pageCount: counter, via: selector,
+            targets: [{label: 'Next Page Button', ...center(rect)}]
+        };
+    }
+
+    // 2. Faixas de abas (role='tablist'): fica a de mais abas visíveis
+    let best = null;
+    for (const list of document.querySelectorAll("[role='tablist']")) {
+        if (list.closest("[role='dialog'], [role='menu'], [aria-hidden='true']")) continue;
+        const items = [];
+        for (const tab of list.querySelectorAll("[role='tab']")) {
+            if (tab.closest("[role='tablist']") !== list) continue;
+            const rect = visibleRect(tab);
+            if (rect) items.push({tab, rect});
+        }
+        if (items.length >= minTabs && (!best || items.length > best.items.length)) best = {list, items};
+    }
+    if (!best || !platform) return {platform, navType: null, pageCount: null, via: null, targets: []};
+
+    const xs = best.items.map(i => i.rect.left), ys = best.items.map(i => i.rect.top);
+    const vertical = best.list.getAttribute('aria-orientation') === 'vertical'
+        || Math.max(...ys) - Math.min(...ys) > Math.max(...xs) - Math.min(...xs);
+    const stripY = center(best.list.getBoundingClientRect()).y;
+    let navType = 'top_tabs';
+    if (platform === 'databricks') navType = 'databricks_tabs';
+    else if (vertical) navType = 'left_list';
+    else if (stripY > 0.8) navType = 'bottom_tabs';
+
+    const targets = [];
+    for (const {tab, rect} of best.items) {
+        // A aba ativa fica de fora: o Explorer já tem a captura inicial
+        if (tab.getAttribute('aria-selected') === 'true') continue;
+        const label = clean(tab.getAttribute('aria-label') || tab.innerText || tab.getAttribute('title')) || 'Tab';
+        // Seletores que sobrevivem a um reload (retomada do checkpoint): id, id de navegação ou papel + nome
+        let selector = `role=tab[name=${JSON.stringify(label)}]`;
+        const navId = tab.getAttribute('data-navigation-tab-id');
+        if (tab.id) selector = '#' + CSS.escape(tab.id);
+        else if (navId) selector = `${tab.tagName.toLowerCase()}[data-navigation-tab-id="${CSS.escape(navId)}"]`;
+        targets.push({label, selector, ...center(rect)});
+    }
+    return {platform, navType, pageCount: null, via: "[role='tablist']", targets};
+}"""
+
 # Configurações de scroll screenshot
 SCROLL_PAUSE_MS = 600  # Tempo para renderização após scroll
 SCROLL_OVERLAP_PX = 150  # Overlap entre capturas para evitar cortes
 
+# Argumentos para tentar diminuir detecção de automação (evitar bloqueio Google)
+LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--no-sandbox",
+    "--disable-infobars"
+]
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class SessionExpiredError(Exception):
+    """Sessão (storage_state) expirada: o painel redirecionou para login em modo headless."""
+
+
+async def apply_storage_state(context: Any, state_path: str = AUTH_STATE_FILE) -> bool:
+    """
+    Aplica um storage_state salvo (cookies + localStorage) a um contexto existente.
+
+    Funciona também com perfil persistente, que não aceita storage_state no launch.
+    O localStorage é injetado via init script, apenas na origem correspondente.
+    """
+    path = Path(state_path)
+    if not path.exists():
+        return False
+
+    state = json.loads(path.read_text(encoding="utf-8"))
+    cookies = state.get("cookies", [])
+    if cookies:
+        await context.add_cookies(cookies)
+
+    origins = {o["origin"]: o.get("localStorage", []) for o in state.get("origins", [])}
+    if origins:
+        await context.add_init_script(f"""(() => {{
+            const origins = {json.dumps(origins)};
+            const items = origins[window.location.origin];
+            if (!items) return;
+            for (const item of items) {{
+                if (window.localStorage.getItem(item.name) === null) {{
+                    window.localStorage.setItem(item.name, item.value);
+                }}
+            }}
+        }})();""")
+
+    logger.info(f"🔑 Sessão salva aplicada ({len(cookies)} cookies, {len(origins)} origens).")
+    return True
+
+
+async def launch_browser_context(playwright: Any, headless: bool = False, profile_dir: Optional[str] = None) -> Tuple[Any, Any]:
+    """
+    Lança o navegador e cria o contexto principal.
+
+    Com profile_dir, usa um perfil persistente (launch_persistent_context): o cache
+    HTTP em disco sobrevive entre execuções, então o runtime do Power BI é baixado
+    uma vez por máquina. Sem profile_dir (padrão), usa um contexto efêmero (cache só
+    em memória). O Chrome trava o user-data-dir: só um processo por vez pode usar o
+    perfil, por isso ele é opt-in (contexto mestre do Batch).
+
+    Returns:
+        Tupla (browser, context). No modo persistente, browser pode ser None.
+    """
+    # Tenta usar Chrome instalado no sistema para passar validações de "Secure Browser"
+    # O bundled Chromium é frequentemente bloqueado pelo Google Login.
+    channels = ["chrome", None]
+
+    for channel in channels:
+        try:
+            if profile_dir:
+                Path(profile_dir).mkdir(parents=True, exist_ok=True)
+                context = await playwright.chromium.launch_persistent_context(
+                    profile_dir,
+                    headless=headless,
+                    channel=channel,
+                    args=LAUNCH_ARGS,
+                    ignore_default_args=["--enable-automation"],
+                    viewport=VIEWPORT,
+                    user_agent=USER_AGENT
+                )
+                browser = context.browser
+            else:
+                browser = await playwright.chromium.launch(
+                    headless=headless,
+                    channel=channel,
+                    args=LAUNCH_ARGS,
+                    ignore_default_args=["--enable-automation"]
+                )
+                # Cria contexto com Full HD forçado e User Agent realístico
+                context = await browser.new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
+
+            if channel:
+                logger.info("✅ Google Chrome (System) iniciado com sucesso.")
+            return browser, context
+
+        except Exception as e:
+            if channel is None:
+                raise
+            logger.warning(f"⚠️ Falha ao iniciar Chrome do sistema ({e}). Tentando Chromium bundled...")
+
 
 class BrowserDriver:
     def __init__(self):
@@ -20,10 +315,29 @@ class BrowserDriver:
         self.context = None
         self.page = None
         self.owns_context = False  # Flag para controlar se podemos fechar o contexto
+        self.page_pool = None  # PagePool de onde a aba foi retirada (se houver)
+        self.time_to_stable = None  # Segundos do goto até a estabilidade visual (última navegação)
+        self.headless = False  # Headless não tem humano para logar: sessão expirada falha rápido
+        self.scroll_container: Optional[Dict[str, Any]] = None  # Container de scroll da navegação atual (cache)
+        self.scroll_full_scanned = False  # Varredura completa já rodou sem resultado nesta navegação
+        self.cdp_session = None  # Sessão CDP da aba atual (frames de comparação em modo "cdp")
+        self._cdp_page = None
+        self._cdp_unavailable = False
 
-    async def start(self, headless: bool = True, browser_instance: Any = None, context_instance: Any = None) -> None:
+    async def start(self, headless: bool = True, browser_instance: Any = None, context_instance: Any = None, page_pool: Any = None) -> None:
         """Inicia o Playwright (ou anexa a um browser/contexto existente)."""
-        
+        self.headless = headless
+        
+        # 0. Se receber um POOL de abas pré-aquecidas (Batch)
+        if page_pool:
+            logger.info("♻️ Retirando aba pré-aquecida do pool...")
+            self.page_pool = page_pool
+            self.context = page_pool.context
+            self.browser = page_pool.context.browser
+            self.owns_context = False
+            self.page = await page_pool.acquire()
+            return
+
         # 1. Se receber um CONTEXTO já pronto (Sessão Compartilhada)
         if context_instance:
             logger.info("♻️ Anexando a CONTEXTO compartilhado (Sessão Persistente)...")
@@ -42,43 +356,32 @@ class BrowserDriver:
         else:
             self.playwright = await async_playwright().start()
             logger.info(f"Iniciando navegador dedicado (Headless: {headless})...")
-            
-            # Argumentos para tentar diminuir detecção de automação (evitar bloqueio Google)
-            launch_args = [
-                "--disable-blink-features=AutomationControlled",
-                "--no-sandbox",
-                "--disable-infobars"
-            ]
-            
-            # Tenta usar Chrome instalado no sistema para passar validações de "Secure Browser"
-            # O bundled Chromium é frequentemente bloqueado pelo Google Login.
-            try:
-                self.browser = await self.playwright.chromium.launch(
-                    headless=headless,
-                    channel="chrome", # Tenta usar Google Chrome instalado
-                    args=launch_args,
-                    ignore_default_args=["--enable-automation"]
-                )
-                logger.info("✅ Google Chrome (System) iniciado com sucesso.")
-            except Exception as e:
-                logger.warning(f"⚠️ Falha ao iniciar Chrome do sistema ({e}). Tentando Chromium bundled...")
-                self.browser = await self.playwright.chromium.launch(
-                    headless=headless,
-                    args=launch_args
-                )
+            self.browser, self.context = await launch_browser_context(self.playwright, headless=headless)
+            self.owns_context = True  # Navegador dedicado: close() encerra tudo (flush do perfil/cache)
+            await apply_storage_state(self.context)
+            await NetworkFilter().install(self.context)
+            self.page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+            return
         
         # Cria contexto com Full HD forçado e User Agent realístico
-        self.context = await self.browser.new_context(
-            viewport=VIEWPORT,
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+        self.context = await self.browser.new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
+        await apply_storage_state(self.context)
+        await NetworkFilter().install(self.context)
         self.page = await self.context.new_page()
 
+    @traced("navigate_and_stabilize", result_attrs=lambda ok: {"outcome": "ok" if ok else "fail"})
     async def navigate_and_stabilize(self, url: str) -> bool:
         """
         Navega para URL. Se cair em tela de login, espera o humano logar.
+
+        Em modo headless não há humano: espera apenas o SSO silencioso
+        (LOGIN_REDIRECT_TIMEOUT_MS) e lança SessionExpiredError se não voltar ao painel.
         """
         logger.info(f"Navegando para: {url}")
+        reset_page_stats(self.page)
+        self.reset_scroll_cache()  # Container de scroll vale até a próxima navegação
+        self.time_to_stable = None
+        started_at = time.monotonic()
         try:
             # 1. Tenta ir para a URL
             await self.page.goto(url, wait_until="domcontentloaded", timeout=60000)
@@ -89,17 +392,27 @@ class BrowserDriver:
             
             if not are_urls_equivalent(url, self.page.url):
                 logger.info("🛑 URL inicial difere do alvo (Login/SSO/Check detectado).")
-                logger.info("⏳ Aguardando você navegar até a URL correta...")
                 
                 # Predicado para wait_for_url
                 # Nota: precisamos capturar 'url' do escopo externo
                 def is_target_url(current_u):
                     return are_urls_equivalent(url, current_u)
 
-                # Espera indefinidamente (timeout=0) até a URL corresponder logicamente
-                await self.page.wait_for_url(is_target_url, timeout=0)
+                if self.headless:
+                    # Sem humano: só aguarda o SSO silencioso (redirects automáticos)
+                    try:
+                        await self.page.wait_for_url(is_target_url, timeout=LOGIN_REDIRECT_TIMEOUT_MS)
+                    except Exception:
+                        raise SessionExpiredError(
+                            f"Sessão expirada ou inválida (parado em {self.page.url}). Rode login.py novamente."
+                        )
+                else:
+                    logger.info("⏳ Aguardando você navegar até a URL correta...")
+                    # Espera indefinidamente (timeout=0) até a URL corresponder logicamente
+                    await self.page.wait_for_url(is_target_url, timeout=0)
                 
                 logger.info("✅ URL correta alcançada! Retomando automação...")
+                started_at = time.monotonic() # Não conta o tempo de login humano
                 # Pequena pausa para garantir renderização inicial pós-redirecionamento
                 await asyncio.sleep(2)
 
@@ -114,31 +427,38 @@ class BrowserDriver:
             # 4. Estabilização Visual - espera visuais terminarem de renderizar
             await self._wait_for_visual_stability()
             
+            self.time_to_stable = round(time.monotonic() - started_at, 2)
             return True
 
+        except SessionExpiredError:
+            raise # Precisa chegar ao orquestrador (re-enfileirar URL)
         except Exception as e:
             logger.error(f"Erro na navegação: {e}")
             return False
 
+    @traced("wait_for_visual_stability", result_attrs=lambda stable: {"outcome": "stable" if stable else "timeout"})
     async def _wait_for_visual_stability(
         self, 
         max_wait_seconds: float = 30.0, 
         check_interval: float = 1.0,
-        stability_threshold: int = 5
-    ) -> None:
+        stability_threshold: int = 5,
+        nav_type: str = "default"
+    ) -> bool:
         """
         Aguarda até que a página pare de mudar visualmente.
         
         Útil para dashboards com visuais assíncronos (mapas, gráficos animados).
-        Compara screenshots consecutivas usando perceptual hash.
+        Compara frames consecutivos da ROI (capture_frame) usando perceptual hash.
         
         Args:
             max_wait_seconds: Tempo máximo de espera em segundos.
             check_interval: Intervalo entre verificações em segundos.
             stability_threshold: Diferença máxima de hash para considerar estável.
+            nav_type: ROI comparada (ignora rodapé/abas que animam sem mudar o conteúdo).
+
+        Returns:
+            True se estabilizou, False se atingiu o timeout.
         """
-        from utils import bytes_to_image, compute_phash
-        
         logger.info("⏳ Aguardando estabilidade visual...")
         
         start_time = asyncio.get_event_loop().time()
@@ -148,9 +468,7 @@ class BrowserDriver:
         
         while (asyncio.get_event_loop().time() - start_time) < max_wait_seconds:
             # Captura screenshot atual
-            shot_bytes = await self.page.screenshot(type="png")
-            shot_pil = bytes_to_image(shot_bytes)
-            current_hash = compute_phash(shot_pil)
+            current_hash = await self.frame_hash(nav_type)
             
             if previous_hash is not None:
                 diff = current_hash - previous_hash
@@ -162,7 +480,7 @@ class BrowserDriver:
                     if stable_count >= stable_needed:
                         elapsed = asyncio.get_event_loop().time() - start_time
                         logger.info(f"✅ Página estabilizada em {elapsed:.1f}s")
-                        return
+                        return True
                 else:
                     stable_count = 0
                     logger.debug(f"Visual ainda mudando (diff={diff}), aguardando...")
@@ -171,6 +489,7 @@ class BrowserDriver:
             await asyncio.sleep(check_interval)
         
         logger.warning(f"⚠️ Timeout de estabilidade visual ({max_wait_seconds}s) - prosseguindo mesmo assim")
+        return False
 
     async def click_at_percentage(self, x_pct: float, y_pct: float) -> bool:
         """Clica na tela baseada em porcentagem da viewport."""
@@ -199,20 +518,96 @@ class BrowserDriver:
             logger.error(f"Erro ao clicar: {e}")
             return False
 
+    def get_network_metrics(self) -> Dict[str, Any]:
+        """
+        Métricas de rede da aba desde a última navegação.
+
+        Inclui requisições, bloqueios, bytes transferidos e o tempo até estabilizar.
+        """
+        metrics = get_page_stats(self.page)
+        metrics["time_to_stable_s"] = self.time_to_stable
+        return metrics
+
     async def get_screenshot_bytes(self) -> bytes:
         """Retorna bytes da screenshot PNG (viewport atual)."""
         return await self.page.screenshot(type="png")
 
-    async def get_full_page_screenshot_bytes(self) -> bytes:
+    async def capture_frame(self, nav_type: str = "default", mode: str = HASH_CAPTURE_MODE, scale: float = HASH_CAPTURE_SCALE) -> bytes:
+        """
+        Captura a ROI da viewport só para comparação (pHash), nunca para persistir.
+
+        O recorte (ROI_CROP do nav_type) é pedido ao Chromium via clip, então rodapé,
+        barra de abas etc. nem chegam a ser codificados/decodificados.
+
+        Modos:
+            "png"  -> lossless, mesmo custo da captura final (encode no Chromium + decode aqui)
+            "jpeg" -> JPEG de baixa qualidade via page.screenshot
+            "cdp"  -> JPEG via Page.captureScreenshot com optimizeForSpeed e reduzido por `scale`,
+                      sem a preparação do page.screenshot (espera de fontes, caret, escala)
+
+        O Chromium não expõe o bitmap cru pelo CDP: JPEG rápido é o formato mais
+        barato de gerar e decodificar (o pool decodifica em escala reduzida).
+        """
+        clip = roi_clip(self.page.viewport_size or VIEWPORT, nav_type)
+        if mode == "cdp" and not self._cdp_unavailable:
+            try:
+                return await self._capture_frame_cdp(clip, scale)
+            except Exception as e:
+                # Aba fechada no meio da captura não é falta de suporte
+                if self.page.is_closed():
+                    raise
+                logger.warning(f"⚠️ Captura via CDP indisponível ({e}). Usando JPEG do Playwright.")
+                self._cdp_unavailable = True
+        if mode == "png":
+            return await self.page.screenshot(type="png", clip=clip)
+        return await self.page.screenshot(type="jpeg", quality=HASH_JPEG_QUALITY, clip=clip)
+
+    async def frame_hash(self, nav_type: str = "default") -> Any:
+        """pHash da ROI da viewport (frame de comparação, ver capture_frame)."""
+        # O frame já vem recortado na ROI: hash da imagem inteira
+        return await get_image_pool().phash(await self.capture_frame(nav_type))
+
+    async def _capture_frame_cdp(self, clip: Dict[str, int], scale: float) -> bytes:
+        # Uma sessão por aba (o PagePool pode trocar a aba do driver)
+        if self.cdp_session is None or self._cdp_page is not self.page:
+            self.cdp_session = await self.page.context.new_cdp_session(self.page)
+            self._cdp_page = self.page
+        # clip do CDP é em coordenadas do documento: soma a rolagem da janela
+        metrics = await self.cdp_session.send("Page.getLayoutMetrics")
+        viewport = metrics["cssVisualViewport"]
+        result = await self.cdp_session.send("Page.captureScreenshot", {
+            "format": "jpeg",
+            "quality": HASH_JPEG_QUALITY,
+            "optimizeForSpeed": True,
+            "clip": {**clip, "x": clip["x"] + viewport["pageX"], "y": clip["y"] + viewport["pageY"], "scale": scale}
+        })
+        return base64.b64decode(result["data"])
+
+    async def _detach_cdp_session(self) -> None:
+        if self.cdp_session is not None:
+            try:
+                await self.cdp_session.detach()
+            except Exception:
+                pass  # Aba já fechada
+            self.cdp_session = self._cdp_page = None
+
+    @traced("full_page_screenshot", result_attrs=lambda data: {"bytes": len(data)})
+    async def get_full_page_screenshot_bytes(self, stable: bool = False) -> bytes:
         """
         Retorna bytes da screenshot PNG da página completa.
         
         Se a página tiver scroll vertical, faz múltiplas capturas
         enquanto rola e une tudo em uma imagem única.
         
-        Ideal para dashboards Power BI extensos verticalmente.
+        Ideal para dashboards Power BI extensos verticalmente. É a captura
+        persistida: a detecção de mudança usa capture_frame/frame_hash, então
+        esta rotina roda uma vez por página aceita.
+
+        Args:
+            stable: O chamador acabou de aguardar a estabilidade visual; se o
+                container já estiver no topo, a espera no topo é dispensada.
         """
-        # 1. Encontra o container principal com scroll
+        # 1. Encontra o container principal com scroll (cacheado até a próxima navegação)
         container_info = await self._find_scroll_container()
         
         if not container_info or not container_info.get('canScroll'):
@@ -224,92 +619,78 @@ class BrowserDriver:
         client_height = container_info['clientHeight']
         area_ratio = container_info.get('areaRatio', '?')
         
-        logger.info(f"Scroll detectado em '{selector}' (area={area_ratio}%, scrollH={scroll_height}px)")
+        logger.info(f"Scroll detectado em '{container_info.get('label', selector)}' (area={area_ratio}%, scrollH={scroll_height}px)")
         
         # 2. Captura com scroll
         screenshots, positions = await self._capture_with_scroll(
-            selector, scroll_height, client_height
+            selector, scroll_height, client_height, stable
         )
         
         if len(screenshots) == 1:
             return screenshots[0]
         
-        # 3. Une as imagens
+        # 3. Une as imagens e converte para PNG (no pool de imagem, fora do event loop)
         logger.info(f"Unindo {len(screenshots)} capturas...")
-        final_image = self._stitch_screenshots(screenshots, positions, client_height, scroll_height)
-        
-        # 4. Converte para bytes
-        output_buffer = io.BytesIO()
-        final_image.save(output_buffer, format="PNG")
-        return output_buffer.getvalue()
+        return await get_image_pool().stitch_png(screenshots, positions, client_height, scroll_height)
+
+    def reset_scroll_cache(self) -> None:
+        """Esquece o container de scroll (nova navegação)."""
+        self.scroll_container = None
+        self.scroll_full_scanned = False
 
     async def _find_scroll_container(self, min_area_ratio: float = 0.6) -> Optional[Dict[str, Any]]:
         """
         Encontra o container principal com scroll vertical.
         
         Retorna o elemento com scroll de maior área que ocupe >= min_area_ratio do viewport.
+        O container encontrado é marcado (SCROLL_MARK_ATTR) e cacheado até a próxima
+        navegação (vale para a Home e para todas as abas): as chamadas seguintes só releem
+        as alturas. A varredura completa do DOM roda no máximo uma vez enquanto o layout
+        não mudar.
         """
-        return await self.page.evaluate("""(minAreaRatio) => {
-            const viewportArea = window.innerWidth * window.innerHeight;
-            let best = null;
-            let bestArea = 0;
-            
-            for (const el of document.querySelectorAll('*')) {
-                const hasVScroll = el.scrollHeight > el.clientHeight + 10;
-                if (!hasVScroll) continue;
-                
-                const rect = el.getBoundingClientRect();
-                if (rect.width < 100 || rect.height < 100) continue;
-                
-                const elementArea = rect.width * rect.height;
-                const areaRatio = elementArea / viewportArea;
-                
-                // Só considera se atinge o critério mínimo de área
-                if (areaRatio < minAreaRatio) continue;
-                
-                // Guarda o de maior área (mais resiliente que "primeiro encontrado")
-                if (elementArea > bestArea) {
-                    bestArea = elementArea;
-                    
-                    let selector = el.tagName.toLowerCase();
-                    if (el.id) {
-                        selector = '#' + el.id;
-                    } else if (el.className) {
-                        const classes = el.className.toString().split(/\\s+/).filter(c => c && !c.includes(':'));
-                        if (classes.length > 0) {
-                            selector = el.tagName.toLowerCase() + '.' + classes[0];
-                        }
-                    }
-                    
-                    best = {
-                        selector: selector,
-                        scrollHeight: el.scrollHeight,
-                        clientHeight: el.clientHeight,
-                        canScroll: true,
-                        areaRatio: Math.round(areaRatio * 100)
-                    };
-                }
-            }
-            
-            return best;
-        }""", min_area_ratio)
+        cached = self.scroll_container
+        if cached:
+            info = await self.page.evaluate(READ_SCROLL_CONTAINER_JS, cached["selector"])
+            if info is not None and info["canScroll"]:
+                return {**cached, **info}
+            # Container saiu do DOM (re-render) ou parou de rolar (a aba atual rola outro
+            # container): o layout mudou, procura de novo (inclusive com varredura completa)
+            self.reset_scroll_cache()
+
+        full_scan = not self.scroll_full_scanned
+        info = await self.page.evaluate(FIND_SCROLL_CONTAINER_JS, {
+            "minAreaRatio": min_area_ratio,
+            "knownSelectors": ", ".join(KNOWN_SCROLL_CONTAINERS),
+            "markAttr": SCROLL_MARK_ATTR,
+            "probe": True,
+            "fullScan": full_scan
+        })
+        if info is not None:
+            self.scroll_container = info
+        elif full_scan:
+            self.scroll_full_scanned = True
+        return info
 
-    async def _capture_with_scroll(self, selector: str, scroll_height: int, client_height: int) -> Tuple[List[bytes], List[int]]:
+    async def _capture_with_scroll(self, selector: str, scroll_height: int, client_height: int, stable: bool = False) -> Tuple[List[bytes], List[int]]:
         """Captura screenshots enquanto faz scroll."""
         step = client_height - SCROLL_OVERLAP_PX
         
-        # Volta ao topo
-        await self.page.evaluate(f"""() => {{
+        # Volta ao topo (retorna a posição anterior)
+        previous_scroll = await self.page.evaluate(f"""() => {{
             const el = document.querySelector('{selector}');
-            if (el) el.scrollTop = 0;
+            if (!el) return 0;
+            const previous = el.scrollTop;
+            el.scrollTop = 0;
+            return previous;
         }}""")
         
-        # Aguarda estabilização visual no topo
-        await self._wait_for_visual_stability(
-            max_wait_seconds=10.0, # Aumentado para Batch Mode
-            check_interval=0.5,
-            stability_threshold=3
-        )
+        # Aguarda estabilização visual no topo (desnecessária se já estava estável no topo)
+        if not (stable and previous_scroll == 0):
+            await self._wait_for_visual_stability(
+                max_wait_seconds=10.0, # Aumentado para Batch Mode
+                check_interval=0.5,
+                stability_threshold=3
+            )
         
         screenshots = []
         positions = []
@@ -317,18 +698,20 @@ class BrowserDriver:
         max_scroll = scroll_height - client_height
         
         while True:
-            # Define posição do scroll
-            await self.page.evaluate(f"""(scrollY) => {{
-                const el = document.querySelector('{selector}');
-                if (el) el.scrollTop = scrollY;
-            }}""", current_scroll)
-            
-            # Estabilização visual leve para cada posição de scroll
-            await self._wait_for_visual_stability(
-                max_wait_seconds=8.0,  # Aumentado para Batch Mode
-                check_interval=0.5,
-                stability_threshold=3  # Mais sensível
-            )
+            # O topo já está estável: só rola (e espera) a partir da segunda posição
+            if current_scroll > 0:
+                # Define posição do scroll
+                await self.page.evaluate(f"""(scrollY) => {{
+                    const el = document.querySelector('{selector}');
+                    if (el) el.scrollTop = scrollY;
+                }}""", current_scroll)
+                
+                # Estabilização visual leve para cada posição de scroll
+                await self._wait_for_visual_stability(
+                    max_wait_seconds=8.0,  # Aumentado para Batch Mode
+                    check_interval=0.5,
+                    stability_threshold=3  # Mais sensível
+                )
             
             # Lê posição real
             actual_scroll = await self.page.evaluate(f"""() => {{
@@ -363,30 +746,16 @@ class BrowserDriver:
         
         return screenshots, positions
 
-    def _stitch_screenshots(self, screenshots: List[bytes], positions: List[int], client_height: int, scroll_height: int) -> Image.Image:
-        """Une múltiplas screenshots baseado nas posições de scroll."""
-        images = [Image.open(io.BytesIO(b)) for b in screenshots]
-        
-        width = images[0].width
-        final_height = scroll_height
-        
-        final_image = Image.new("RGB", (width, final_height), (255, 255, 255))
-        
-        for i, (img, scroll_pos) in enumerate(zip(images, positions)):
-            y_in_final = int(scroll_pos)
-            
-            # Quanto da imagem podemos colar
-            available_space = final_height - y_in_final
-            crop_height = min(img.height, available_space)
-            
-            if crop_height > 0:
-                cropped = img.crop((0, 0, width, crop_height))
-                final_image.paste(cropped, (0, y_in_final))
-        
-        return final_image
-
     async def close(self) -> None:
         """Fecha o navegador e libera recursos."""
+        await self._detach_cdp_session()
+
+        # Aba emprestada do pool: devolve (o pool reseta ou recicla)
+        if self.page_pool:
+            self.page_pool.release(self.page)
+            self.page = None
+            return
+
         # Se estamos usando contexto compartilhado, só fechamos a PÁGINA (tab)
         # para não matar os outros workers
         if not self.owns_context:
@@ -403,22 +772,57 @@ class BrowserDriver:
             if self.browser: 
                 await self.browser.close()
             await self.playwright.stop()
+        
+        # Idempotente (o Cataloger pode chamar close() mais de uma vez)
+        self.page = self.context = self.browser = self.playwright = None
     
+    @traced("probe_navigation", result_attrs=lambda data: {"outcome": "hit" if data else "miss"})
+    async def probe_navigation(self) -> Optional[Dict[str, Any]]:
+        """
+        Descobre a navegação pelo DOM, sem LLM.
+
+        Reconhece o rodapé nativo do Power BI (botão "Próxima Página" + contador "1 de N")
+        e faixas de abas role='tablist' de plataformas conhecidas (Databricks, Tableau,
+        Looker, Qlik, Power BI). Retorna um nav_data no formato do Scout (com "source": "dom"),
+        com seletores exatos nas abas, ou None se a sondagem for inconclusiva.
+        """
+        try:
+            probe = await self.page.evaluate(PROBE_NAVIGATION_JS, {
+                "nextSelectors": NATIVE_NEXT_SELECTORS,
+                "hostHints": PLATFORM_HOST_HINTS,
+                "domMarkers": PLATFORM_DOM_MARKERS,
+                "minTabs": 2
+            })
+        except Exception as e:
+            logger.warning(f"Erro na sondagem de navegação pelo DOM: {e}")
+            return None
+
+        if not probe.get("navType"):
+            platform = probe.get("platform")
+            logger.info(f"🧭 DOM inconclusivo{f' ({platform})' if platform else ''}: navegação fica com o Scout.")
+            return None
+
+        logger.info(
+            f"🧭 Navegação reconhecida pelo DOM: {probe['platform']} / {probe['navType']} "
+            f"({len(probe['targets'])} alvos, via {probe['via']})."
+        )
+        return {
+            "is_dashboard": True,
+            "page_context": "dashboard",
+            "nav_reflection": f"DOM: {probe['platform']} ({probe['via']}).",
+            "nav_type": probe["navType"],
+            "page_count_visual": probe["pageCount"],
+            "targets": probe["targets"],
+            "source": "dom"
+        }
+
     async def try_click_native_next_button(self) -> bool:
         """
         Tenta clicar no botão nativo de próxima página via DOM selector.
         Otimizado com base no HTML real extraído.
         """
         try:
-            # Lista de seletores ordenados por precisão baseada no seu HTML
-            selectors = [
-                "button[aria-label='Próxima Página']",
-                "button[aria-label='Next Page']",
-                "button i.pbi-glyph-chevronrightmedium",
-                ".pbi-glyph-chevronrightmedium",
-            ]
-            
-            for selector in selectors:
+            for selector in NATIVE_NEXT_SELECTORS:
                 # Procura o elemento
                 btn = self.page.locator(selector)
                 
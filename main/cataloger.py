@@ -1,21 +1,29 @@
 import hashlib
 import json
+import time
 import shutil
 import asyncio
 from typing import Optional, Any
 from pathlib import Path
 from datetime import datetime
 
-from config import OUTPUT_DIR
-from utils import setup_logger, bytes_to_image, compute_phash, is_error_screen, parse_page_count, sanitize_filename
+from config import OUTPUT_DIR, NETWORK_FILTER_ENABLED, HEADLESS, DOM_PROBE_ENABLED
+from utils import setup_logger, parse_page_count, sanitize_filename, read_jsonl
 from bot_core import BrowserDriver
-from llm_service import GeminiService
+from llm_service import create_llm_service
 from explorer import DashboardExplorer
+from run_index import register_run
+from blob_store import BlobStore
+from disk_io import get_disk_writer
+from image_pool import get_image_pool
+from memory_budget import get_byte_budget, peak_rss_mb
+from telemetry import start_recording, record_span
+from llm_usage import start_usage_recording, summarize_usage, USAGE_FILENAME
 
 logger = setup_logger("Cataloger")
 
 class DashboardCataloger:
-    def __init__(self, driver: Optional[BrowserDriver] = None, shared_browser: Any = None, shared_context: Any = None, file_lock: Optional[asyncio.Lock] = None):
+    def __init__(self, driver: Optional[BrowserDriver] = None, shared_browser: Any = None, shared_context: Any = None, file_lock: Optional[asyncio.Lock] = None, page_pool: Any = None, headless: bool = HEADLESS):
         if driver:
             self.driver = driver
             self.owns_driver = False # Driver externo (sessão persistente)
@@ -25,16 +33,20 @@ class DashboardCataloger:
             
         self.shared_browser = shared_browser
         self.shared_context = shared_context # Novo suporte a contexto
+        self.page_pool = page_pool # Abas pré-aquecidas (Batch)
+        self.headless = headless # Headless: sessão expirada lança SessionExpiredError em vez de esperar login
         self.file_lock = file_lock
-        self.llm = GeminiService()
+        self.llm = create_llm_service() # Gemini (ou LLM falso com LLM_BACKEND=fake)
+        self.blob_store = BlobStore() # Screenshots deduplicadas por conteúdo entre runs
+        self.disk = get_disk_writer() # I/O em thread pool: disco lento não trava as outras abas
+        self.byte_budget = get_byte_budget() # Limita bytes de imagem em memória somando todos os workers
         self.processed_urls_file = Path(OUTPUT_DIR) / "processed_urls.json"
         
-    def _load_processed_urls(self):
-        """Carrega lista de URLs já processadas."""
+    async def _load_processed_urls(self):
+        """Carrega lista de URLs já processadas (leitura na thread de I/O: o ledger cresce com o histórico)."""
         if self.processed_urls_file.exists():
             try:
-                with open(self.processed_urls_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                return json.loads(await self.disk.read_text(self.processed_urls_file))
             except Exception as e:
                 logger.error(f"Erro ao carregar processed_urls.json: {e}")
                 return {}
@@ -50,22 +62,28 @@ class DashboardCataloger:
 
     async def _write_processed_entry(self, url, run_id, log_path):
         """Escrita real no arquivo."""
-        data = self._load_processed_urls()
+        data = await self._load_processed_urls()
         data[url] = {
             "processed_at": datetime.now().isoformat(),
             "run_id": run_id,
             "log_path": str(log_path)
         }
         try:
-            with open(self.processed_urls_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+            await self.disk.write_json(self.processed_urls_file, data)
         except Exception as e:
             logger.error(f"Erro ao salvar processed_urls.json: {e}")
 
 
+    async def _register_run(self, catalog_path, catalog_data):
+        """Atualiza o índice de runs (consumido pelo Smart Update e pelo Reporter)."""
+        try:
+            await self.disk.run(register_run, catalog_path, catalog_data)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar índice de runs: {e}")
+
     async def process_dashboard(self, url):
         # 0. Verifica Deduplicação (Histórico de Sucesso)
-        processed = self._load_processed_urls()
+        processed = await self._load_processed_urls()
         if url in processed:
             last_run = processed[url]
             logger.warning(f"⏭️ URL já processada em {last_run.get('processed_at')} (Run: {last_run.get('run_id')}). Pulando.")
@@ -76,6 +94,13 @@ class DashboardCataloger:
         url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
         wip_dir = Path(OUTPUT_DIR) / f"wip_{url_hash}"
         wip_dir.mkdir(parents=True, exist_ok=True)
+        run_dir = wip_dir # Onde os spans serão gravados (muda para a pasta final após o rename)
+
+        # Spans de tempo deste dashboard (isolados por worker via ContextVar)
+        span_recorder = start_recording(url)
+        usage_ledger = start_usage_recording(url) # Tokens/custo do Gemini deste dashboard
+        started_at = time.perf_counter()
+        outcome = "fail"
         
         img_dir = wip_dir / "screenshots"
         img_dir.mkdir(parents=True, exist_ok=True)
@@ -83,12 +108,14 @@ class DashboardCataloger:
         # Arquivos de Checkpoint
         scout_checkpoint = wip_dir / "scout_checkpoint.json"
         explore_checkpoint = wip_dir / "exploration_checkpoint.json"
+        analysis_checkpoint = wip_dir / "analysis_checkpoint.jsonl"
 
         # Variáveis de Estado
         initial_bytes = None
-        initial_pil = None
         nav_data = None
+        scout_restored = False # Scout veio do checkpoint (browser ainda não está no painel)
         pages_to_analyze = []
+        network_metrics = None
         
         try:
             # --- FASE 1: SCOUT (Batedor) ---
@@ -101,11 +128,9 @@ class DashboardCataloger:
                         logger.warning("⚠️ Checkpoint do Scout existe, mas '00_home.png' sumiu! Reiniciando fase.")
                         nav_data = None # Força reinício
                     else:
-                        nav_data = json.loads(scout_checkpoint.read_text(encoding='utf-8'))
+                        nav_data = json.loads(await self.disk.read_text(scout_checkpoint))
                         run_id = nav_data.get("_meta_run_id", datetime.now().strftime("%Y%m%d_%H%M%S"))
-                        
-                        initial_bytes = (img_dir / "00_home.png").read_bytes()
-                        initial_pil = bytes_to_image(initial_bytes)
+                        scout_restored = True
                 except Exception as e:
                     logger.warning(f"Erro ao ler checkpoint do Scout: {e}. Reiniciando fase.")
                     nav_data = None
@@ -117,9 +142,10 @@ class DashboardCataloger:
                 # Só inicia o driver se ele não estiver rodando ou se formos donos dele
                 if self.owns_driver or not self.driver.page:
                     await self.driver.start(
-                        headless=False, 
+                        headless=self.headless, 
                         browser_instance=self.shared_browser,
-                        context_instance=self.shared_context # Prioridade na persistência
+                        context_instance=self.shared_context, # Prioridade na persistência
+                        page_pool=self.page_pool
                     )
                 
                 success = await self.driver.navigate_and_stabilize(url)
@@ -127,25 +153,31 @@ class DashboardCataloger:
                     logger.error("Falha ao carregar dashboard.")
                     return None
 
-                initial_bytes = await self.driver.get_full_page_screenshot_bytes()
-                initial_pil = bytes_to_image(initial_bytes)
+                initial_bytes = await self.driver.get_full_page_screenshot_bytes(stable=True) # navigate_and_stabilize já aguardou
+                _, is_error = await get_image_pool().inspect(initial_bytes)
                 
-                if is_error_screen(initial_pil):
+                if is_error:
                     logger.error("Tela de erro detectada. Abortando.")
                     return None
                     
-                (img_dir / "00_home.png").write_bytes(initial_bytes)
+                await self.disk.run(self.blob_store.save, initial_bytes, img_dir / "00_home.png")
                 
-                logger.info("Executando Scout (Gemini)...")
-                nav_data = self.llm.discover_navigation(initial_bytes)
+                # Sondagem do DOM primeiro: o Scout (Gemini) só roda se ela for inconclusiva
+                nav_data = await self.driver.probe_navigation() if DOM_PROBE_ENABLED else None
+                if nav_data:
+                    logger.info("⚡ Navegação obtida pelo DOM. Scout (Gemini) dispensado.")
+                else:
+                    logger.info("Executando Scout (Gemini)...")
+                    # Cliente síncrono: roda numa thread (to_thread copia o contexto: spans e uso do LLM continuam no dashboard)
+                    nav_data = await asyncio.to_thread(self.llm.discover_navigation, initial_bytes)
                 
                 # Salva Checkpoint Scout
                 nav_data["_meta_run_id"] = datetime.now().strftime("%Y%m%d_%H%M%S") # Guarda ID original
-                scout_checkpoint.write_text(json.dumps(nav_data, indent=2), encoding='utf-8')
+                await self.disk.write_json(scout_checkpoint, nav_data)
                 
                 # Salva Auditoria Raw (mantendo compatibilidade)
                 if "raw_response" in nav_data:
-                    (wip_dir / "scout_audit_raw.txt").write_text(nav_data["raw_response"] or "", encoding="utf-8")
+                    await self.disk.write_text(wip_dir / "scout_audit_raw.txt", nav_data["raw_response"] or "", atomic=False, checkpoint=False)
                     del nav_data["raw_response"]
                 
                 # --- CHECK DE VÁLIDADE (Dashboard vs Outros) ---
@@ -164,6 +196,7 @@ class DashboardCataloger:
                     
                     try:
                         wip_dir.rename(ignored_dir)
+                        run_dir = ignored_dir # Spans e uso do LLM (Scout) vão para a pasta renomeada
                         logger.info(f"Pasta renomeada para: {ignored_name}")
                         # Vamos marcar como processado mas com status de erro no log_path
                         await self._mark_as_processed(url, run_id, ignored_dir / "scout_checkpoint.json")
@@ -177,14 +210,13 @@ class DashboardCataloger:
             if explore_checkpoint.exists():
                 logger.info("💾 Checkpoint de Exploração encontrado. Carregando páginas...")
                 try:
-                    pages_to_analyze = json.loads(explore_checkpoint.read_text(encoding='utf-8'))
+                    pages_to_analyze = json.loads(await self.disk.read_text(explore_checkpoint))
                     # Precisamos garantir que os bytes das imagens estejam em memória para o Analyst
-                    # O JSON tem 'filename', vamos reler do disco
+                    # O JSON tem 'filename': só valida a existência (bytes são lidos na análise)
                     valid_pages = []
                     for page in pages_to_analyze:
                         p_file = img_dir / page.get("filename", "")
                         if p_file.exists():
-                            page['bytes'] = p_file.read_bytes() # Recarrega bytes
                             valid_pages.append(page)
                         else:
                             logger.warning(f"Imagem {page.get('filename')} não encontrada. Ignorando página.")
@@ -199,9 +231,10 @@ class DashboardCataloger:
                 # Garante driver aberto se não veio do fluxo anterior (ex: crashou após Scout)
                 if not self.driver.page: 
                      await self.driver.start(
-                         headless=False, 
+                         headless=self.headless, 
                          browser_instance=self.shared_browser,
-                         context_instance=self.shared_context
+                         context_instance=self.shared_context,
+                         page_pool=self.page_pool
                      )
                      # Precisamos re-navegar se o driver reiniciou? 
                      # Se já passamos do Scout, teoricamente sim, mas o Explorer precisa estar na página?
@@ -209,6 +242,10 @@ class DashboardCataloger:
                      # Mas se já temos nav_data, podemos tentar ir direto? 
                      # Melhor garantir estabilidade:
                      await self.driver.navigate_and_stabilize(url) 
+                elif scout_restored:
+                    # Driver persistente pode estar em outro painel; o Explorer (e a
+                    # retomada do diário) parte sempre da Home.
+                    await self.driver.navigate_and_stabilize(url)
 
                 targets = nav_data.get("targets", [])
                 
@@ -240,7 +277,7 @@ class DashboardCataloger:
                 nav_type = nav_data.get("nav_type", "default")
                 
                 # ENRIQUECIMENTO DOM (DATABRICKS)
-                if nav_type == "databricks_tabs":
+                if nav_type == "databricks_tabs" and nav_data.get("source") != "dom": # Alvos da sondagem já vêm do DOM
                      logger.info("🧱 Identificado Databricks. Substituindo targets do Scout por query DOM...")
                      dom_targets = await self.driver.get_databricks_tabs()
                      if dom_targets:
@@ -271,32 +308,32 @@ class DashboardCataloger:
                 
                 # Prepara Home
                 nav_type = nav_data.get("nav_type", "default")
-                home_hash = compute_phash(initial_pil, nav_type) if initial_pil else "init"
+                home_hash = await self.driver.frame_hash(nav_type) # O driver está na Home (mesma ROI da deduplicação)
                 
-                explorer = DashboardExplorer(self.driver, wip_dir)
+                # Home já está em disco: libera a captura antes da exploração
+                initial_bytes = None
+
+                explorer = DashboardExplorer(self.driver, wip_dir, self.blob_store)
                 new_pages = await explorer.explore(targets, nav_type, home_hash)
                 
-                # Monta lista
-                # Nota: Recarrega home bytes se necessário (caso tenha vindo de checkpoint scout)
-                if not initial_bytes and (img_dir / "00_home.png").exists():
-                     initial_bytes = (img_dir / "00_home.png").read_bytes()
-
+                # Monta lista de handles (arquivo + hash; bytes ficam no disco)
                 pages_to_analyze = [{
                     "id": 0,
                     "label": "Home",
-                    "bytes": initial_bytes,
                     "filename": "00_home.png"
                 }] + new_pages
                 
                 # Salva Checkpoint Explorer
-                # Remove bytes antes de salvar JSON
-                pages_serializable = []
-                for p in pages_to_analyze:
-                    p_copy = p.copy()
-                    if 'bytes' in p_copy: del p_copy['bytes'] # Não serializa bytes
-                    pages_serializable.append(p_copy)
-                
-                explore_checkpoint.write_text(json.dumps(pages_serializable, indent=2), encoding='utf-8')
+                await self.disk.write_json(explore_checkpoint, pages_to_analyze)
+
+                # Métricas de rede (bytes por dashboard, tempo até estabilizar)
+                network_metrics = self.driver.get_network_metrics()
+                network_metrics["filter_enabled"] = NETWORK_FILTER_ENABLED
+                logger.info(
+                    f"📶 Rede: {network_metrics['bytes'] / 1e6:.1f} MB em {network_metrics['requests']} requisições "
+                    f"({network_metrics['blocked']} bloqueadas), estável em {network_metrics['time_to_stable_s']}s "
+                    f"(filtro {'ativo' if NETWORK_FILTER_ENABLED else 'desativado'})"
+                )
 
             
             # --- FASE 3: ANALYST (Analista) ---
@@ -305,30 +342,63 @@ class DashboardCataloger:
             if self.owns_driver and self.driver.page: 
                 await self.driver.close() # Libera recurso antes da análise pesada
             
+            # Recupera análises já pagas em execuções anteriores (chave: filename)
+            analyzed = {}
+            try:
+                for record in read_jsonl(analysis_checkpoint):
+                    analyzed[record.get("filename")] = record
+            except Exception as e:
+                logger.warning(f"Erro ao ler checkpoint do Analyst: {e}. Reanalisando todas as páginas.")
+                analyzed = {}
+
+            if analyzed:
+                logger.info(f"💾 Checkpoint do Analyst encontrado: {len(analyzed)} páginas já analisadas.")
+
             logger.info(f"Iniciando análise detalhada de {len(pages_to_analyze)} páginas...")
             
-            catalog_pages = []
             for page in pages_to_analyze:
+                filename = page.get('filename', '00_home.png')
+                if filename in analyzed:
+                    logger.info(f"⏭️ Análise já existente: {page['label']}")
+                    continue
+
                 logger.info(f"Analisando: {page['label']}")
                 
-                # Se faltar bytes (recuperação falhou?), tenta ler
-                if 'bytes' not in page or not page['bytes']:
-                     p_file = img_dir / page.get("filename", "")
-                     if p_file.exists():
-                         page['bytes'] = p_file.read_bytes()
-                
-                if 'bytes' in page and page['bytes']:
-                    analysis = self.llm.analyze_page(page['bytes'])
+                # Bytes lidos do disco só agora, dentro do orçamento de memória compartilhado
+                p_file = img_dir / filename
+                if p_file.exists():
+                    async with self.byte_budget.reserve(p_file.stat().st_size):
+                        image_bytes = await self.disk.read_bytes(p_file)
+                        # Fora do event loop: as outras abas seguem (e disputam o orçamento) durante a ida ao Gemini
+                        analysis = await asyncio.to_thread(self.llm.analyze_page, image_bytes)
+                        sha256 = page.get('sha256') or hashlib.sha256(image_bytes).hexdigest()
+                        del image_bytes
+
                     page_record = {
                         "id": page['id'],
                         "label": page['label'],
-                        "filename": page.get('filename', '00_home.png'),
+                        "filename": filename,
+                        "sha256": sha256,
                         "analysis": analysis
                     }
-                    catalog_pages.append(page_record)
+                    analyzed[filename] = page_record
+
+                    # Persiste imediatamente (falhas do LLM não entram: serão refeitas na retomada)
+                    if "erro" not in analysis:
+                        try:
+                            await self.disk.append_jsonl(analysis_checkpoint, page_record)
+                        except Exception as e:
+                            logger.error(f"Erro ao salvar checkpoint do Analyst: {e}")
                 else:
                     logger.error(f"Sem imagem para analisar página {page['label']}")
 
+            # Monta o catálogo a partir dos checkpoints, na ordem das páginas
+            catalog_pages = [
+                analyzed[p.get('filename', '00_home.png')]
+                for p in pages_to_analyze
+                if p.get('filename', '00_home.png') in analyzed
+            ]
+
 
             # --- FINALIZAÇÃO E ARQUIVAMENTO ---
             # Gera nome final
@@ -349,25 +419,53 @@ class DashboardCataloger:
                 "navigation_structure": nav_data,
                 "pages": catalog_pages
             }
+            if network_metrics:
+                catalog_data["metrics"] = {"network": network_metrics}
+
+            # Memória: pico de RSS do processo (no Batch, compartilhado pelos workers) e do orçamento de imagens
+            memory_metrics = {
+                "peak_rss_mb": peak_rss_mb(),
+                "inflight_peak_mb": round(self.byte_budget.peak / 1024 / 1024, 1),
+                "inflight_budget_mb": round(self.byte_budget.limit / 1024 / 1024, 1)
+            }
+            logger.info(
+                f"🧠 Memória: pico RSS {memory_metrics['peak_rss_mb']} MB, "
+                f"imagens em trânsito (pico) {memory_metrics['inflight_peak_mb']}/{memory_metrics['inflight_budget_mb']} MB"
+            )
+            catalog_data.setdefault("metrics", {})["memory"] = memory_metrics
+
+            # Tokens/custo do LLM (inclui chamadas de execuções anteriores retomadas via checkpoint)
+            try:
+                await self.disk.run(usage_ledger.flush, wip_dir)
+                llm_metrics = summarize_usage(read_jsonl(wip_dir / USAGE_FILENAME))
+                catalog_data["metrics"]["llm"] = llm_metrics
+                logger.info(
+                    f"💰 LLM: {llm_metrics['calls']} chamadas, {llm_metrics['total_tokens']} tokens "
+                    f"({llm_metrics['image_tokens']} de imagem), custo estimado ${llm_metrics['cost_usd']:.4f}"
+                )
+            except Exception as e:
+                logger.error(f"Erro ao consolidar uso do LLM: {e}")
 
             # Renomeia pasta WIP para Final
             try:
                 # Primeiro salva o catálago dentro da WIP
                 catalog_filename = f"catalog_{titulo_safe}.json" if titulo_safe else "catalog.json"
                 json_path = wip_dir / catalog_filename
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(catalog_data, f, indent=2, ensure_ascii=False)
+                await self.disk.write_json(json_path, catalog_data, ensure_ascii=False)
                 
                 # Checkpoints não são mais necessários na pasta final? 
                 # Pode apagar ou deixar. Vamos deixar como log.
                 
                 wip_dir.rename(final_run_dir)
+                run_dir = final_run_dir
                 logger.info(f"Pasta finalizada e renomeada para: {final_run_dir.name}")
                 
                  # Caminho atualizado do json
                 final_json_path = final_run_dir / catalog_filename
                 await self._mark_as_processed(url, run_id, final_json_path)
+                await self._register_run(final_json_path, catalog_data)
                 
+                outcome = "ok"
                 return catalog_data
 
             except Exception as e:
@@ -376,7 +474,15 @@ class DashboardCataloger:
 
         except Exception as e:
             logger.error(f"Erro crítico no processamento: {e}")
+            outcome = "error"
             raise # Propaga para ver o erro no console
         finally:
+            record_span("process_dashboard", time.perf_counter() - started_at, outcome)
+            if run_dir.exists():
+                try:
+                    await self.disk.run(span_recorder.flush, run_dir)
+                    await self.disk.run(usage_ledger.flush, run_dir)
+                except Exception as e:
+                    logger.error(f"Erro ao gravar spans/uso do LLM: {e}")
             if self.owns_driver:
                 await self.driver.close()
\ No newline at end of file
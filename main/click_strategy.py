@@ -9,8 +9,10 @@ import asyncio
 from dataclasses import dataclass
 from typing import List, Tuple, Optional
 
-from utils import setup_logger, bytes_to_image, compute_phash, is_error_screen, clamp
+from utils import setup_logger, clamp
 from config import DUPLICATE_THRESHOLD
+from telemetry import span
+from image_pool import get_image_pool
 
 logger = setup_logger("ClickStrategy")
 
@@ -106,72 +108,75 @@ class ConcentricSearchClicker:
     ) -> ClickResult:
         """
         Tenta clicar no alvo usando offsets em cruz até obter uma página diferente.
-        
+
         Args:
             target_x: Coordenada X do alvo em porcentagem (0.0 a 1.0).
             target_y: Coordenada Y do alvo em porcentagem (0.0 a 1.0).
-            seen_hashes: Lista de hashes já vistos para verificação de duplicata.
-            nav_type: Tipo de navegação para cálculo do phash.
+            seen_hashes: Lista de hashes já vistos (pHash da ROI, ver driver.frame_hash) para verificação de duplicata.
+            nav_type: Tipo de navegação (ROI capturada para o phash).
             base_wait: Tempo de espera (segundos) após primeiro clique.
             retry_wait: Tempo de espera (segundos) após cliques de retry.
-            
+
         Returns:
             ClickResult indicando sucesso/falha e dados da screenshot.
         """
         for attempt_idx, (off_x, off_y) in enumerate(self.offsets):
-            # Converte offset de pixels para porcentagem
-            pct_off_x, pct_off_y = self._pixel_to_percentage(off_x, off_y)
-            adj_x = clamp(target_x + pct_off_x)
-            adj_y = clamp(target_y + pct_off_y)
-            
-            if attempt_idx > 0:
-                logger.info(f"🔄 Tentativa {attempt_idx} (Offset {off_x}px, {off_y}px)...")
-            
-            # Executa clique
-            await self.driver.click_at_percentage(adj_x, adj_y)
-            
-            # Espera carregar (retry é mais rápido)
-            wait_time = base_wait if attempt_idx == 0 else retry_wait
-            await asyncio.sleep(wait_time)
-            
-            # Captura screenshot
-            shot_bytes = await self.driver.get_full_page_screenshot_bytes()
-            shot_pil = bytes_to_image(shot_bytes)
-            
-            # Verifica tela de erro
-            if is_error_screen(shot_pil):
-                logger.warning("Tela de erro. Tentando próximo offset...")
-                continue
-            
-            # Calcula hash e verifica duplicata
-            current_hash = compute_phash(shot_pil, nav_type)
-            
-            if not self._is_duplicate(current_hash, seen_hashes):
-                # SUCESSO! A página mudou.
-                logger.info(f"✅ Clique funcionou (com offset {off_x},{off_y})!")
-                
-                # Aguarda estabilização visual antes da captura final
-                await self.driver._wait_for_visual_stability(
-                    max_wait_seconds=15.0,
-                    check_interval=1.0,
-                    stability_threshold=5
-                )
-                
-                # Recaptura screenshot após estabilização
-                shot_bytes = await self.driver.get_full_page_screenshot_bytes()
-                shot_pil = bytes_to_image(shot_bytes)
-                current_hash = compute_phash(shot_pil, nav_type)
-                
-                return ClickResult(
-                    success=True,
-                    screenshot_bytes=shot_bytes,
-                    phash=current_hash,
-                    offset_used=(off_x, off_y)
-                )
-            else:
-                if attempt_idx == 0:
-                    logger.warning("⚠️ Clique inicial não alterou a página. Iniciando busca em círculos concêntricos...")
-        
+            # Um span por tentativa: duração, offset e resultado (changed / duplicate / error_screen)
+            with span("click_attempt", attempt=attempt_idx, offset=[off_x, off_y]) as attempt_span:
+                # Converte offset de pixels para porcentagem
+                pct_off_x, pct_off_y = self._pixel_to_percentage(off_x, off_y)
+                adj_x = clamp(target_x + pct_off_x)
+                adj_y = clamp(target_y + pct_off_y)
+
+                if attempt_idx > 0:
+                    logger.info(f"🔄 Tentativa {attempt_idx} (Offset {off_x}px, {off_y}px)...")
+
+                # Executa clique
+                await self.driver.click_at_percentage(adj_x, adj_y)
+
+                # Espera carregar (retry é mais rápido)
+                wait_time = base_wait if attempt_idx == 0 else retry_wait
+                await asyncio.sleep(wait_time)
+
+                # Frame da ROI (barato): decide se a página mudou. A captura completa fica para o fim
+                frame = await self.driver.capture_frame(nav_type)
+                current_hash, is_error = await get_image_pool().inspect(frame)
+
+                # Verifica tela de erro
+                if is_error:
+                    logger.warning("Tela de erro. Tentando próximo offset...")
+                    attempt_span.set(outcome="error_screen")
+                    continue
+
+                # Verifica duplicata
+                if not self._is_duplicate(current_hash, seen_hashes):
+                    # SUCESSO! A página mudou.
+                    logger.info(f"✅ Clique funcionou (com offset {off_x},{off_y})!")
+
+                    # Aguarda estabilização visual antes da captura final
+                    await self.driver._wait_for_visual_stability(
+                        max_wait_seconds=15.0,
+                        check_interval=1.0,
+                        stability_threshold=5,
+                        nav_type=nav_type
+                    )
+
+                    # Hash da página estável (mesma ROI dos seen_hashes) e captura completa, uma única vez
+                    current_hash = await self.driver.frame_hash(nav_type)
+                    shot_bytes = await self.driver.get_full_page_screenshot_bytes(stable=True)
+                    attempt_span.set(outcome="changed", bytes=len(shot_bytes))
+
+                    return ClickResult(
+                        success=True,
+                        screenshot_bytes=shot_bytes,
+                        phash=current_hash,
+                        offset_used=(off_x, off_y)
+                    )
+                else:
+                    attempt_span.set(outcome="duplicate")
+                    if attempt_idx == 0:
+                        logger.warning("⚠️ Clique inicial não alterou a página. Iniciando busca em círculos concêntricos...")
+
         # Todas as tentativas falharam
         return ClickResult(success=False)
 
@@ -210,8 +215,8 @@ class DOMFallbackClicker:
         Tenta clicar no botão de próxima página via DOM.
         
         Args:
-            seen_hashes: Lista de hashes já vistos para verificação.
-            nav_type: Tipo de navegação para cálculo do phash.
+            seen_hashes: Lista de hashes já vistos (pHash da ROI, ver driver.frame_hash) para verificação.
+            nav_type: Tipo de navegação (ROI capturada para o phash).
             wait_after_click: Tempo de espera após o clique DOM.
             
         Returns:
@@ -226,9 +231,7 @@ class DOMFallbackClicker:
         
         await asyncio.sleep(wait_after_click)
         
-        shot_bytes = await self.driver.get_full_page_screenshot_bytes()
-        shot_pil = bytes_to_image(shot_bytes)
-        current_hash = compute_phash(shot_pil, nav_type)
+        current_hash = await self.driver.frame_hash(nav_type)
         
         if not self._is_duplicate(current_hash, seen_hashes):
             logger.info("✅ Clique DOM funcionou!")
@@ -237,13 +240,13 @@ class DOMFallbackClicker:
             await self.driver._wait_for_visual_stability(
                 max_wait_seconds=15.0,
                 check_interval=1.0,
-                stability_threshold=5
+                stability_threshold=5,
+                nav_type=nav_type
             )
             
-            # Recaptura screenshot após estabilização
-            shot_bytes = await self.driver.get_full_page_screenshot_bytes()
-            shot_pil = bytes_to_image(shot_bytes)
-            current_hash = compute_phash(shot_pil, nav_type)
+            # Hash da página estável e captura completa, uma única vez
+            current_hash = await self.driver.frame_hash(nav_type)
+            shot_bytes = await self.driver.get_full_page_screenshot_bytes(stable=True)
             
             return ClickResult(
                 success=True,
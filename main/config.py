@@ -21,9 +21,88 @@ DUPLICATE_THRESHOLD = 4 # Diferença máxima para considerar página duplicada (
 # Configurações de Diretório
 OUTPUT_DIR = "runs"
 
+# Índice de execuções (URL -> pastas de run, título, timestamp, imagens)
+# Atualizado a cada dashboard finalizado; varredura completa só sob demanda (reporter.py --rescan)
+RUN_INDEX_FILE = os.path.join(OUTPUT_DIR, "run_index.json")
+RUN_INDEX_WORKERS = 8 # Threads para ler os catalog_*.json numa varredura completa
+
+# Store de screenshots por conteúdo (SHA-256). As pastas de run recebem hardlinks para os blobs.
+BLOB_STORE_DIR = os.path.join(OUTPUT_DIR, "blobs")
+BLOB_GC_GRACE_SECONDS = 3600 # GC não remove blobs gravados/reusados há menos que isso (catalogação em andamento)
+
+# I/O de disco assíncrono (screenshots e checkpoints fora do event loop)
+DISK_IO_WORKERS = 4        # Threads de I/O compartilhadas por todos os workers
+FSYNC_POLICY = "checkpoint" # "always" (inclui screenshots), "checkpoint" (só checkpoints/diários) ou "never"
+
+# Processamento de imagem (costura, encode PNG, pHash, tela de erro) fora do event loop
+IMAGE_WORKERS = min(4, max(1, (os.cpu_count() or 2) - 1)) # Processos do pool de imagem. 0 = threads (sem processos)
+IMAGE_SHM_MIN_BYTES = 256 * 1024 # Frames a partir desse tamanho vão ao worker por memória compartilhada (sem pickle)
+
+# Frames só de comparação (estabilidade visual, validação de clique): nunca persistidos, então não precisam ser PNG.
+# São recortados na ROI do nav_type (ROI_CROP) já na captura.
+HASH_CAPTURE_MODE = "cdp"  # "png" (lossless, mais lento), "jpeg" (page.screenshot) ou "cdp" (JPEG via CDP com optimizeForSpeed)
+HASH_JPEG_QUALITY = 50     # Qualidade do JPEG dos frames de comparação (o pHash reduz a 32x32: artefatos não importam)
+HASH_CAPTURE_SCALE = 0.5   # Escala da ROI capturada no modo "cdp" (o próprio Chromium reduz: menos pixels para codificar e transferir)
+
+# Descoberta de navegação pelo DOM antes do Scout: plataformas reconhecidas (rodapé do Power BI,
+# abas do Databricks/Tableau/Looker/Qlik) dispensam a chamada ao LLM. Inconclusivo = Scout (Gemini)
+DOM_PROBE_ENABLED = True
+
+# Memória: bytes de imagem carregados ao mesmo tempo (somando todos os workers) durante o envio ao Gemini
+INFLIGHT_BYTES_BUDGET = 64 * 1024 * 1024
+
+# Métricas de tempo por fase: endpoint Prometheus (/metrics) durante o Batch. None = desativado
+METRICS_PORT = int(os.environ["METRICS_PORT"]) if os.environ.get("METRICS_PORT") else None
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1") # "0.0.0.0" expõe na rede (ex: Prometheus em outra máquina)
+
+# Profiler por amostragem (--profile em main.py/batch_main.py): intervalo entre amostras e do monitor de lag do loop
+PROFILE_INTERVAL_S = 0.01
+LOOP_LAG_INTERVAL_S = 0.1
+
+# Watchdog do event loop (sempre ativo em main/batch): bloqueios acima do limite logam a pilha do código culpado
+LOOP_WATCHDOG_ENABLED = True
+LOOP_BLOCK_THRESHOLD_S = 0.25
+
+# Perfil persistente do contexto mestre do Batch (cache HTTP em disco compartilhado entre execuções)
+# O runtime do Power BI (vários MB) é baixado uma vez por máquina. None = contexto efêmero.
+# main.py, login.py e catalogadores avulsos usam contexto efêmero (o Chrome trava o perfil para um processo).
+BROWSER_PROFILE_DIR = "browser_profile"
+
 # Configurações de Batch
 MAX_CONCURRENT_TASKS = 4 # Ajuste conforme memória disponível
 
+# Pool de abas pré-aquecidas (Batch)
+PAGE_POOL_SIZE = MAX_CONCURRENT_TASKS # Uma aba por worker
+PAGE_POOL_MAX_USES = 20 # Recicla a aba após N URLs (limita crescimento de memória do renderer)
+PAGE_POOL_WARMUP_URL = os.environ.get("PAGE_POOL_WARMUP_URL") # Ex: "https://app.powerbi.com/home" (None = about:blank)
+
+# Autenticação e Modo Headless
+HEADLESS = os.environ.get("HEADLESS", "0") == "1" # Também via flag --headless em main.py/batch_main.py
+AUTH_STATE_FILE = "auth_state.json" # storage_state exportado por login.py (cookies + localStorage)
+LOGIN_REDIRECT_TIMEOUT_MS = 30000   # Headless: tempo máximo para SSO silencioso antes de considerar sessão expirada
+REQUEUE_FILE = os.path.join(OUTPUT_DIR, "requeue_urls.json") # URLs afetadas por sessão expirada
+
+# Filtro de Rede (telemetria/analytics)
+NETWORK_FILTER_ENABLED = True # False = apenas mede tráfego (para comparar bytes/tempo com e sem filtro)
+NETWORK_FILTER_MODE = "cdp"   # "cdp" (mantém cache HTTP) ou "route" (permite bloquear tipos de recurso, mas desativa o cache)
+BLOCKED_DOMAINS = [
+    "dc.services.visualstudio.com",       # Application Insights (Power BI)
+    "applicationinsights.azure.com",
+    "js.monitor.azure.com",
+    "browser.events.data.microsoft.com",  # Telemetria Microsoft (1DS/Aria)
+    "browser.pipe.aria.microsoft.com",
+    "clarity.ms",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hotjar.com",
+    "segment.io",
+    "mixpanel.com",
+    "bam.nr-data.net",                    # New Relic
+    "browser-intake-datadoghq.com",
+]
+BLOCKED_RESOURCE_TYPES = [] # Somente modo "route". Ex: ["media"]. Evite "font"/"image" (altera os prints)
+
 # Configurações de Viewport (Seguindo seu playwright_bot.py)
 VIEWPORT = {'width': 1920, 'height': 1080}
 
@@ -31,6 +110,23 @@ VIEWPORT = {'width': 1920, 'height': 1080}
 LLM_MAX_RETRIES = 3    # Tentativas máximas em caso de falha
 LLM_BASE_DELAY = 1     # Delay base em segundos (backoff: 1s, 2s, 4s)
 
+# Custo do LLM (USD por 1M de tokens; saída inclui tokens de raciocínio). Ajuste conforme a tabela vigente.
+MODEL_PRICING_USD_PER_1M = {
+    "gemini-2.5-pro": {"input": 1.25, "output": 10.00},   # Prompts até 200k tokens
+    "gemini-2.5-flash": {"input": 0.30, "output": 2.50},
+}
+
+# Orçamento por execução (main/batch). Atingido o limite, o processamento para. None = sem limite
+LLM_BUDGET_USD = float(os.environ["LLM_BUDGET_USD"]) if os.environ.get("LLM_BUDGET_USD") else None
+LLM_BUDGET_TOKENS = int(os.environ["LLM_BUDGET_TOKENS"]) if os.environ.get("LLM_BUDGET_TOKENS") else None
+
+# Backend do LLM: "gemini" (API real) ou "fake" (respostas sintéticas offline para as fixtures de benchmark)
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "gemini")
+FAKE_LLM_LATENCY_S = float(os.environ.get("FAKE_LLM_LATENCY_S", "0")) # Latência simulada por chamada (bloqueante, como o cliente real)
+
+# Servidor local de dashboards sintéticos (fixture_server.py)
+FIXTURE_SERVER_PORT = 8765
+
 # Configurações de Navegação e Resiliência
 # Offsets em círculos concêntricos (centro + 4 anéis × 8 direções = 33 pontos)
 # Mais robusto que cruz fixa para alvos pequenos
@@ -0,0 +1,183 @@
+"""
+Camada de I/O assíncrona para screenshots e checkpoints.
+
+Toda escrita/leitura roda num thread pool compartilhado, então uma escrita
+lenta (ex: runs/ em disco de rede) não trava o event loop nem as outras abas.
+
+- Escrita atômica: arquivo temporário + fsync + rename (checkpoint nunca fica pela metade).
+- Batching: appends JSONL no mesmo ciclo do loop para o mesmo arquivo viram
+  uma única escrita + fsync, preservando a ordem.
+- Política de fsync (FSYNC_POLICY em config.py):
+    "always"     -> fsync em toda escrita (inclusive screenshots)
+    "checkpoint" -> fsync só em checkpoints/diários (padrão)
+    "never"      -> confia no cache do SO (mais rápido, menos durável)
+"""
+
+import os
+import json
+import tempfile
+import weakref
+import contextlib
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import DISK_IO_WORKERS, FSYNC_POLICY
+from utils import setup_logger, jsonl_append_prefix
+
+logger = setup_logger("DiskIO")
+
+FSYNC_POLICIES = ("always", "checkpoint", "never")
+
+
+def _fsync_file(f) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _write_atomic(path: Path, data: bytes, fsync: bool) -> None:
+    """Grava num temporário exclusivo (mesma pasta) e renomeia por cima do destino."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Nome único: duas escritas simultâneas no mesmo destino não disputam o mesmo .tmp
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                _fsync_file(f)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_name)
+        raise
+
+
+def _write_plain(path: Path, data: bytes, fsync: bool) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+        if fsync:
+            _fsync_file(f)
+
+
+def _append_lines(path: Path, lines: List[str], fsync: bool) -> None:
+    prefix = jsonl_append_prefix(path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(prefix + "".join(lines))
+        if fsync:
+            _fsync_file(f)
+
+
+class _AppendBatch:
+    def __init__(self, future: asyncio.Future):
+        self.lines: List[str] = []
+        self.future = future
+
+
+class AsyncDiskWriter:
+    """
+    Executor de I/O de disco compartilhado entre os workers.
+
+    Attributes:
+        workers: Threads dedicadas a I/O.
+        fsync_policy: "always", "checkpoint" ou "never".
+    """
+
+    def __init__(self, workers: int = DISK_IO_WORKERS, fsync_policy: str = FSYNC_POLICY):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"FSYNC_POLICY inválida: {fsync_policy} (use {', '.join(FSYNC_POLICIES)})")
+        self.workers = workers
+        self.fsync_policy = fsync_policy
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Lotes pendentes e locks por arquivo, separados por event loop: futures e locks
+        # ficam presos ao loop que os criou (re-execução no notebook, benchmarks)
+        self._per_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[Dict[Path, _AppendBatch], Dict[Path, asyncio.Lock]]]" = weakref.WeakKeyDictionary()
+
+    def _loop_state(self) -> Tuple[Dict[Path, _AppendBatch], Dict[Path, asyncio.Lock]]:
+        """(lotes pendentes, locks por arquivo) do event loop em execução."""
+        loop = asyncio.get_running_loop()
+        state = self._per_loop.get(loop)
+        if state is None:
+            state = self._per_loop[loop] = ({}, {})
+        return state
+
+    def _fsync_for(self, checkpoint: bool) -> bool:
+        return self.fsync_policy == "always" or (checkpoint and self.fsync_policy == "checkpoint")
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Executa uma função bloqueante de I/O no pool (ex: BlobStore.save)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="disk-io")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def read_bytes(self, path: Path) -> bytes:
+        return await self.run(Path(path).read_bytes)
+
+    async def read_text(self, path: Path) -> str:
+        return await self.run(lambda: Path(path).read_text(encoding="utf-8"))
+
+    async def write_bytes(self, path: Path, data: bytes, atomic: bool = False, checkpoint: bool = False) -> None:
+        writer = _write_atomic if atomic else _write_plain
+        await self.run(writer, Path(path), data, self._fsync_for(checkpoint))
+
+    async def write_text(self, path: Path, text: str, atomic: bool = True, checkpoint: bool = True) -> None:
+        """Texto (padrão: checkpoint atômico)."""
+        await self.write_bytes(path, text.encode("utf-8"), atomic=atomic, checkpoint=checkpoint)
+
+    async def write_json(self, path: Path, obj: Any, atomic: bool = True, checkpoint: bool = True, **dump_kwargs: Any) -> None:
+        """Serializa e grava JSON (padrão: checkpoint atômico)."""
+        dump_kwargs.setdefault("indent", 2)
+        await self.write_text(path, json.dumps(obj, **dump_kwargs), atomic=atomic, checkpoint=checkpoint)
+
+    async def append_jsonl(self, path: Path, entry: dict) -> None:
+        """
+        Acrescenta uma linha JSON (diários/checkpoints incrementais).
+
+        Chamadas no mesmo ciclo do event loop para o mesmo arquivo são agrupadas
+        numa única escrita. Retorna quando a linha está em disco (conforme a política de fsync).
+        """
+        path = Path(path)
+        batches, _ = self._loop_state()
+        batch = batches.get(path)
+        if batch is None:
+            batch = _AppendBatch(asyncio.get_running_loop().create_future())
+            batches[path] = batch
+            asyncio.ensure_future(self._flush_batch(path, batch))
+        batch.lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        await asyncio.shield(batch.future)
+
+    async def _flush_batch(self, path: Path, batch: _AppendBatch) -> None:
+        # Cede um ciclo para acumular outros appends do mesmo arquivo
+        await asyncio.sleep(0)
+        batches, path_locks = self._loop_state()
+        if batches.get(path) is batch:
+            del batches[path]
+
+        # Um lote por vez por arquivo (asyncio.Lock é FIFO: preserva a ordem dos lotes)
+        if path not in path_locks:
+            path_locks[path] = asyncio.Lock()
+        lock = path_locks[path]
+        async with lock:
+            try:
+                await self.run(_append_lines, path, batch.lines, self._fsync_for(True))
+                batch.future.set_result(None)
+            except Exception as e:
+                batch.future.set_exception(e)
+
+    def close(self) -> None:
+        """Aguarda as escritas pendentes e encerra o pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_default_writer: Optional[AsyncDiskWriter] = None
+
+
+def get_disk_writer() -> AsyncDiskWriter:
+    """Writer compartilhado pelo processo (um pool de I/O para todos os workers)."""
+    global _default_writer
+    if _default_writer is None:
+        _default_writer = AsyncDiskWriter()
+    return _default_writer
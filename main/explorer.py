@@ -2,25 +2,105 @@ import asyncio
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
-from config import VIEWPORT, CLICK_ATTEMPT_OFFSETS
-from utils import setup_logger, bytes_to_image, compute_phash
+from config import VIEWPORT, CLICK_ATTEMPT_OFFSETS, DUPLICATE_THRESHOLD
+from utils import setup_logger, parse_phash, read_jsonl
 from click_strategy import ConcentricSearchClicker, DOMFallbackClicker, ClickResult
+from blob_store import BlobStore
+from disk_io import AsyncDiskWriter, get_disk_writer
 
 logger = setup_logger("Explorer")
 
+# Diário incremental da exploração (uma linha JSON por alvo concluído)
+JOURNAL_FILENAME = "exploration_journal.jsonl"
+
+
 class DashboardExplorer:
     """
     Responsável pela fase de exploração: clicar em alvos e coletar novas páginas.
     """
-    def __init__(self, driver: Any, output_dir: Path):
+    def __init__(self, driver: Any, output_dir: Path, blob_store: Optional[BlobStore] = None, disk_writer: Optional[AsyncDiskWriter] = None):
         self.driver = driver
+        self.blob_store = blob_store or BlobStore()
+        self.disk = disk_writer or get_disk_writer() # Escritas fora do event loop
         self.img_dir = output_dir / "screenshots"
         self.img_dir.mkdir(parents=True, exist_ok=True)
+        self.journal_path = output_dir / JOURNAL_FILENAME
         
         # Inicializa estratégias
         self.clicker = ConcentricSearchClicker(driver, CLICK_ATTEMPT_OFFSETS, VIEWPORT)
         self.dom_fallback = DOMFallbackClicker(driver)
 
+    def _load_journal(self, targets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Lê o diário de exploração e retorna as entradas válidas para os alvos atuais.
+
+        As entradas precisam formar um prefixo contínuo da lista de alvos (mesmo índice e label).
+        Se o diário não corresponder aos alvos (ex: Scout refeito), é descartado.
+        """
+        if not self.journal_path.exists():
+            return []
+
+        try:
+            entries = read_jsonl(self.journal_path)
+        except Exception as e:
+            logger.warning(f"Erro ao ler diário de exploração: {e}. Reiniciando exploração.")
+            return []
+
+        valid = []
+        for expected_idx, entry in enumerate(entries):
+            if expected_idx >= len(targets):
+                break
+            if entry.get("target_index") != expected_idx or entry.get("label") != targets[expected_idx].get("label"):
+                logger.warning("⚠️ Diário de exploração não corresponde aos alvos atuais. Descartando.")
+                self.journal_path.unlink(missing_ok=True)
+                return []
+            valid.append(entry)
+
+        return valid
+
+    async def _append_journal(self, entry: Dict[str, Any]) -> None:
+        """Acrescenta uma entrada ao diário de forma durável (thread de I/O, fsync conforme política)."""
+        try:
+            await self.disk.append_jsonl(self.journal_path, entry)
+        except Exception as e:
+            logger.error(f"Erro ao gravar diário de exploração: {e}")
+
+    async def _click_native_next(self, target: Dict[str, Any]) -> None:
+        """Um clique em "Próxima" (DOM, senão coordenada do alvo) + estabilização."""
+        clicked = await self.driver.try_click_native_next_button()
+        if not clicked:
+            await self.driver.click_at_percentage(target.get('x'), target.get('y'))
+        await self.driver._wait_for_visual_stability(max_wait_seconds=10.0, check_interval=0.5, nav_type="native_footer")
+
+    async def _replay_native_position(self, target: Dict[str, Any], journal: List[Dict[str, Any]]) -> None:
+        """
+        Reposiciona o rodapé nativo após retomada.
+
+        O rodapé nativo é sequencial (cada alvo = um clique em "Next"). Só as entradas
+        "captured" garantem que a página avançou: entradas "skipped" podem ser cliques
+        que falharam. Clica uma vez por página capturada e confere o hash da última
+        captura; se não bater, avança no máximo uma vez por entrada "skipped".
+        """
+        captured = [e for e in journal if e.get("status") == "captured"]
+        extra_clicks = len(journal) - len(captured)
+
+        logger.info(f"⏩ Reposicionando rodapé nativo: {len(captured)} cliques em 'Próxima'...")
+        for n in range(len(captured)):
+            await self._click_native_next(target)
+            logger.info(f"⏩ Reposicionamento {n+1}/{len(captured)} concluído.")
+
+        expected = parse_phash(captured[-1].get("hash")) if captured else None
+        if expected is None:
+            return
+        for n in range(extra_clicks + 1):
+            current = await self.driver.frame_hash("native_footer")
+            if current - expected < DUPLICATE_THRESHOLD:
+                logger.info("✅ Posição do rodapé confere com a última página capturada.")
+                return
+            if n < extra_clicks:
+                await self._click_native_next(target)
+        logger.warning("⚠️ Não foi possível confirmar a posição do rodapé após a retomada. Continuando mesmo assim.")
+
     async def explore(
         self, 
         targets: List[Dict[str, Any]], 
@@ -30,20 +110,59 @@ class DashboardExplorer:
         """
         Itera sobre os alvos, clica e captura páginas novas.
         
+        Cada alvo concluído é registrado em `exploration_journal.jsonl`. Se o diário
+        existir (execução anterior interrompida), os alvos já concluídos são pulados.
+
         Args:
             targets: Lista de alvos identificados pelo Scout.
             nav_type: Tipo de navegação ("native_footer", "top_tabs", etc).
-            initial_hash: Hash da página inicial (Home) para deduplicação.
+            initial_hash: Hash da página inicial (Home) para deduplicação (driver.frame_hash).
             
         Returns:
-            Lista de dicionários contendo metadados e bytes das páginas encontradas (Excluindo a Home).
+            Lista de handles das páginas encontradas (Excluindo a Home): metadados + arquivo
+            em screenshots/ e SHA-256. Os bytes não ficam em memória.
         """
         seen_hashes = [initial_hash]
         new_pages = []
 
+        # Retomada a partir do diário
+        journal = self._load_journal(targets)
+        for entry in journal:
+            if entry.get("status") != "captured":
+                continue
+            p_file = self.img_dir / entry.get("filename", "")
+            phash = parse_phash(entry.get("hash"))
+            if not p_file.exists() or phash is None:
+                logger.warning(f"Imagem {entry.get('filename')} do diário não encontrada. Ignorando página.")
+                continue
+            seen_hashes.append(phash)
+            new_pages.append({
+                "id": entry["id"],
+                "label": entry["label"],
+                "filename": entry["filename"],
+                "hash": entry["hash"],
+                "sha256": entry.get("sha256")
+            })
+
+        start_idx = len(journal)
+        if start_idx:
+            logger.info(f"💾 Diário de exploração encontrado: retomando do alvo {start_idx+1}/{len(targets)}.")
+            if nav_type == "native_footer" and start_idx < len(targets):
+                await self._replay_native_position(targets[start_idx], journal)
+
         for i, target in enumerate(targets):
+            if i < start_idx:
+                continue
+
             logger.info(f"--- Explorando alvo {i+1}/{len(targets)}: {target.get('label')} ---")
 
+            journal_entry = {
+                "target_index": i,
+                "id": i+1,
+                "label": target.get("label", f"Page {i+1}"),
+                "status": "skipped"
+            }
+
             # Validação: Se não tiver seletor E não tiver coordenadas válidas, pula
             has_selector = bool(target.get("selector"))
             
@@ -59,32 +178,39 @@ class DashboardExplorer:
             
             if not has_selector and not has_coords:
                 logger.warning(f"⚠️ Target '{target.get('label')}' não tem seletor nem coordenadas válidas (x={x_val}, y={y_val}). Pulando.")
+                await self._append_journal(journal_entry)
                 continue
 
             # Lógica de Clique: DOM Direto (se fornecido), Nativo ou Visual
             result = None
             
-            # 0. Verifica se o target já fornece um seletor exato (Databricks Enrichment)
-            if target.get("selector"):
+            # 0. Verifica se o target já fornece um seletor exato (Databricks Enrichment / sondagem do DOM)
+            clicked_by_selector = False
+            if has_selector:
                 logger.info(f"🎯 Usando seletor DOM direto para '{target.get('label')}'...")
+                clicked_by_selector = await self.driver.click_element(target['selector'])
+                if not clicked_by_selector:
+                    if not has_coords:
+                        logger.error(f"💀 Alvo '{target.get('label')}' ignorado definitivamente.")
+                        await self._append_journal(journal_entry)
+                        continue
+                    logger.warning(f"⚠️ Seletor falhou para '{target.get('label')}'. Tentando coordenadas...")
                 
-                # Clica
-                await self.driver.click_element(target['selector'])
-                await self.driver._wait_for_visual_stability(max_wait_seconds=15.0)
+            if clicked_by_selector:
+                await self.driver._wait_for_visual_stability(max_wait_seconds=15.0, nav_type=nav_type)
                 
-                # Valida se mudou
-                current_bytes = await self.driver.get_full_page_screenshot_bytes()
-                current_pil = bytes_to_image(current_bytes)
-                current_hash = compute_phash(current_pil, nav_type)
+                # Valida se mudou (frame da ROI); a captura completa só para página nova
+                current_hash = await self.driver.frame_hash(nav_type)
                 
                 # Verifica duplicidade
                 if current_hash in seen_hashes:
                     logger.warning(f"⚠️ Página não mudou ou é duplicada (Hash: {current_hash}). Ignorando.")
                     # Não adiciona aos seen_hashes se já existe
+                    await self._append_journal(journal_entry)
                     continue 
 
                 # Sucesso
-                from click_strategy import ClickResult # Import local para evitar ciclo se necessario
+                current_bytes = await self.driver.get_full_page_screenshot_bytes(stable=True)
                 result = ClickResult(success=True, screenshot_bytes=current_bytes, phash=current_hash)
             
             elif nav_type == "native_footer":
@@ -110,21 +236,32 @@ class DashboardExplorer:
             # Se ainda falhou, desiste desse alvo
             if not result.success:
                 logger.error(f"💀 Alvo '{target.get('label')}' ignorado definitivamente.")
+                await self._append_journal(journal_entry)
                 continue
             
             # SE CHEGOU AQUI, É UMA PÁGINA VÁLIDA NOVA
             seen_hashes.append(result.phash)
             
-            # Salva imagem e registra
+            # Salva imagem no store (deduplicada por conteúdo) e registra
             filename = f"{i+1:02d}_target.png"
-            (self.img_dir / filename).write_bytes(result.screenshot_bytes)
+            sha256 = await self.disk.run(self.blob_store.save, result.screenshot_bytes, self.img_dir / filename)
             
             new_pages.append({
                 "id": i+1,
-                "label": target.get("label", f"Page {i+1}"),
-                "bytes": result.screenshot_bytes,
+                "label": journal_entry["label"],
+                "filename": filename,
+                "hash": str(result.phash),
+                "sha256": sha256
+            })
+
+            # Registra no diário somente após a imagem estar em disco
+            journal_entry.update({
+                "status": "captured",
                 "filename": filename,
-                "hash": str(result.phash)
+                "hash": str(result.phash),
+                "sha256": sha256,
+                "offset_used": list(result.offset_used)
             })
+            await self._append_journal(journal_entry)
 
         return new_pages
@@ -0,0 +1,131 @@
+"""
+LLM falso para execuções offline (benchmarks com fixture_server.py).
+
+Mesma interface do GeminiService (discover_navigation / analyze_page), sem
+rede nem GEMINI_API_KEY. Ativado com LLM_BACKEND="fake":
+
+- Scout: devolve a navegação esperada da fixture em andamento (URL do
+  dashboard via telemetria); fora das fixtures responde "não é dashboard".
+- Analyst: documentação determinística derivada do SHA-256 da imagem.
+- Latência simulada (FAKE_LLM_LATENCY_S), bloqueante como o cliente real.
+- Tokens sintéticos (texto + tiles de imagem) registrados no llm_usage com
+  os modelos configurados, para que custo e orçamento se comportem como em produção.
+"""
+
+import json
+import time
+import hashlib
+import struct
+from types import SimpleNamespace
+from typing import Any, Dict
+
+from config import MODEL_SCOUT, MODEL_ANALYST, FAKE_LLM_LATENCY_S
+from fixture_server import expected_navigation, parse_fixture_url
+from telemetry import span, traced, current_dashboard_url
+from llm_usage import record_usage, check_budget
+from utils import setup_logger
+
+logger = setup_logger("FakeLLM")
+
+IMAGE_TILE_PX = 768      # Imagens são cobradas por tile de 768x768
+TOKENS_PER_TILE = 258
+PROMPT_TOKENS = 900      # Tamanho aproximado dos prompts reais (Scout/Analyst)
+
+DOMAINS = ["Vendas", "Financeiro", "Operações", "Marketing", "Logística", "RH"]
+AUDIENCES = ["Executivo", "Analista de Mercado", "Operacional", "Cientista de Dados"]
+
+
+def _png_size(image_bytes: bytes) -> tuple:
+    """(largura, altura) lidos do cabeçalho IHDR do PNG, sem decodificar a imagem."""
+    if len(image_bytes) >= 24 and image_bytes[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", image_bytes[16:24])
+    return (0, 0)
+
+
+def _image_tokens(image_bytes: bytes) -> int:
+    width, height = _png_size(image_bytes)
+    tiles = max(1, -(-width // IMAGE_TILE_PX)) * max(1, -(-height // IMAGE_TILE_PX))
+    return tiles * TOKENS_PER_TILE
+
+
+class FakeLLMService:
+    """Substituto offline do GeminiService (respostas determinísticas)."""
+
+    def __init__(self, latency_s: float = FAKE_LLM_LATENCY_S):
+        self.latency_s = latency_s
+
+    def _respond(self, model_name: str, phase: str, image_bytes: bytes, payload: Dict[str, Any]) -> str:
+        """Simula uma chamada: orçamento, latência, span e usage_metadata sintético."""
+        check_budget()
+        text = json.dumps(payload, ensure_ascii=False)
+
+        with span("gemini_request", model=model_name, attempt=1, bytes=len(image_bytes), backend="fake") as request_span:
+            if self.latency_s:
+                time.sleep(self.latency_s)
+
+            image_tokens = _image_tokens(image_bytes)
+            usage = SimpleNamespace(
+                prompt_token_count=PROMPT_TOKENS + image_tokens,
+                candidates_token_count=len(text) // 4,
+                thoughts_token_count=0,
+                cached_content_token_count=0,
+                total_token_count=PROMPT_TOKENS + image_tokens + len(text) // 4,
+                prompt_tokens_details=[SimpleNamespace(modality="IMAGE", token_count=image_tokens)]
+            )
+            recorded = record_usage(model_name, phase, 1, usage, len(image_bytes))
+            request_span.set(input_tokens=recorded["input_tokens"], output_tokens=recorded["output_tokens"])
+        return text
+
+    @traced(
+        "llm_discover_navigation",
+        args_attrs=lambda self, image_bytes: {"bytes": len(image_bytes)},
+        result_attrs=lambda data: {"outcome": "ok" if data.get("raw_response") else "fail"}
+    )
+    def discover_navigation(self, image_bytes: bytes) -> Dict[str, Any]:
+        """Estágio B (falso): navegação esperada da fixture atual."""
+        url = current_dashboard_url()
+        data = expected_navigation(url)
+        if data is None:
+            logger.warning(f"⚠️ URL fora das fixtures ({url}). LLM falso responde 'não é dashboard'.")
+            data = {
+                "is_dashboard": False,
+                "page_context": "other_website",
+                "nav_reflection": "LLM falso: URL desconhecida.",
+                "nav_type": "none",
+                "page_count_visual": None,
+                "targets": []
+            }
+
+        json_text = self._respond(MODEL_SCOUT, "scout", image_bytes, data)
+        result = json.loads(json_text)
+        result["raw_response"] = json_text
+        return result
+
+    @traced(
+        "llm_analyze_page",
+        args_attrs=lambda self, image_bytes: {"bytes": len(image_bytes)},
+        result_attrs=lambda data: {"outcome": "fail" if "erro" in data else "ok"}
+    )
+    def analyze_page(self, image_bytes: bytes) -> Dict[str, Any]:
+        """Estágio D (falso): documentação determinística por conteúdo da imagem."""
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        seed = int(digest[:8], 16)
+        spec = parse_fixture_url(current_dashboard_url()) or {"layout": "desconhecido"}
+        domain = DOMAINS[seed % len(DOMAINS)]
+        layout_title = spec["layout"].replace("_", " ").title()
+
+        payload = {
+            "titulo_painel": f"Painel Sintético {layout_title} {digest[:6]}",
+            "objetivo_macro": f"Monitoramento de indicadores de {domain} (fixture {spec['layout']}).",
+            "perguntas_respondidas": [
+                f"Qual a evolução dos indicadores de {domain}?",
+                f"Quais segmentos de {domain} concentram o maior volume?",
+                "Como os indicadores se comparam entre os períodos selecionados?"
+            ],
+            "dominio_negocio": domain,
+            "elementos_visuais": "Grade de cards com KPIs, gráficos de barras, rosca e mapa de calor.",
+            "filtros_visiveis": ["Período", "Região"],
+            "principais_indicadores": [f"Indicador {domain} {n}" for n in range(1, 4)],
+            "publico_sugerido": AUDIENCES[seed % len(AUDIENCES)]
+        }
+        return json.loads(self._respond(MODEL_ANALYST, "analyst", image_bytes, payload))
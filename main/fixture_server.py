@@ -0,0 +1,430 @@
+"""
+Servidor local de dashboards sintéticos para benchmarks ponta a ponta.
+
+Serve páginas HTML que imitam os layouts procurados pelo Scout, sem rede e
+sem credenciais:
+
+- native_footer:   rodapé cinza estilo Power BI ("1 de N") com button[aria-label='Next Page'];
+- databricks_tabs: div[role='tablist'] com button[role='tab'] no topo, à esquerda;
+- top_tabs:        abas customizadas desenhadas no topo do relatório;
+- left_list:       lista de páginas numa barra lateral à esquerda;
+- login:           tela de login (não é dashboard; exercita o descarte do Scout).
+
+Parâmetros da URL (/dashboard/<layout>?pages=4&delay_ms=0&height=0):
+    pages:    quantidade de páginas do relatório;
+    delay_ms: visuais renderizam de forma assíncrona (escalonados até delay_ms) a cada troca de página;
+    height:   altura do conteúdo em px (> viewport gera um container com scroll vertical).
+
+O conteúdo de cada página é determinístico (semente = layout + página), então
+execuções repetidas produzem as mesmas capturas. Com LLM_BACKEND="fake"
+(ver fake_llm.py) o fluxo completo roda offline:
+
+    python fixture_server.py --write-urls      # sobe o servidor e grava urls.json
+    LLM_BACKEND=fake python batch_main.py --headless
+"""
+
+import sys
+import json
+import html
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode, urlparse, parse_qs
+
+from config import VIEWPORT, FIXTURE_SERVER_PORT
+from utils import setup_logger
+
+logger = setup_logger("FixtureServer")
+
+LAYOUTS = ("native_footer", "databricks_tabs", "top_tabs", "left_list")
+
+DEFAULT_PAGES = 4
+MAX_PAGES = 50
+
+# Geometria dos elementos de navegação (px no viewport). Usada no HTML e na resposta esperada do Scout.
+FOOTER_HEIGHT = 40
+FOOTER_NEXT_X = VIEWPORT["width"] // 2 + 70
+DATABRICKS_BAR_HEIGHT = 48
+DATABRICKS_TAB_WIDTH = 140
+DATABRICKS_TAB_LEFT = 24
+TOP_TABS_HEIGHT = 80       # Dentro dos 8% superiores ignorados pelo hash (ROI_CROP["top_tabs"])
+TOP_TAB_WIDTH = 200
+TOP_TAB_LEFT = 40
+LEFT_LIST_WIDTH = 360      # Dentro dos 20% à esquerda ignorados pelo hash (ROI_CROP["left_list"])
+LEFT_ITEM_HEIGHT = 64
+LEFT_ITEM_TOP = 120
+
+PAGE_NAMES = [
+    "Visão Geral", "Vendas", "Financeiro", "Operações", "Clientes", "Estoque",
+    "Marketing", "Logística", "RH", "Qualidade", "Metas", "Detalhes"
+]
+
+
+def fixture_url(base_url: str, layout: str, pages: int = DEFAULT_PAGES, delay_ms: int = 0, height: int = 0) -> str:
+    """Monta a URL de um dashboard sintético."""
+    if layout == "login":
+        return f"{base_url.rstrip('/')}/login"
+    params = {"pages": pages, "delay_ms": delay_ms, "height": height}
+    return f"{base_url.rstrip('/')}/dashboard/{layout}?{urlencode(params)}"
+
+
+def default_fixture_urls(base_url: str) -> List[str]:
+    """Conjunto padrão do benchmark: um dashboard por layout + scroll alto + visuais lentos + login."""
+    return [fixture_url(base_url, layout) for layout in LAYOUTS] + [
+        fixture_url(base_url, "top_tabs", pages=3, height=3200),
+        fixture_url(base_url, "native_footer", pages=3, delay_ms=2500),
+        fixture_url(base_url, "login")
+    ]
+
+
+def parse_fixture_url(url: str) -> Optional[Dict[str, Any]]:
+    """Extrai layout e parâmetros de uma URL do servidor (None se não for fixture)."""
+    parsed = urlparse(url or "")
+    parts = [p for p in parsed.path.split("/") if p]
+    if parts == ["login"]:
+        return {"layout": "login", "pages": 1, "delay_ms": 0, "height": 0}
+    if len(parts) != 2 or parts[0] != "dashboard" or parts[1] not in LAYOUTS:
+        return None
+
+    qs = parse_qs(parsed.query)
+
+    def int_param(name: str, default: int) -> int:
+        try:
+            return int(qs.get(name, [default])[0])
+        except ValueError:
+            return default
+
+    return {
+        "layout": parts[1],
+        "pages": max(1, min(MAX_PAGES, int_param("pages", DEFAULT_PAGES))),
+        "delay_ms": max(0, int_param("delay_ms", 0)),
+        "height": max(0, int_param("height", 0))
+    }
+
+
+def _page_name(index: int) -> str:
+    name = PAGE_NAMES[index % len(PAGE_NAMES)]
+    return name if index < len(PAGE_NAMES) else f"{name} {index // len(PAGE_NAMES) + 1}"
+
+
+def _nav_targets(layout: str, pages: int) -> List[Dict[str, Any]]:
+    """Alvos de navegação em coordenadas normalizadas (como o Scout devolveria)."""
+    width, height = VIEWPORT["width"], VIEWPORT["height"]
+    if layout == "native_footer":
+        return [{"label": "Next Page Button", "x": FOOTER_NEXT_X / width, "y": (height - FOOTER_HEIGHT / 2) / height}]
+
+    targets = []
+    # A aba ativa (Home) fica de fora: o Explorer já tem a captura inicial
+    for i in range(1, pages):
+        if layout == "databricks_tabs":
+            x, y = DATABRICKS_TAB_LEFT + DATABRICKS_TAB_WIDTH * i + DATABRICKS_TAB_WIDTH / 2, DATABRICKS_BAR_HEIGHT / 2
+        elif layout == "top_tabs":
+            x, y = TOP_TAB_LEFT + TOP_TAB_WIDTH * i + TOP_TAB_WIDTH / 2, TOP_TABS_HEIGHT / 2
+        else:
+            x, y = LEFT_LIST_WIDTH / 2, LEFT_ITEM_TOP + LEFT_ITEM_HEIGHT * i + LEFT_ITEM_HEIGHT / 2
+        targets.append({"label": _page_name(i), "x": x / width, "y": y / height})
+    return targets
+
+
+def expected_navigation(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Resposta "ideal" do Scout para uma URL de fixture (mesmo formato de discover_navigation).
+
+    Usada pelo LLM falso e para conferir o resultado do fluxo no benchmark.
+    """
+    spec = parse_fixture_url(url)
+    if spec is None:
+        return None
+
+    layout = spec["layout"]
+    if layout == "login":
+        return {
+            "is_dashboard": False,
+            "page_context": "login_screen",
+            "nav_reflection": "Fixture: tela de login sintética.",
+            "nav_type": "none",
+            "page_count_visual": None,
+            "targets": []
+        }
+
+    return {
+        "is_dashboard": True,
+        "page_context": "dashboard",
+        "nav_reflection": f"Fixture: layout {layout} com {spec['pages']} páginas.",
+        "nav_type": layout,
+        "page_count_visual": f"1 de {spec['pages']}" if layout == "native_footer" else None,
+        "targets": _nav_targets(layout, spec["pages"])
+    }
+
+
+# ============================================
+# RENDERIZAÇÃO
+# ============================================
+
+def _render_visual(rng: random.Random, hue: int, kind: str, title: str) -> str:
+    """Um visual (card) com conteúdo determinístico."""
+    color = f"hsl({hue}, 60%, 42%)"
+    if kind == "kpi":
+        body = f'<div class="kpi" style="color:{color}">{rng.randint(10, 999)}.{rng.randint(0, 9)}K</div>'
+    elif kind == "bars":
+        bars = "".join(
+            f'<div class="bar" style="height:{rng.randint(10, 100)}%;background:{color}"></div>'
+            for _ in range(rng.randint(5, 14))
+        )
+        body = f'<div class="bars">{bars}</div>'
+    elif kind == "donut":
+        share = rng.randint(15, 85)
+        body = (
+            f'<div class="donut" style="background:conic-gradient({color} 0 {share}%, '
+            f'hsl({(hue + 180) % 360}, 40%, 70%) {share}% 100%)"></div>'
+        )
+    else:  # Bloco escuro (mapa/heatmap): posição muda o hash perceptual de forma marcante
+        cells = "".join(
+            f'<div style="background:hsl({hue}, 50%, {rng.randint(12, 60)}%)"></div>'
+            for _ in range(24)
+        )
+        body = f'<div class="heat">{cells}</div>'
+    return f'<div class="card"><div class="card-title">{html.escape(title)}</div><div class="visual">{body}</div></div>'
+
+
+def _render_page(layout: str, index: int, content_height: int) -> str:
+    """Conteúdo de uma página do relatório (grade de visuais)."""
+    rng = random.Random(f"{layout}:{index}")
+    hue = (index * 67 + 15) % 360
+    cols = 2 + index % 3
+    rows = max(2, content_height // 320)
+    kinds = ["kpi", "bars", "donut", "heat"]
+
+    cards = []
+    for n in range(cols * rows):
+        kind = kinds[(n + index) % len(kinds)] if n else "heat"
+        cards.append(_render_visual(rng, hue, kind, f"{_page_name(index)} · Visual {n + 1}"))
+
+    return (
+        f'<section class="page" data-page="{index}" style="display:none">'
+        f'<h1>{html.escape(_page_name(index))}</h1>'
+        f'<div class="grid" style="grid-template-columns:repeat({cols}, 1fr)">{"".join(cards)}</div>'
+        f'</section>'
+    )
+
+
+def _render_nav(layout: str, pages: int) -> str:
+    names = [_page_name(i) for i in range(pages)]
+    if layout == "native_footer":
+        return (
+            '<div class="pbi-footer">'
+            '<button aria-label="Previous Page" onclick="go(current - 1)">&lt;</button>'
+            f'<span id="pageCount">1 de {pages}</span>'
+            '<button aria-label="Next Page" onclick="go(current + 1)"><i class="pbi-glyph-chevronrightmedium">&gt;</i></button>'
+            '</div>'
+        )
+    if layout == "databricks_tabs":
+        tabs = "".join(
+            f'<button role="tab" id="tab-{i}" data-navigation-tab-id="t{i}" aria-selected="{str(i == 0).lower()}" '
+            f'onclick="go({i})">{html.escape(n)}</button>'
+            for i, n in enumerate(names)
+        )
+        return f'<div class="db-bar"><div role="tablist">{tabs}</div></div>'
+    if layout == "top_tabs":
+        tabs = "".join(f'<div class="tab" data-tab="{i}" onclick="go({i})">{html.escape(n)}</div>' for i, n in enumerate(names))
+        return f'<div class="top-tabs">{tabs}</div>'
+    items = "".join(f'<div class="item" data-tab="{i}" onclick="go({i})">{html.escape(n)}</div>' for i, n in enumerate(names))
+    return f'<div class="left-list"><div class="brand">Relatório</div>{items}</div>'
+
+
+def _canvas_class(layout: str) -> str:
+    """Marca de plataforma do Power BI (canvas do relatório) no layout de rodapé nativo."""
+    return ' class="exploreCanvas"' if layout == "native_footer" else ""
+
+
+def _canvas_insets(layout: str) -> str:
+    """Posição do container de conteúdo (é ele que rola quando height > viewport)."""
+    if layout == "native_footer":
+        return f"top:0;left:0;right:0;bottom:{FOOTER_HEIGHT}px"
+    if layout == "databricks_tabs":
+        return f"top:{DATABRICKS_BAR_HEIGHT}px;left:0;right:0;bottom:0"
+    if layout == "top_tabs":
+        return f"top:{TOP_TABS_HEIGHT}px;left:0;right:0;bottom:0"
+    return f"top:0;left:{LEFT_LIST_WIDTH}px;right:0;bottom:0"
+
+
+STYLE = f"""
+* {{ box-sizing: border-box; margin: 0; }}
+body {{ font-family: Segoe UI, Arial, sans-serif; background: #dfe3ea; overflow: hidden; }}
+#canvas {{ position: fixed; overflow-y: auto; padding: 24px; }}
+h1 {{ font-size: 28px; margin-bottom: 16px; color: #252423; }}
+.grid {{ display: grid; gap: 20px; }}
+.card {{ background: #fff; border-radius: 6px; height: 300px; padding: 14px; display: flex; flex-direction: column; }}
+.card-title {{ font-size: 14px; color: #605e5c; margin-bottom: 8px; }}
+.visual {{ flex: 1; position: relative; }}
+.card.loading .visual > * {{ visibility: hidden; }}
+.card.loading .visual::after {{ content: "Carregando..."; position: absolute; inset: 0; background: #eef0f3; color: #a19f9d; display: flex; align-items: center; justify-content: center; }}
+.kpi {{ font-size: 72px; font-weight: 600; text-align: center; margin-top: 50px; }}
+.bars {{ display: flex; align-items: flex-end; gap: 6px; height: 100%; }}
+.bar {{ flex: 1; }}
+.donut {{ width: 200px; height: 200px; border-radius: 50%; margin: 10px auto; }}
+.heat {{ display: grid; grid-template-columns: repeat(6, 1fr); height: 100%; gap: 2px; }}
+.pbi-footer {{ position: fixed; left: 0; right: 0; bottom: 0; height: {FOOTER_HEIGHT}px; background: #e1dfdd; display: flex; align-items: center; justify-content: center; gap: 24px; font-size: 14px; }}
+.pbi-footer button {{ width: 60px; height: 30px; border: 0; background: #c8c6c4; cursor: pointer; }}
+.pbi-footer button[aria-label="Next Page"] {{ position: absolute; top: 5px; left: {FOOTER_NEXT_X - 30}px; }}
+.db-bar {{ position: fixed; top: 0; left: 0; right: 0; height: {DATABRICKS_BAR_HEIGHT}px; background: #fff; border-bottom: 1px solid #d0d7de; padding-left: {DATABRICKS_TAB_LEFT}px; }}
+.db-bar button {{ width: {DATABRICKS_TAB_WIDTH}px; height: {DATABRICKS_BAR_HEIGHT}px; border: 0; background: none; font-size: 14px; cursor: pointer; }}
+.db-bar button[aria-selected="true"] {{ border-bottom: 3px solid #1b3139; font-weight: 600; }}
+.top-tabs {{ position: fixed; top: 0; left: 0; right: 0; height: {TOP_TABS_HEIGHT}px; background: #1f2a44; padding-left: {TOP_TAB_LEFT}px; display: flex; }}
+.top-tabs .tab {{ width: {TOP_TAB_WIDTH}px; color: #cfd6e4; display: flex; align-items: center; justify-content: center; cursor: pointer; }}
+.top-tabs .tab.active {{ background: #3b82f6; color: #fff; }}
+.left-list {{ position: fixed; top: 0; left: 0; bottom: 0; width: {LEFT_LIST_WIDTH}px; background: #2b2d42; color: #edf2f4; }}
+.left-list .brand {{ height: {LEFT_ITEM_TOP}px; font-size: 22px; display: flex; align-items: center; padding-left: 24px; }}
+.left-list .item {{ height: {LEFT_ITEM_HEIGHT}px; display: flex; align-items: center; padding-left: 24px; cursor: pointer; }}
+.left-list .item.active {{ background: #ef233c; }}
+"""
+
+SCRIPT = """
+let current = 0;
+const TOTAL = %(pages)d, DELAY_MS = %(delay_ms)d;
+let renderSeq = 0;
+
+function go(index) {
+    if (index < 0 || index >= TOTAL || index === current && document.body.dataset.ready) return;
+    current = index;
+    document.body.dataset.ready = "1";
+    document.querySelectorAll(".page").forEach(p => p.style.display = (+p.dataset.page === index) ? "" : "none");
+    document.querySelectorAll("[data-tab]").forEach(t => t.classList.toggle("active", +t.dataset.tab === index));
+    document.querySelectorAll("[role=tab]").forEach((t, i) => t.setAttribute("aria-selected", String(i === index)));
+    const counter = document.getElementById("pageCount");
+    if (counter) counter.textContent = (index + 1) + " de " + TOTAL;
+    document.getElementById("canvas").scrollTop = 0;
+
+    // Visuais assíncronos: cada troca de página recarrega os cards de forma escalonada
+    const seq = ++renderSeq;
+    const cards = document.querySelectorAll('.page[data-page="' + index + '"] .card');
+    if (!DELAY_MS) return;
+    cards.forEach((card, n) => {
+        card.classList.add("loading");
+        setTimeout(() => { if (seq === renderSeq) card.classList.remove("loading"); }, DELAY_MS * (n + 1) / cards.length);
+    });
+}
+go(0);
+"""
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Entrar</title>
+<style>
+body { margin: 0; height: 100vh; display: flex; align-items: center; justify-content: center; background: linear-gradient(135deg, #0f4c81, #1b998b); font-family: Segoe UI, Arial, sans-serif; }
+form { background: #fff; padding: 48px; border-radius: 8px; width: 420px; display: flex; flex-direction: column; gap: 16px; }
+input, button { height: 44px; font-size: 16px; padding: 0 12px; }
+button { background: #0f4c81; color: #fff; border: 0; }
+</style></head>
+<body><form><h2>Entrar na sua conta</h2><input placeholder="E-mail"><input type="password" placeholder="Senha"><button type="button">Entrar</button></form></body></html>
+"""
+
+
+def render_dashboard(layout: str, pages: int = DEFAULT_PAGES, delay_ms: int = 0, height: int = 0) -> str:
+    """HTML completo de um dashboard sintético."""
+    content_height = max(height, VIEWPORT["height"] - 2 * TOP_TABS_HEIGHT)
+    sections = "".join(_render_page(layout, i, content_height) for i in range(pages))
+    script = SCRIPT % {"pages": pages, "delay_ms": delay_ms}
+    return (
+        '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8">'
+        f'<title>Fixture {layout}</title><style>{STYLE}</style></head><body>'
+        f'{_render_nav(layout, pages)}'
+        f'<div id="canvas"{_canvas_class(layout)} style="{_canvas_insets(layout)}">{sections}</div>'
+        f'<script>{script}</script></body></html>'
+    )
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path in ("", "/"):
+            base = f"http://{self.headers.get('Host', 'localhost')}"
+            links = "".join(f'<li><a href="{u}">{html.escape(u)}</a></li>' for u in default_fixture_urls(base))
+            self._send(200, f"<!DOCTYPE html><meta charset='utf-8'><h1>Fixtures</h1><ul>{links}</ul>")
+            return
+
+        spec = parse_fixture_url(self.path)
+        if spec is None:
+            self._send(404, "Fixture não encontrada")
+            return
+        if spec["layout"] == "login":
+            self._send(200, LOGIN_PAGE)
+            return
+        self._send(200, render_dashboard(spec["layout"], spec["pages"], spec["delay_ms"], spec["height"]))
+
+    def _send(self, status: int, body: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Sem log por requisição
+
+
+class FixtureServer:
+    """
+    Servidor HTTP das fixtures em thread daemon.
+
+        with FixtureServer() as server:
+            urls = default_fixture_urls(server.base_url)
+
+    Attributes:
+        port: Porta (0 = escolhida pelo SO).
+        base_url: http://127.0.0.1:<porta>, disponível após start().
+    """
+
+    def __init__(self, port: int = FIXTURE_SERVER_PORT, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = port
+        self.base_url: Optional[str] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> str:
+        self._server = ThreadingHTTPServer((self.host, self.port), _FixtureHandler)
+        self.port = self._server.server_address[1]
+        self.base_url = f"http://{self.host}:{self.port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="fixture-http").start()
+        logger.info(f"🧪 Fixtures servidas em {self.base_url}/")
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FixtureServer":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.stop()
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de dashboards sintéticos (benchmarks offline)")
+    parser.add_argument("--port", type=int, default=FIXTURE_SERVER_PORT, help="Porta HTTP")
+    parser.add_argument("--write-urls", action="store_true", help="Grava as URLs padrão em urls.json (main.py / batch_main.py)")
+    args = parser.parse_args()
+
+    server = FixtureServer(port=args.port)
+    base_url = server.start()
+    urls = default_fixture_urls(base_url)
+    if args.write_urls:
+        with open("urls.json", "w", encoding="utf-8") as f:
+            json.dump(urls, f, indent=2)
+        logger.info(f"📝 {len(urls)} URLs gravadas em urls.json (rode com LLM_BACKEND=fake).")
+    for u in urls:
+        print(f"   {u}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+        sys.exit(0)
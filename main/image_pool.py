@@ -0,0 +1,216 @@
+"""
+Pool de processos para o trabalho de imagem pesado em CPU.
+
+Costura do scroll, re-encode PNG, conversão RGB, pHash e detecção de tela de
+erro rodavam inline na thread do event loop: com várias abas no Batch, cada
+captura grande parava todas as outras. Aqui elas rodam num ProcessPoolExecutor
+(sem disputar o GIL) atrás de uma API assíncrona:
+
+    images = get_image_pool()
+    phash = await images.phash(png_bytes, nav_type)
+    phash, is_error = await images.inspect(png_bytes, nav_type)
+    png = await images.stitch_png(screenshots, positions, client_height, scroll_height)
+
+Frames grandes (>= IMAGE_SHM_MIN_BYTES) são copiados uma vez para um bloco de
+memória compartilhada e o worker lê direto dele, sem serializar os bytes pelo
+pipe do pool. Com IMAGE_WORKERS = 0 o mesmo código roda em threads.
+"""
+
+import io
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+import imagehash
+from PIL import Image
+
+from config import IMAGE_WORKERS, IMAGE_SHM_MIN_BYTES
+from utils import setup_logger, compute_phash, is_error_screen, parse_phash
+from telemetry import span
+
+logger = setup_logger("ImagePool")
+
+JPEG_DRAFT_SCALE = 4  # Redução aplicada na decodificação de frames JPEG
+
+# Frames como chegam ao worker: bytes (pequenos / modo thread) ou (nome do bloco, offsets) em memória compartilhada
+FramesRef = Union[List[bytes], Tuple[str, List[Tuple[int, int]]]]
+
+
+# --- Funções executadas nos workers (nível de módulo: precisam ser importáveis pelo processo filho) ---
+
+def _open_frames(frames: FramesRef, handler: Callable[[List[bytes]], Any]) -> Any:
+    """Entrega os frames ao handler, anexando e liberando o bloco compartilhado se for o caso."""
+    if isinstance(frames, list):
+        return handler(frames)
+    name, spans = frames
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        views = [shm.buf[start:start + size] for start, size in spans]
+        try:
+            return handler(views)
+        finally:
+            # Views abertas impedem o close() do bloco
+            for view in views:
+                view.release()
+    finally:
+        shm.close()
+
+
+def _decode(data: Any) -> Image.Image:
+    """
+    Decodifica um frame para RGB.
+
+    JPEG (frames de comparação) é decodificado em 1/4 da escala pelo próprio
+    decoder (draft): o pHash reduz a 32x32 e a tela de erro a 100x100.
+    """
+    image = Image.open(io.BytesIO(data))
+    if image.format == "JPEG":
+        image.draft("RGB", (image.width // JPEG_DRAFT_SCALE, image.height // JPEG_DRAFT_SCALE))
+    # convert() carrega os pixels antes de liberar o buffer compartilhado
+    return image.convert("RGB")
+
+
+def stitch_images(screenshots: Sequence[Any], positions: List[int], client_height: int, scroll_height: int) -> Image.Image:
+    """Une múltiplas screenshots baseado nas posições de scroll."""
+    images = [Image.open(io.BytesIO(b)) for b in screenshots]
+
+    width = images[0].width
+    final_height = scroll_height
+
+    final_image = Image.new("RGB", (width, final_height), (255, 255, 255))
+
+    for img, scroll_pos in zip(images, positions):
+        y_in_final = int(scroll_pos)
+
+        # Quanto da imagem podemos colar
+        available_space = final_height - y_in_final
+        crop_height = min(img.height, available_space)
+
+        if crop_height > 0:
+            cropped = img.crop((0, 0, width, crop_height))
+            final_image.paste(cropped, (0, y_in_final))
+
+    return final_image
+
+
+def _stitch_png_job(frames: FramesRef, positions: List[int], client_height: int, scroll_height: int) -> bytes:
+    def handler(views):
+        final_image = stitch_images(views, positions, client_height, scroll_height)
+        output_buffer = io.BytesIO()
+        final_image.save(output_buffer, format="PNG")
+        return output_buffer.getvalue()
+    return _open_frames(frames, handler)
+
+
+def _phash_job(frames: FramesRef, nav_type: str) -> str:
+    return _open_frames(frames, lambda views: str(compute_phash(_decode(views[0]), nav_type)))
+
+
+def _inspect_job(frames: FramesRef, nav_type: str) -> Tuple[str, bool]:
+    def handler(views):
+        image = _decode(views[0])
+        return str(compute_phash(image, nav_type)), is_error_screen(image)
+    return _open_frames(frames, handler)
+
+
+def _noop_job() -> None:
+    return None
+
+
+class ImageWorkerPool:
+    """
+    API assíncrona sobre o pool de processos de imagem.
+
+    Attributes:
+        workers: Processos do pool (0 = threads, sem processos).
+        shm_min_bytes: Tamanho mínimo (total dos frames) para usar memória compartilhada.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS, shm_min_bytes: int = IMAGE_SHM_MIN_BYTES):
+        self.workers = workers
+        self.shm_min_bytes = shm_min_bytes
+        self._executor: Optional[Executor] = None
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.workers > 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.uses_processes:
+                # spawn: o processo pai tem threads (Playwright, I/O de disco), fork não é seguro
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+                logger.info(f"🧮 Pool de imagem iniciado ({self.workers} processos).")
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image")
+        return self._executor
+
+    def _share(self, frames: Sequence[bytes]) -> Tuple[FramesRef, Optional[shared_memory.SharedMemory]]:
+        """Copia os frames para um bloco compartilhado (só vale a pena em processos e para frames grandes)."""
+        total = sum(len(f) for f in frames)
+        if not self.uses_processes or total < self.shm_min_bytes:
+            return list(frames), None
+
+        shm = shared_memory.SharedMemory(create=True, size=total)
+        spans = []
+        offset = 0
+        for frame in frames:
+            shm.buf[offset:offset + len(frame)] = frame
+            spans.append((offset, len(frame)))
+            offset += len(frame)
+        return (shm.name, spans), shm
+
+    async def _submit(self, job: Callable, frames: Sequence[bytes], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        ref, shm = self._share(frames)
+        try:
+            with span("image_task", op=job.__name__.strip("_").removesuffix("_job"), bytes=sum(len(f) for f in frames)):
+                try:
+                    return await loop.run_in_executor(self._get_executor(), job, ref, *args)
+                except BrokenProcessPool:
+                    # Worker morto (ex: OOM): recria o pool e tenta uma vez
+                    logger.warning("⚠️ Pool de imagem quebrado. Recriando...")
+                    self.close(wait=False)
+                    return await loop.run_in_executor(self._get_executor(), job, ref, *args)
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    async def warm_up(self) -> None:
+        """Sobe os processos antes do primeiro frame (o spawn + imports levam ~1s por processo)."""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, _noop_job) for _ in range(max(self.workers, 1))))
+
+    async def phash(self, png_bytes: bytes, nav_type: str = "default") -> imagehash.ImageHash:
+        """pHash da ROI (para PNG, mesmo resultado de compute_phash(bytes_to_image(png_bytes), nav_type))."""
+        return parse_phash(await self._submit(_phash_job, [png_bytes], nav_type))
+
+    async def inspect(self, png_bytes: bytes, nav_type: str = "default") -> Tuple[imagehash.ImageHash, bool]:
+        """pHash da ROI e tela de erro numa única decodificação."""
+        hash_str, is_error = await self._submit(_inspect_job, [png_bytes], nav_type)
+        return parse_phash(hash_str), is_error
+
+    async def stitch_png(self, screenshots: List[bytes], positions: List[int], client_height: int, scroll_height: int) -> bytes:
+        """Costura as capturas do scroll e devolve o PNG final."""
+        return await self._submit(_stitch_png_job, screenshots, positions, client_height, scroll_height)
+
+    def close(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_default_pool: Optional[ImageWorkerPool] = None
+
+
+def get_image_pool() -> ImageWorkerPool:
+    """Pool compartilhado pelo processo (todas as abas usam os mesmos workers)."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ImageWorkerPool()
+    return _default_pool
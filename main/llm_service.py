@@ -5,7 +5,9 @@ from typing import List, Dict, Any, Optional
 from google import genai
 from google.genai import types
 from google.genai.errors import APIError, ClientError
-from config import GEMINI_API_KEY, MODEL_SCOUT, MODEL_ANALYST, VIEWPORT, LLM_MAX_RETRIES, LLM_BASE_DELAY
+from config import GEMINI_API_KEY, MODEL_SCOUT, MODEL_ANALYST, VIEWPORT, LLM_MAX_RETRIES, LLM_BASE_DELAY, LLM_BACKEND
+from telemetry import span, traced
+from llm_usage import record_usage, check_budget
 
 
 logger = logging.getLogger("Cataloger")
@@ -22,58 +24,78 @@ class GeminiService:
         model_name: str, 
         prompt_text: str, 
         image_bytes: bytes, 
-        response_schema: Optional[Dict[str, Any]] = None
+        response_schema: Optional[Dict[str, Any]] = None,
+        phase: str = "unknown"
     ) -> Optional[str]:
-        """Método genérico para chamar a API do Google GenAI com retry automático."""
-        
+        """
+        Método genérico para chamar a API do Google GenAI com retry automático.
+
+        O usage_metadata de cada resposta é contabilizado (tokens/custo) com a fase e a tentativa.
+        Lança LLMBudgetExceededError se o orçamento do processo já foi atingido.
+        """
+        check_budget()
+
         for attempt in range(LLM_MAX_RETRIES):
-            try:
-                image_part = types.Part.from_bytes(
-                    data=image_bytes,
-                    mime_type="image/png"
-                )
-                
-                text_part = types.Part.from_text(text=prompt_text)
-                
-                contents = [
-                    types.Content(
-                        role="user",
-                        parts=[text_part, image_part]
+            # Span por tentativa: modelo, tamanho da imagem e resultado (ok / retry / fail)
+            with span("gemini_request", model=model_name, attempt=attempt + 1, bytes=len(image_bytes)) as request_span:
+                try:
+                    image_part = types.Part.from_bytes(
+                        data=image_bytes,
+                        mime_type="image/png"
                     )
-                ]
 
-                # Configuração de geração
-                generate_config = types.GenerateContentConfig(
-                    response_mime_type="application/json" if response_schema else "text/plain",
-                    response_schema=response_schema
-                )
+                    text_part = types.Part.from_text(text=prompt_text)
 
-                response = self.client.models.generate_content(
-                    model=model_name,
-                    contents=contents,
-                    config=generate_config
-                )
+                    contents = [
+                        types.Content(
+                            role="user",
+                            parts=[text_part, image_part]
+                        )
+                    ]
 
-                return response.text
+                    # Configuração de geração
+                    generate_config = types.GenerateContentConfig(
+                        response_mime_type="application/json" if response_schema else "text/plain",
+                        response_schema=response_schema
+                    )
 
-            except (APIError, ClientError) as e:
-                delay = LLM_BASE_DELAY * (2 ** attempt)  # Backoff: 1s, 2s, 4s
-                error_msg = getattr(e, 'message', str(e))
-                
-                if attempt < LLM_MAX_RETRIES - 1:
-                    logger.warning(f"⚠️ Tentativa {attempt + 1}/{LLM_MAX_RETRIES} falhou ({model_name}): {error_msg}. Retry em {delay}s...")
-                    time.sleep(delay)
-                else:
-                    logger.error(f"❌ Todas as {LLM_MAX_RETRIES} tentativas falharam ({model_name}): {error_msg}")
+                    response = self.client.models.generate_content(
+                        model=model_name,
+                        contents=contents,
+                        config=generate_config
+                    )
+
+                    if response.usage_metadata is not None:
+                        usage = record_usage(model_name, phase, attempt + 1, response.usage_metadata, len(image_bytes))
+                        request_span.set(input_tokens=usage["input_tokens"], output_tokens=usage["output_tokens"])
+
+                    return response.text
+
+                except (APIError, ClientError) as e:
+                    delay = LLM_BASE_DELAY * (2 ** attempt)  # Backoff: 1s, 2s, 4s
+                    error_msg = getattr(e, 'message', str(e))
+
+                    request_span.set(outcome="retry" if attempt < LLM_MAX_RETRIES - 1 else "fail", error=type(e).__name__)
+                    if attempt < LLM_MAX_RETRIES - 1:
+                        logger.warning(f"⚠️ Tentativa {attempt + 1}/{LLM_MAX_RETRIES} falhou ({model_name}): {error_msg}. Retry em {delay}s...")
+                        time.sleep(delay)
+                    else:
+                        logger.error(f"❌ Todas as {LLM_MAX_RETRIES} tentativas falharam ({model_name}): {error_msg}")
+                        return None
+
+                except Exception as e:
+                    # Erros inesperados não fazem retry (podem ser bugs no código)
+                    request_span.set(outcome="fail", error=type(e).__name__)
+                    logger.error(f"❌ Erro inesperado na chamada LLM ({model_name}): {e}")
                     return None
-                    
-            except Exception as e:
-                # Erros inesperados não fazem retry (podem ser bugs no código)
-                logger.error(f"❌ Erro inesperado na chamada LLM ({model_name}): {e}")
-                return None
-        
+
         return None
 
+    @traced(
+        "llm_discover_navigation",
+        args_attrs=lambda self, image_bytes: {"bytes": len(image_bytes)},
+        result_attrs=lambda data: {"outcome": "ok" if data.get("raw_response") else "fail"}
+    )
     def discover_navigation(self, image_bytes: bytes) -> Dict[str, Any]:
         """Estágio B: Identifica elementos de navegação com prioridade para paginação nativa."""
         
@@ -151,7 +173,8 @@ class GeminiService:
             MODEL_SCOUT, 
             prompt, 
             image_bytes, 
-            response_schema=scout_schema
+            response_schema=scout_schema,
+            phase="scout"
         )
         
         base_result = {
@@ -193,6 +216,11 @@ class GeminiService:
             logger.error(f"Falha ao decodificar JSON do Scout. Recebido: {json_text}")
             return base_result
 
+    @traced(
+        "llm_analyze_page",
+        args_attrs=lambda self, image_bytes: {"bytes": len(image_bytes)},
+        result_attrs=lambda data: {"outcome": "fail" if "erro" in data else "ok"}
+    )
     def analyze_page(self, image_bytes: bytes) -> Dict[str, Any]:
         """Estágio D: Documentação Funcional (Abstrata e Atemporal)."""
         prompt = """
@@ -254,7 +282,8 @@ class GeminiService:
             MODEL_ANALYST, 
             prompt, 
             image_bytes, 
-            response_schema=analyst_schema
+            response_schema=analyst_schema,
+            phase="analyst"
         )
 
         if not json_text:
@@ -264,4 +293,13 @@ class GeminiService:
             return json.loads(json_text)
         except json.JSONDecodeError:
             logger.error(f"JSON Inválido no Analyst: {json_text}")
-            return {"erro": "JSON inválido retornado pelo LLM"}
\ No newline at end of file
+            return {"erro": "JSON inválido retornado pelo LLM"}
+
+
+def create_llm_service():
+    """GeminiService, ou o LLM falso offline quando LLM_BACKEND="fake" (benchmarks com fixtures)."""
+    if LLM_BACKEND == "fake":
+        from fake_llm import FakeLLMService
+        logger.info("🧪 LLM_BACKEND=fake: respostas sintéticas (sem chamadas ao Gemini).")
+        return FakeLLMService()
+    return GeminiService()
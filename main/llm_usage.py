@@ -0,0 +1,181 @@
+"""
+Contabilidade de tokens e custo das chamadas ao Gemini.
+
+Cada resposta tem o `usage_metadata` registrado com URL, fase (scout/analyst),
+modelo e número da tentativa. Os registros vão para llm_usage.jsonl na pasta
+do run, o resumo entra no catálogo (metrics.llm) e o total do processo é
+exibido ao fim do Batch.
+
+Orçamentos (LLM_BUDGET_USD / LLM_BUDGET_TOKENS) são verificados antes de cada
+chamada: estourado o limite, LLMBudgetExceededError interrompe o processamento
+(o checkpoint do dashboard atual é preservado para a próxima execução).
+"""
+
+import json
+import threading
+import contextvars
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import MODEL_PRICING_USD_PER_1M, LLM_BUDGET_USD, LLM_BUDGET_TOKENS
+from utils import setup_logger, jsonl_append_prefix
+
+logger = setup_logger("LLMUsage")
+
+USAGE_FILENAME = "llm_usage.jsonl"
+
+# Ledger do dashboard em andamento (isolado por task/worker)
+_current_ledger: contextvars.ContextVar = contextvars.ContextVar("llm_usage_ledger", default=None)
+
+# Todos os registros do processo (para totais do Batch e orçamento)
+_process_records: List[Dict[str, Any]] = []
+_process_lock = threading.Lock()
+_warned_models = set()
+
+
+class LLMBudgetExceededError(Exception):
+    """Orçamento de custo/tokens do processo foi atingido."""
+    pass
+
+
+class UsageLedger:
+    """Registros de uso de um dashboard (URL), gravados em llm_usage.jsonl."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.records: List[Dict[str, Any]] = []
+
+    def flush(self, run_dir: Path) -> None:
+        """Acrescenta os registros pendentes em <run_dir>/llm_usage.jsonl (retomadas acumulam)."""
+        if not self.records:
+            return
+        path = Path(run_dir) / USAGE_FILENAME
+        prefix = jsonl_append_prefix(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(prefix + "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.records))
+        self.records = []
+
+
+def start_usage_recording(url: str) -> UsageLedger:
+    """Associa um novo ledger ao contexto atual (chamar no início de cada dashboard)."""
+    ledger = UsageLedger(url)
+    _current_ledger.set(ledger)
+    return ledger
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Custo em USD pela tabela MODEL_PRICING_USD_PER_1M (modelo desconhecido = 0)."""
+    pricing = MODEL_PRICING_USD_PER_1M.get(model)
+    if pricing is None:
+        if model not in _warned_models:
+            _warned_models.add(model)
+            logger.warning(f"⚠️ Modelo '{model}' sem preço em MODEL_PRICING_USD_PER_1M. Custo contabilizado como 0.")
+        return 0.0
+    return (input_tokens * pricing["input"] + output_tokens * pricing["output"]) / 1_000_000
+
+
+def _image_tokens(usage: Any) -> int:
+    """Tokens de imagem no prompt (prompt_tokens_details por modalidade)."""
+    total = 0
+    for detail in getattr(usage, "prompt_tokens_details", None) or []:
+        if "IMAGE" in str(getattr(detail, "modality", "")).upper():
+            total += getattr(detail, "token_count", 0) or 0
+    return total
+
+
+def record_usage(model: str, phase: str, attempt: int, usage: Any, image_bytes: int = 0) -> Dict[str, Any]:
+    """
+    Registra o usage_metadata de uma resposta do Gemini.
+
+    Tokens de saída incluem os de raciocínio (thoughts), que são cobrados como saída.
+    """
+    input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = (getattr(usage, "candidates_token_count", 0) or 0) + (getattr(usage, "thoughts_token_count", 0) or 0)
+
+    ledger = _current_ledger.get()
+    record = {
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "url": ledger.url if ledger else None,
+        "phase": phase,
+        "model": model,
+        "attempt": attempt,
+        "image_bytes": image_bytes,
+        "input_tokens": input_tokens,
+        "image_tokens": _image_tokens(usage),
+        "output_tokens": output_tokens,
+        "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+        "total_tokens": getattr(usage, "total_token_count", 0) or (input_tokens + output_tokens),
+        "cost_usd": round(estimate_cost(model, input_tokens, output_tokens), 6)
+    }
+
+    with _process_lock:
+        _process_records.append(record)
+    if ledger is not None:
+        ledger.records.append(record)
+    return record
+
+
+def summarize_usage(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totais (tokens, custo) com quebra por fase e por modelo."""
+    def totals(items):
+        return {
+            "calls": len(items),
+            "input_tokens": sum(r.get("input_tokens", 0) for r in items),
+            "image_tokens": sum(r.get("image_tokens", 0) for r in items),
+            "output_tokens": sum(r.get("output_tokens", 0) for r in items),
+            "total_tokens": sum(r.get("total_tokens", 0) for r in items),
+            "cost_usd": round(sum(r.get("cost_usd", 0) for r in items), 4)
+        }
+
+    by_phase, by_model = defaultdict(list), defaultdict(list)
+    for r in records:
+        by_phase[r.get("phase")].append(r)
+        by_model[r.get("model")].append(r)
+
+    summary = totals(records)
+    summary["by_phase"] = {k: totals(v) for k, v in by_phase.items()}
+    summary["by_model"] = {k: totals(v) for k, v in by_model.items()}
+    return summary
+
+
+def process_usage_summary() -> Dict[str, Any]:
+    """Resumo de todas as chamadas feitas neste processo."""
+    with _process_lock:
+        records = list(_process_records)
+    return summarize_usage(records)
+
+
+def budget_exceeded() -> Optional[str]:
+    """Retorna a descrição do limite estourado (ou None se dentro do orçamento)."""
+    if LLM_BUDGET_USD is None and LLM_BUDGET_TOKENS is None:
+        return None
+    with _process_lock:
+        cost = sum(r["cost_usd"] for r in _process_records)
+        tokens = sum(r["total_tokens"] for r in _process_records)
+    if LLM_BUDGET_USD is not None and cost >= LLM_BUDGET_USD:
+        return f"custo ${cost:.2f} >= ${LLM_BUDGET_USD:.2f}"
+    if LLM_BUDGET_TOKENS is not None and tokens >= LLM_BUDGET_TOKENS:
+        return f"{tokens} tokens >= {LLM_BUDGET_TOKENS}"
+    return None
+
+
+def check_budget() -> None:
+    """Lança LLMBudgetExceededError se o orçamento do processo foi atingido."""
+    reason = budget_exceeded()
+    if reason:
+        raise LLMBudgetExceededError(f"Orçamento de LLM atingido ({reason}).")
+
+
+def log_usage_summary(summary: Optional[Dict[str, Any]] = None) -> None:
+    """Exibe totais de tokens/custo por fase."""
+    summary = summary if summary is not None else process_usage_summary()
+    if not summary["calls"]:
+        return
+    logger.info(
+        f"💰 LLM: {summary['calls']} chamadas, {summary['input_tokens']} tokens de entrada "
+        f"({summary['image_tokens']} de imagem), {summary['output_tokens']} de saída, custo estimado ${summary['cost_usd']:.4f}"
+    )
+    for phase, s in summary["by_phase"].items():
+        logger.info(f"   {phase:<10} {s['calls']:>4}x  {s['total_tokens']:>10} tokens  ${s['cost_usd']:.4f}")
@@ -0,0 +1,62 @@
+import asyncio
+import argparse
+import json
+import sys
+from pathlib import Path
+from playwright.async_api import async_playwright
+
+from config import AUTH_STATE_FILE
+from bot_core import launch_browser_context
+from utils import setup_logger
+
+logger = setup_logger("Login")
+
+URLS_FILE = "urls.json"
+
+
+def _default_url():
+    """Usa a primeira URL de urls.json como página de login (se existir)."""
+    try:
+        urls = json.loads(Path(URLS_FILE).read_text(encoding='utf-8'))
+        return urls[0] if urls else None
+    except Exception:
+        return None
+
+
+async def main(url: str, output: str):
+    """
+    Login interativo único: abre o navegador, espera o humano autenticar
+    e exporta o storage_state (cookies + localStorage) para o modo headless.
+    """
+    async with async_playwright() as p:
+        browser, context = await launch_browser_context(p, headless=False)
+        page = context.pages[0] if context.pages else await context.new_page()
+
+        logger.info(f"🔐 Abrindo {url}. Faça login (SSO/MFA) na janela do navegador.")
+        await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+
+        # input() bloqueia: roda em thread para não travar o loop do Playwright
+        await asyncio.to_thread(input, "\n👉 Pressione ENTER aqui quando o painel estiver carregado... ")
+
+        await context.storage_state(path=output)
+        logger.info(f"✅ Sessão salva em '{output}'. Agora rode: python batch_main.py --headless")
+
+        await context.close()
+        if browser:
+            await browser.close()
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+    parser = argparse.ArgumentParser(description="Login interativo e exportação da sessão (storage_state).")
+    parser.add_argument("url", nargs="?", default=_default_url(), help="URL de um painel (padrão: primeira de urls.json).")
+    parser.add_argument("--output", default=AUTH_STATE_FILE, help="Arquivo de saída do storage_state.")
+    args = parser.parse_args()
+
+    if not args.url:
+        print("❌ Informe a URL de um painel ou preencha urls.json.")
+        sys.exit(1)
+
+    asyncio.run(main(args.url, args.output))
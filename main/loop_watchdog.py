@@ -0,0 +1,153 @@
+"""
+Watchdog do event loop: mede o lag continuamente e aponta o código bloqueante.
+
+O loop que dirige todas as abas do Playwright não pode ficar parado: enquanto
+um callback síncrono roda (chamada ao Gemini, time.sleep de retry, costura/
+encode PIL, escrita de arquivo), nenhuma outra aba avança. Uma thread confere
+o último "tick" do LoopLagMonitor; se o loop ficar mais de
+LOOP_BLOCK_THRESHOLD_S sem responder, a pilha da thread do loop é capturada
+naquele instante (o código culpado) e registrada no log.
+
+Cada bloqueio entra:
+- nos totais por callsite (arquivo:linha da função do projeto mais interna),
+  exibidos ao fim e gravados em batch_metrics_<ts>.json ("event_loop");
+- nos spans da telemetria ("loop_block"), então aparecem no p50/p95 e no /metrics.
+"""
+
+import os
+import sys
+import time
+import threading
+import traceback
+from typing import Any, Dict, List, Optional
+
+from config import LOOP_BLOCK_THRESHOLD_S
+from profiler import LoopLagMonitor, PROJECT_DIR, is_project_file
+from telemetry import record_span
+from utils import setup_logger
+
+logger = setup_logger("LoopWatchdog")
+
+STACK_LOG_FRAMES = 12  # Frames mais internos exibidos no log de cada bloqueio
+
+
+def blocking_callsite(frame: Any) -> str:
+    """arquivo:linha (função) do frame do projeto mais interno; sem frame do projeto, o mais interno."""
+    innermost = frame
+    while frame is not None:
+        if is_project_file(frame.f_code.co_filename):
+            break
+        frame = frame.f_back
+    frame = frame or innermost
+    filename = os.path.relpath(frame.f_code.co_filename, PROJECT_DIR) if is_project_file(frame.f_code.co_filename) else os.path.basename(frame.f_code.co_filename)
+    return f"{filename}:{frame.f_lineno} ({frame.f_code.co_name})"
+
+
+class LoopWatchdog:
+    """
+    Detecta bloqueios do event loop e acumula o tempo por callsite.
+
+        watchdog = LoopWatchdog()
+        watchdog.start()     # dentro do event loop
+        ...
+        watchdog.stop()
+        watchdog.log_report()
+
+    Attributes:
+        threshold_s: Tempo sem responder a partir do qual o loop é considerado bloqueado.
+        lag: Monitor de lag (um tick a cada LOOP_LAG_INTERVAL_S).
+        callsites: callsite -> {"count", "total_s", "max_s", "stack"}.
+    """
+
+    def __init__(self, threshold_s: float = LOOP_BLOCK_THRESHOLD_S, poll_s: Optional[float] = None):
+        self.threshold_s = threshold_s
+        self.lag = LoopLagMonitor()
+        self.poll_s = poll_s if poll_s is not None else min(0.05, threshold_s / 4)
+        self.callsites: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Inicia o monitor de lag no loop corrente e a thread de vigilância."""
+        self._loop_thread_id = threading.get_ident()
+        self.lag.start()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="loop-watchdog")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.lag.stop()
+
+    def _run(self) -> None:
+        blocked_tick = None  # last_tick do bloqueio em andamento
+        callsite = None
+        blocked_since = 0.0
+
+        while not self._stop.wait(self.poll_s):
+            last_tick = self.lag.last_tick
+            expected = last_tick + self.lag.interval_s
+
+            if blocked_tick is not None and last_tick != blocked_tick:
+                # Loop voltou a responder: fecha o bloqueio
+                self._record(callsite, last_tick - blocked_since)
+                blocked_tick = None
+
+            if blocked_tick is None and time.monotonic() - expected > self.threshold_s:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                blocked_tick, blocked_since = last_tick, expected
+                callsite = blocking_callsite(frame)
+                stack = "".join(traceback.format_stack(frame)[-STACK_LOG_FRAMES:])
+                with self._lock:
+                    entry = self.callsites.setdefault(callsite, {"count": 0, "total_s": 0.0, "max_s": 0.0, "stack": stack})
+                logger.warning(
+                    f"🐢 Event loop bloqueado há {(time.monotonic() - expected) * 1000:.0f} ms em {callsite}:\n{stack.rstrip()}"
+                    if entry["count"] == 0 else
+                    f"🐢 Event loop bloqueado em {callsite} (ocorrência {entry['count'] + 1})"
+                )
+
+    def _record(self, callsite: str, duration_s: float) -> None:
+        with self._lock:
+            entry = self.callsites[callsite]
+            entry["count"] += 1
+            entry["total_s"] += duration_s
+            entry["max_s"] = max(entry["max_s"], duration_s)
+        record_span("loop_block", duration_s, "blocked", callsite=callsite)
+
+    def summary(self) -> Dict[str, Any]:
+        """Lag do loop e totais por callsite (maior tempo bloqueado primeiro)."""
+        with self._lock:
+            items = sorted(self.callsites.items(), key=lambda kv: kv[1]["total_s"], reverse=True)
+            callsites: List[Dict[str, Any]] = [
+                {
+                    "callsite": name,
+                    "count": e["count"],
+                    "total_s": round(e["total_s"], 3),
+                    "max_s": round(e["max_s"], 3),
+                    "stack": e["stack"]
+                }
+                for name, e in items if e["count"]
+            ]
+        return {
+            "threshold_ms": round(self.threshold_s * 1000),
+            "lag": self.lag.summary(),
+            "blocks": sum(c["count"] for c in callsites),
+            "blocked_s": round(sum(c["total_s"] for c in callsites), 3),
+            "callsites": callsites
+        }
+
+    def log_report(self, top: int = 10) -> None:
+        summary = self.summary()
+        lag = summary["lag"]
+        logger.info(
+            f"🐢 Event loop: lag p50 {lag['p50_ms']} ms, p95 {lag['p95_ms']} ms, máx {lag['max_ms']} ms; "
+            f"{summary['blocks']} bloqueios > {summary['threshold_ms']} ms somando {summary['blocked_s']:.1f}s"
+        )
+        for c in summary["callsites"][:top]:
+            logger.info(f"   {c['callsite']:<56} {c['total_s']:>8.2f}s  ({c['count']}x, máx {c['max_s']:.2f}s)")
@@ -1,15 +1,21 @@
 import asyncio
+import argparse
 import sys
 import json
 import os
 from datetime import datetime
 from pathlib import Path
 
-from config import OUTPUT_DIR
+from config import OUTPUT_DIR, HEADLESS, AUTH_STATE_FILE, REQUEUE_FILE, LOOP_WATCHDOG_ENABLED
 import reporter
 from cataloger import DashboardCataloger
-from utils import setup_logger
-from bot_core import BrowserDriver
+from utils import setup_logger, save_requeue_urls
+from bot_core import BrowserDriver, SessionExpiredError
+from telemetry import log_summary, write_summary
+from llm_usage import LLMBudgetExceededError, log_usage_summary, process_usage_summary
+from profiler import SamplingProfiler, finish_profile
+from loop_watchdog import LoopWatchdog
+from image_pool import get_image_pool
 
 # Nome do arquivo temporário de troca de dados
 CONFIG_FILE = "urls.json"
@@ -31,7 +37,7 @@ def load_urls():
     # Fallback: Lista vazia (retornará erro amigável)
     return []
 
-async def main():
+async def main(headless: bool = HEADLESS, profile: bool = False):
     urls_para_processar = load_urls()
     
     # Deduplicação (mantendo ordem)
@@ -49,11 +55,22 @@ async def main():
         return
 
     print(f"📋 Encontradas {len(urls)} URLs para processar.")
+
+    watchdog = None
+    if LOOP_WATCHDOG_ENABLED:
+        watchdog = LoopWatchdog() # Loga a pilha de callbacks que seguram o event loop
+        watchdog.start()
+    profiler = None
+    if profile:
+        profiler = SamplingProfiler()
+        profiler.start()
     
     # --- MODO PERSISTENTE (Browser compartilhado) ---
     logger.info("🚀 Iniciando navegador mestre (Sessão Persistente)...")
     persistent_driver = BrowserDriver()
-    await persistent_driver.start(headless=False) # Abre navegador UMA vez
+    image_warm_up = asyncio.create_task(get_image_pool().warm_up()) # Processos de imagem sobem junto com o navegador
+    await persistent_driver.start(headless=headless) # Abre navegador UMA vez
+    await image_warm_up
     
     reports = []
     
@@ -71,6 +88,17 @@ async def main():
                     print(f"   ✅ Sucesso: {url}")
                 else:
                     print(f"   ⚠️ Ignorado/Erro: {url}")
+            except LLMBudgetExceededError as e:
+                # Próximas URLs também chamariam o LLM: para aqui (checkpoint preservado)
+                logger.error(f"💸 {e}")
+                print(f"   💸 Orçamento de LLM atingido. {len(urls) - i} URLs não processadas.")
+                break
+            except SessionExpiredError as e:
+                # Sem humano para logar: não adianta tentar as próximas URLs
+                logger.error(f"🔒 {e}")
+                save_requeue_urls(REQUEUE_FILE, urls[i:])
+                print(f"   🔒 Sessão expirada. {len(urls) - i} URLs re-enfileiradas em '{REQUEUE_FILE}'.")
+                break
             except Exception as e:
                 logger.error(f"Erro ao processar {url}: {e}")
                 print(f"   ❌ Erro crítico no item {i+1}")
@@ -80,10 +108,28 @@ async def main():
         print("\n🛑 Interrompido pelo usuário.")
         
     finally:
-        # ATENÇÃO: Mantendo navegador aberto conforme solicitado pelo usuário
         print("\n🏁 Processamento em lote finalizado.")
-        print("🌍 O navegador permanecerá ABERTO para preservar a sessão/login.")
-        print("⚠️ Para fechar, feche a janela manualmente ou pare o kernel.")
+        if headless:
+            await persistent_driver.close()
+        else:
+            # ATENÇÃO: Mantendo navegador aberto conforme solicitado pelo usuário
+            print("🌍 O navegador permanecerá ABERTO para preservar a sessão/login.")
+            print("⚠️ Para fechar, feche a janela manualmente ou pare o kernel.")
+        
+        get_image_pool().close()
+
+        # Tempo por fase (p50/p95) desta execução
+        finish_profile(profiler, OUTPUT_DIR)
+        extra = {"llm": process_usage_summary()}
+        if watchdog:
+            watchdog.stop()
+            watchdog.log_report()
+            extra["event_loop"] = watchdog.summary()
+        log_summary()
+        log_usage_summary()
+        metrics_path = write_summary(OUTPUT_DIR, extra=extra)
+        if metrics_path:
+            print(f"⏱️ Métricas de tempo salvas em: {metrics_path}")
         
         # Gera relatório final
         if reports:
@@ -102,6 +148,14 @@ if __name__ == "__main__":
     try:
         if sys.platform == 'win32':
              asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-        asyncio.run(main())
+
+        parser = argparse.ArgumentParser(description="Catalogação sequencial de dashboards.")
+        parser.add_argument("--headless", action="store_true", default=HEADLESS,
+                            help=f"Roda sem janela, reutilizando a sessão salva em '{AUTH_STATE_FILE}' (ver login.py).")
+        parser.add_argument("--profile", action="store_true",
+                            help="Profiler por amostragem: lag do event loop, tempo por função e flame graph em runs/.")
+        args = parser.parse_args()
+
+        asyncio.run(main(headless=args.headless, profile=args.profile))
     except KeyboardInterrupt:
         print("\nProcesso interrompido pelo usuário.")
\ No newline at end of file
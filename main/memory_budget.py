@@ -0,0 +1,85 @@
+"""
+Controle de memória das imagens em trânsito.
+
+As páginas circulam pelo fluxo como handles leves (arquivo + SHA-256); os
+bytes só são lidos do disco no momento de enviar ao Gemini. O ByteBudget
+limita quantos bytes de imagem podem estar carregados ao mesmo tempo
+somando todos os workers, então 4 dashboards longos no Batch não seguram
+centenas de MB de PNGs costurados.
+"""
+
+import sys
+import weakref
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from config import INFLIGHT_BYTES_BUDGET
+
+try:
+    import resource  # Indisponível no Windows
+except ImportError:
+    resource = None
+
+
+class ByteBudget:
+    """
+    Semáforo por bytes compartilhado entre os workers.
+
+    Attributes:
+        limit: Máximo de bytes carregados simultaneamente.
+        in_flight: Bytes reservados no momento.
+        peak: Maior valor de in_flight observado.
+    """
+
+    def __init__(self, limit: int = INFLIGHT_BYTES_BUDGET):
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0
+        # Uma Condition por event loop (primitivas asyncio ficam presas ao loop que as usou)
+        self._conds: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Condition]" = weakref.WeakKeyDictionary()
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int):
+        """
+        Reserva `nbytes` enquanto o bloco executa (espera se estourar o orçamento).
+
+        Uma reserva maior que o limite é aceita quando nada mais está em trânsito,
+        para que uma imagem gigante não trave o fluxo para sempre.
+        """
+        loop = asyncio.get_running_loop()
+        cond = self._conds.get(loop)
+        if cond is None:
+            cond = self._conds[loop] = asyncio.Condition()
+
+        async with cond:
+            await cond.wait_for(lambda: self.in_flight == 0 or self.in_flight + nbytes <= self.limit)
+            self.in_flight += nbytes
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            yield
+        finally:
+            async with cond:
+                self.in_flight -= nbytes
+                cond.notify_all()
+
+
+_default_budget: Optional[ByteBudget] = None
+
+
+def get_byte_budget() -> ByteBudget:
+    """Orçamento compartilhado pelo processo (todos os workers do Batch)."""
+    global _default_budget
+    if _default_budget is None:
+        _default_budget = ByteBudget()
+    return _default_budget
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente (RSS) do processo em MB, ou None se indisponível."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB; macOS em bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
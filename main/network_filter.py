@@ -0,0 +1,150 @@
+"""
+Filtro de rede e métricas de tráfego por aba.
+
+Bloqueia domínios de telemetria/analytics (beacons, trackers) e contabiliza
+requisições, bloqueios e bytes por aba, para comparar execuções com e sem
+o filtro (ver NETWORK_FILTER_ENABLED em config.py).
+
+Modos de bloqueio:
+- "cdp": Network.setBlockedURLs via CDP em cada aba. Mantém o cache HTTP do
+  Chromium ativo (recomendado com perfil persistente compartilhado).
+- "route": context.route do Playwright. Permite bloquear por tipo de recurso
+  (ex: "media", "font"), mas o Playwright desativa o cache HTTP quando há rotas.
+"""
+
+import asyncio
+import weakref
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from config import NETWORK_FILTER_ENABLED, NETWORK_FILTER_MODE, BLOCKED_DOMAINS, BLOCKED_RESOURCE_TYPES
+from utils import setup_logger
+
+logger = setup_logger("NetworkFilter")
+
+# Estatísticas por aba (Page -> contadores). WeakKey para não segurar abas fechadas.
+_PAGE_STATS: "weakref.WeakKeyDictionary[Any, Dict[str, int]]" = weakref.WeakKeyDictionary()
+
+
+def _empty_stats() -> Dict[str, int]:
+    return {"requests": 0, "blocked": 0, "failed": 0, "bytes": 0}
+
+
+def reset_page_stats(page: Any) -> None:
+    """Zera os contadores da aba (ex: no início de cada dashboard)."""
+    if page is not None:
+        _PAGE_STATS[page] = _empty_stats()
+
+
+def get_page_stats(page: Any) -> Dict[str, int]:
+    """Retorna uma cópia dos contadores de rede da aba."""
+    if page is None:
+        return _empty_stats()
+    return dict(_PAGE_STATS.get(page) or _empty_stats())
+
+
+def is_blocked_host(host: str, blocked_domains: List[str]) -> bool:
+    """Verifica se o host pertence a algum domínio bloqueado (inclui subdomínios)."""
+    host = (host or "").lower()
+    for domain in blocked_domains:
+        domain = domain.lower().lstrip("*.")
+        if host == domain or host.endswith("." + domain):
+            return True
+    return False
+
+
+class NetworkFilter:
+    """
+    Instala bloqueio de telemetria e monitoramento de tráfego num BrowserContext.
+
+    Attributes:
+        enabled: Se False, apenas mede o tráfego (linha de base para comparação).
+        mode: "cdp" ou "route" (ver docstring do módulo).
+        blocked_domains: Domínios cujas requisições são abortadas.
+        blocked_resource_types: Tipos de recurso abortados (somente modo "route").
+    """
+
+    def __init__(
+        self,
+        enabled: bool = NETWORK_FILTER_ENABLED,
+        mode: str = NETWORK_FILTER_MODE,
+        blocked_domains: Optional[List[str]] = None,
+        blocked_resource_types: Optional[List[str]] = None
+    ):
+        self.enabled = enabled
+        self.mode = mode
+        self.blocked_domains = list(blocked_domains if blocked_domains is not None else BLOCKED_DOMAINS)
+        self.blocked_resource_types = set(blocked_resource_types if blocked_resource_types is not None else BLOCKED_RESOURCE_TYPES)
+        self._tasks = set()
+
+    async def install(self, context: Any) -> None:
+        """Aplica o filtro no contexto e em todas as abas (atuais e futuras)."""
+        if self.enabled and self.mode == "route":
+            await context.route("**/*", self._handle_route)
+
+        context.on("page", self._on_new_page)
+        for page in context.pages:
+            self._on_new_page(page)
+
+        if self.enabled:
+            logger.info(f"🛡️ Filtro de rede ativo (modo={self.mode}, {len(self.blocked_domains)} domínios bloqueados).")
+        else:
+            logger.info("📶 Filtro de rede desativado (apenas medindo tráfego).")
+
+    def _on_new_page(self, page: Any) -> None:
+        """Registra contadores na aba e, no modo CDP, envia a lista de bloqueio."""
+        reset_page_stats(page)
+        page.on("request", lambda req: self._count(page, "requests"))
+        page.on("requestfailed", lambda req: self._on_request_failed(page, req))
+        page.on("requestfinished", lambda req: self._spawn(self._add_bytes(page, req)))
+
+        if self.enabled and self.mode == "cdp":
+            self._spawn(self._block_via_cdp(page))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _count(self, page: Any, key: str, amount: int = 1) -> None:
+        stats = _PAGE_STATS.get(page)
+        if stats is not None:
+            stats[key] += amount
+
+    def _on_request_failed(self, page: Any, request: Any) -> None:
+        # Tanto route.abort("blockedbyclient") quanto setBlockedURLs geram ERR_BLOCKED_BY_CLIENT
+        if "ERR_BLOCKED_BY_CLIENT" in (request.failure or ""):
+            self._count(page, "blocked")
+        else:
+            self._count(page, "failed")
+
+    async def _add_bytes(self, page: Any, request: Any) -> None:
+        try:
+            sizes = await request.sizes()
+            self._count(page, "bytes", sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0))
+        except Exception:
+            pass
+
+    def _should_block(self, request: Any) -> bool:
+        if request.resource_type in self.blocked_resource_types:
+            return True
+        return is_blocked_host(urlparse(request.url).hostname, self.blocked_domains)
+
+    async def _handle_route(self, route: Any) -> None:
+        if self._should_block(route.request):
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    async def _block_via_cdp(self, page: Any) -> None:
+        """Bloqueia via CDP (Chromium). Cache HTTP permanece ativo."""
+        patterns = []
+        for domain in self.blocked_domains:
+            domain = domain.lower().lstrip("*.")
+            patterns.extend([f"*://{domain}/*", f"*://*.{domain}/*"])
+        try:
+            session = await page.context.new_cdp_session(page)
+            await session.send("Network.enable")
+            await session.send("Network.setBlockedURLs", {"urls": patterns})
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível aplicar bloqueio via CDP: {e}")
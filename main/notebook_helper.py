@@ -3,6 +3,8 @@ import shutil
 import os
 from pathlib import Path
 import reporter
+import run_index
+from blob_store import BlobStore
 
 from datetime import datetime
 
@@ -94,24 +96,22 @@ def smart_update(urls_list):
         except Exception as e:
             print(f"⚠️ Erro ao atualizar processed_urls.json: {e}")
 
-    # 2. Limpa Pastas Físicas
+    # 2. Limpa Pastas Físicas (localizadas pelo índice de runs, sem abrir cada catálogo)
+    deleted = []
     if RUNS_DIR.exists():
-        found_files = list(RUNS_DIR.glob("**/catalog_*.json"))
-        for json_file in found_files:
-            try:
-                if not json_file.exists(): continue
-                
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                saved_url = data.get('url', '').strip()
-                if saved_url in target_urls:
-                    folder_to_delete = json_file.parent
-                    print(f"♻️  Deletando pasta antiga: {folder_to_delete.name}")
+        index = run_index.get_run_index()
+        for url in target_urls:
+            for folder in run_index.runs_for_url(url, index):
+                folder_to_delete = RUNS_DIR / folder
+                try:
+                    print(f"♻️  Deletando pasta antiga: {folder}")
                     shutil.rmtree(folder_to_delete)
+                    deleted.append(folder)
                     cleaned_count += 1
-            except Exception as e:
-                print(f"⚠️ Erro ao processar arquivo {json_file}: {e}")
+                except Exception as e:
+                    print(f"⚠️ Erro ao apagar pasta {folder_to_delete}: {e}")
+        if deleted:
+            run_index.unregister_runs(deleted)
 
     # 3. Reseta Interface
     if REPORT_DIR.exists():
@@ -121,6 +121,10 @@ def smart_update(urls_list):
         except Exception as e:
             print(f"❌ Erro ao limpar report dir: {e}")
 
+    # Blobs referenciados só pelas pastas apagadas (depois do reset do relatório, que também linka as imagens)
+    if deleted:
+        BlobStore().gc()
+
     # 4. Salva urls.json (com Backup)
     _backup_and_save_urls(target_urls)
 
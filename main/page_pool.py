@@ -0,0 +1,165 @@
+"""
+Pool de abas (pages) pré-aquecidas para os workers do modo Batch.
+
+Cada aba já carregou o "shell" do tenant (JS, fontes, runtime de visuais),
+então o worker só paga a navegação até o relatório. As abas são
+reaproveitadas entre URLs e recicladas após N usos para limitar o
+crescimento de memória do renderer.
+"""
+
+import asyncio
+from typing import Any, Optional, Set, Dict
+
+from config import PAGE_POOL_SIZE, PAGE_POOL_MAX_USES, PAGE_POOL_WARMUP_URL
+from utils import setup_logger
+
+logger = setup_logger("PagePool")
+
+
+class PagePool:
+    """
+    Pool de abas dentro de um contexto compartilhado (sessão de login única).
+
+    Attributes:
+        context: BrowserContext do Playwright onde as abas vivem.
+        size: Quantidade de abas mantidas no pool.
+        max_uses: Usos antes de reciclar (fechar e recriar) a aba.
+        warmup_url: URL leve do tenant para pré-carregar o runtime (ou None).
+    """
+
+    def __init__(
+        self,
+        context: Any,
+        size: int = PAGE_POOL_SIZE,
+        max_uses: int = PAGE_POOL_MAX_USES,
+        warmup_url: Optional[str] = PAGE_POOL_WARMUP_URL
+    ):
+        self.context = context
+        self.size = size
+        self.max_uses = max_uses
+        self.warmup_url = warmup_url
+
+        # Abas livres. None = vaga de uma aba que não pôde ser recriada (quem retirar tenta de novo)
+        self._available: asyncio.Queue = asyncio.Queue()
+        self._uses: Dict[Any, int] = {}
+        self._pending: Set[asyncio.Task] = set()
+        self._closed = False
+
+    async def start(self) -> None:
+        """Cria e aquece todas as abas do pool em paralelo."""
+        logger.info(f"🔥 Aquecendo pool com {self.size} abas (warmup: {self.warmup_url or 'nenhum'})...")
+        pages = await asyncio.gather(*(self._new_warm_page() for _ in range(self.size)), return_exceptions=True)
+        for page in pages:
+            if isinstance(page, BaseException):
+                logger.warning(f"⚠️ Falha ao criar aba do pool ({page}). A vaga será recriada no acquire().")
+                page = None
+            self._available.put_nowait(page)
+
+    async def _new_warm_page(self) -> Any:
+        """Abre uma aba nova e carrega a URL de aquecimento (se configurada)."""
+        page = await self.context.new_page()
+        self._uses[page] = 0
+        await self._warm(page)
+        return page
+
+    async def _warm(self, page: Any) -> None:
+        """Carrega o shell do tenant. Falhas não são fatais (aba continua utilizável)."""
+        target = self.warmup_url or "about:blank"
+        try:
+            await page.goto(target, wait_until="domcontentloaded", timeout=30000)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao aquecer aba ({target}): {e}")
+
+    async def _is_healthy(self, page: Any) -> bool:
+        """Health check: aba aberta e renderer respondendo."""
+        if page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(page.evaluate("1"), timeout=5.0)
+            return True
+        except Exception:
+            return False
+
+    async def _replace(self, page: Optional[Any]) -> Optional[Any]:
+        """Fecha a aba (se houver) e cria outra. None se a criação falhar (contexto fechando, renderer morto)."""
+        if page is not None:
+            await self._close_page(page)
+        try:
+            return await self._new_warm_page()
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível recriar aba do pool: {e}")
+            return None
+
+    async def acquire(self) -> Any:
+        """
+        Retira uma aba saudável do pool (espera se todas estiverem em uso).
+
+        Se a vaga não tiver aba (recriação anterior falhou) e a criação falhar de
+        novo, a vaga volta ao pool e o erro sobe ao worker, em vez de travá-lo.
+        """
+        page = await self._available.get()
+        if page is not None and not await self._is_healthy(page):
+            logger.warning("♻️ Aba do pool não respondeu ao health check. Substituindo...")
+            await self._close_page(page)
+            page = None
+
+        if page is None:
+            try:
+                page = await self._new_warm_page()
+            except Exception:
+                self._available.put_nowait(None)
+                raise
+
+        self._uses[page] = self._uses.get(page, 0) + 1
+        return page
+
+    def release(self, page: Any) -> None:
+        """
+        Devolve a aba ao pool.
+
+        O reset (ou reciclagem) roda em background para não atrasar o worker.
+        """
+        if page is None:
+            return
+        task = asyncio.create_task(self._reset_and_return(page))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _reset_and_return(self, page: Any) -> None:
+        """Limpa o estado da aba e a devolve; recicla se atingiu o limite de usos."""
+        if self._closed:
+            await self._close_page(page)
+            return
+
+        try:
+            if self._uses.get(page, 0) >= self.max_uses or not await self._is_healthy(page):
+                logger.info(f"♻️ Reciclando aba após {self._uses.get(page, 0)} usos...")
+                page = await self._replace(page)
+            else:
+                # Reset: descarta o relatório anterior (estado JS, scroll, filtros) voltando ao shell
+                await self._warm(page)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao resetar aba do pool ({e}). Criando nova...")
+            page = await self._replace(page)
+
+        # Mesmo sem aba (None), a vaga volta: o pool nunca encolhe abaixo do semáforo do Batch
+        self._available.put_nowait(page)
+
+    async def _close_page(self, page: Any) -> None:
+        """Fecha a aba ignorando erros (renderer já pode ter morrido)."""
+        self._uses.pop(page, None)
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        """Fecha todas as abas do pool (aguarda resets pendentes)."""
+        self._closed = True
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        while not self._available.empty():
+            page = self._available.get_nowait()
+            if page is not None:
+                await self._close_page(page)
@@ -0,0 +1,271 @@
+"""
+Profiler por amostragem para execuções main/batch (--profile).
+
+Uma thread amostra as pilhas de todas as threads a cada PROFILE_INTERVAL_S
+(sys._current_frames, sem instrumentar o código) e um monitor mede o atraso
+(lag) do event loop. O resultado responde "para onde foi o tempo":
+
+- loop ocioso (esperando Chromium/rede) vs. loop ocupado com Python
+  (PIL, pHash, chamadas síncronas ao Gemini, time.sleep...);
+- tempo ocupado por task (Worker-N) e por função do projeto;
+- lag do event loop (p50/p95/máx): sintoma direto de código bloqueante.
+
+Saídas em runs/ ao final da execução:
+    profile_<timestamp>.folded  -> formato "collapsed" (flamegraph.pl, speedscope, inferno)
+    profile_<timestamp>.json    -> resumo (lag, ocupação, top funções, por task/thread)
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import PROFILE_INTERVAL_S, LOOP_LAG_INTERVAL_S
+from telemetry import percentile
+from utils import setup_logger
+
+logger = setup_logger("Profiler")
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_STACK_DEPTH = 128
+
+# Frames de topo que indicam thread parada esperando (não contam como trabalho)
+IDLE_FRAMES = {
+    ("selectors.py", "select"),        # Event loop esperando I/O (Chromium, rede, timers)
+    ("thread.py", "_worker"),          # ThreadPoolExecutor sem tarefa
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("socketserver.py", "serve_forever"),
+    ("selectors.py", "_select"),
+}
+
+
+def frame_label(code: Any) -> str:
+    """Rótulo de um frame: <módulo>:<Classe.função>."""
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def is_project_file(filename: str) -> bool:
+    return os.path.abspath(filename).startswith(PROJECT_DIR + os.sep)
+
+
+def walk_stack(frame: Any) -> List[Any]:
+    """Objetos de código do frame mais externo ao mais interno."""
+    codes = []
+    while frame is not None and len(codes) < MAX_STACK_DEPTH:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return codes
+
+
+def strip_loop_frames(codes: List[Any]) -> List[Any]:
+    """Remove a base da pilha do loop (asyncio.run -> _run_once -> Handle._run): começa na coroutine."""
+    for i in range(len(codes) - 1, -1, -1):
+        if codes[i].co_name == "_run" and os.path.basename(codes[i].co_filename) == "events.py":
+            return codes[i + 1:]
+    return codes
+
+
+def is_idle(codes: List[Any]) -> bool:
+    if not codes:
+        return True
+    top = codes[-1]
+    return (os.path.basename(top.co_filename), top.co_name) in IDLE_FRAMES
+
+
+def project_owner(codes: List[Any]) -> str:
+    """Função do projeto mais interna da pilha (a fase "dona" do tempo)."""
+    for code in reversed(codes):
+        if is_project_file(code.co_filename):
+            return frame_label(code)
+    return "<fora do projeto>"
+
+
+class LoopLagMonitor:
+    """
+    Mede o atraso do event loop: dorme `interval_s` e compara com o tempo real decorrido.
+
+    Attributes:
+        samples: Atrasos observados (segundos).
+        last_tick: time.monotonic() do último ciclo (o watchdog usa para detectar bloqueio).
+    """
+
+    def __init__(self, interval_s: float = LOOP_LAG_INTERVAL_S):
+        self.interval_s = interval_s
+        self.samples: List[float] = []
+        self.last_tick = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Inicia o monitor no loop corrente (chamar de dentro de uma coroutine)."""
+        self.last_tick = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag-monitor")
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            now = time.monotonic()
+            self.samples.append(max(0.0, now - expected))
+            self.last_tick = now
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def summary(self) -> Dict[str, Any]:
+        """Lag em ms (p50/p95/máx)."""
+        return {
+            "samples": len(self.samples),
+            "p50_ms": round(percentile(self.samples, 50) * 1000, 1),
+            "p95_ms": round(percentile(self.samples, 95) * 1000, 1),
+            "max_ms": round(max(self.samples, default=0.0) * 1000, 1)
+        }
+
+
+class SamplingProfiler:
+    """
+    Amostrador de pilhas com atribuição por task, função e thread.
+
+        profiler = SamplingProfiler()
+        profiler.start()          # dentro do event loop
+        ...
+        profiler.stop()
+        profiler.write(OUTPUT_DIR)
+
+    Attributes:
+        interval_s: Intervalo entre amostras.
+        lag: Monitor de atraso do event loop.
+    """
+
+    def __init__(self, interval_s: float = PROFILE_INTERVAL_S):
+        self.interval_s = interval_s
+        self.lag = LoopLagMonitor()
+        self.folded: Counter = Counter()
+        self.loop_busy = 0
+        self.loop_idle = 0
+        self.by_task: Counter = Counter()
+        self.by_function: Counter = Counter()
+        self.by_thread: Counter = Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._duration = 0.0
+
+    def start(self) -> None:
+        """Inicia a amostragem (chamar de dentro do event loop a ser observado)."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._started_at = time.monotonic()
+        self.lag.start()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="sampling-profiler")
+        self._thread.start()
+        logger.info(f"🔬 Profiler ativo (amostra a cada {self.interval_s * 1000:.0f} ms).")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.lag.stop()
+        self._duration = time.monotonic() - self._started_at
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            self._sample(own_id)
+
+    def _sample(self, own_id: int) -> None:
+        thread_names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            codes = walk_stack(frame)
+
+            if thread_id == self._loop_thread_id:
+                if is_idle(codes):
+                    self.loop_idle += 1
+                    self.folded["event-loop;(ocioso)"] += 1
+                    continue
+                task = asyncio.current_task(self._loop)
+                task_name = task.get_name() if task is not None else "(callback)"
+                stack = ";".join(frame_label(c) for c in strip_loop_frames(codes))
+                self.loop_busy += 1
+                self.by_task[task_name] += 1
+                self.by_function[project_owner(codes)] += 1
+                self.folded[f"event-loop;{task_name};{stack}"] += 1
+            elif not is_idle(codes):
+                stack = ";".join(frame_label(c) for c in codes)
+                thread_name = thread_names.get(thread_id, str(thread_id))
+                self.by_thread[thread_name] += 1
+                self.folded[f"thread:{thread_name};{stack}"] += 1
+
+    def summary(self, top: int = 20) -> Dict[str, Any]:
+        """Resumo em segundos estimados (amostras × intervalo)."""
+        loop_total = self.loop_busy + self.loop_idle
+
+        def seconds(count: int) -> float:
+            return round(count * self.interval_s, 2)
+
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "interval_ms": self.interval_s * 1000,
+            "duration_s": round(self._duration, 1),
+            "event_loop": {
+                "busy_s": seconds(self.loop_busy),
+                "idle_s": seconds(self.loop_idle),
+                "busy_pct": round(100 * self.loop_busy / loop_total, 1) if loop_total else 0.0,
+                "lag": self.lag.summary()
+            },
+            "by_task": {name: seconds(n) for name, n in self.by_task.most_common()},
+            "top_functions": [
+                {"function": name, "busy_s": seconds(n), "pct_of_busy": round(100 * n / self.loop_busy, 1)}
+                for name, n in self.by_function.most_common(top)
+            ],
+            "threads": {name: seconds(n) for name, n in self.by_thread.most_common()}
+        }
+
+    def write(self, output_dir: str) -> Tuple[Path, Path]:
+        """Grava profile_<ts>.folded (flame graph) e profile_<ts>.json (resumo)."""
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = Path(output_dir)
+        base.mkdir(parents=True, exist_ok=True)
+        folded_path = base / f"profile_{stamp}.folded"
+        summary_path = base / f"profile_{stamp}.json"
+        folded_path.write_text("".join(f"{stack} {count}\n" for stack, count in self.folded.items()), encoding="utf-8")
+        summary_path.write_text(json.dumps(self.summary(), indent=2, ensure_ascii=False), encoding="utf-8")
+        return folded_path, summary_path
+
+    def log_report(self, top: int = 10) -> None:
+        """Exibe ocupação do loop, lag e as funções que mais seguraram o loop."""
+        summary = self.summary(top)
+        loop = summary["event_loop"]
+        logger.info(
+            f"🔬 Event loop: {loop['busy_pct']}% ocupado ({loop['busy_s']}s Python, {loop['idle_s']}s esperando I/O). "
+            f"Lag p50 {loop['lag']['p50_ms']} ms, p95 {loop['lag']['p95_ms']} ms, máx {loop['lag']['max_ms']} ms"
+        )
+        for item in summary["top_functions"]:
+            logger.info(f"   {item['function']:<56} {item['busy_s']:>8.2f}s  ({item['pct_of_busy']}%)")
+        for name, busy in summary["threads"].items():
+            logger.info(f"   [thread {name}] {busy:.2f}s ocupada")
+
+
+def finish_profile(profiler: Optional[SamplingProfiler], output_dir: str) -> None:
+    """Encerra o profiler (se ativo), exibe o resumo e grava os arquivos."""
+    if profiler is None:
+        return
+    profiler.stop()
+    profiler.log_report()
+    folded_path, summary_path = profiler.write(output_dir)
+    logger.info(f"🔥 Flame graph: {folded_path} (ex: flamegraph.pl {folded_path} > profile.svg) | resumo: {summary_path}")
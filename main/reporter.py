@@ -1,23 +1,52 @@
 import os
+import sys
 import json
+import time
 import shutil
-import glob
+import hashlib
+import tempfile
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+from config import RUN_INDEX_WORKERS
+from run_index import get_run_index
+from search_index import SearchIndex
+
 # Config
 RUNS_DIR = "runs"
 TEMPLATE_PATH = os.path.join("templates", "viewer_template.html")
 REPORT_DIR = "bi_catalog_report"
 IMAGES_DIR = "images"
+MANIFEST_FILE = "manifest.json"
+DATA_DIR = "data"          # index.js + shards por dashboard
+SHARDS_DIR = "catalogs"
+OBJECTIVE_PREVIEW_CHARS = 300 # Texto do overlay no índice (o completo fica no shard)
+
+# Derivados web (miniatura para a grade + versão otimizada para o modal)
+DERIVED_DIR = "derived"       # images/derived/<sha256>_thumb.<ext>, <sha256>_web.<ext>
+DERIVED_FORMAT = "WEBP"       # "WEBP" ou "AVIF" (AVIF exige Pillow com suporte; senão cai para WEBP)
+THUMB_WIDTH = 480             # Largura da miniatura (cards têm ~300-400px)
+THUMB_MAX_HEIGHT = 360        # Prints empilhados (scroll) são cortados no topo para a miniatura
+WEB_MAX_WIDTH = 1920          # Versão do modal (mantém a resolução do viewport)
+WEB_MAX_HEIGHT = 16383        # Limite do WebP; prints empilhados muito longos são reduzidos para caber
+DERIVED_QUALITY = 80
+
+# ioctl FICLONE (Linux): reflink copy-on-write em Btrfs/XFS
+FICLONE = 0x40049409
 
-def setup_report_dir():
-    """Cria a estrutura de pastas do relatório, limpando se necessário (exceto imagens se quiser otimizar, mas vamos limpar para garantir consistência)."""
+def setup_report_dir(full_rebuild: bool = False):
+    """
+    Cria a estrutura de pastas do relatório.
+    
+    Por padrão o build é incremental (imagens inalteradas são mantidas).
+    full_rebuild=True apaga tudo antes (equivalente ao comportamento antigo).
+    """
     report_path = Path(REPORT_DIR)
     images_path = report_path / IMAGES_DIR
     
-    if report_path.exists():
-        # Limpa tudo para garantir consistência (remove imagens de runs deletados)
+    if full_rebuild and report_path.exists():
         shutil.rmtree(report_path)
     
     report_path.mkdir(parents=True, exist_ok=True)
@@ -27,24 +56,123 @@ def setup_report_dir():
         
     return report_path, images_path
 
-def collect_data(report_images_path: Path):
-    """Varre a pasta RUNS, coleta JSONs e copia imagens."""
+def load_manifest(report_path: Path) -> dict:
+    """Lê o manifesto do último build (pasta do run -> imagens com tamanho/mtime)."""
+    manifest_path = report_path / MANIFEST_FILE
+    if manifest_path.exists():
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"! Manifesto invalido ({e}). Reconstruindo imagens.")
+    return {"runs": {}}
+
+def save_manifest(report_path: Path, manifest: dict):
+    """Grava o manifesto de forma atômica (temporário exclusivo + rename)."""
+    manifest_path = report_path / MANIFEST_FILE
+    fd, tmp_name = tempfile.mkstemp(dir=report_path, prefix=f".{MANIFEST_FILE}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_name, manifest_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_name)
+        raise
+
+def _file_signature(path: str) -> list:
+    """Assinatura barata de mudança: [tamanho, mtime_ns]."""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+def link_or_copy(src: str, dest: Path) -> str:
+    """
+    Materializa src em dest do jeito mais barato suportado pelo filesystem.
+    
+    Ordem: hardlink -> reflink (FICLONE) -> cópia. Screenshots são imutáveis
+    depois de gravados, então compartilhar o inode com runs/ é seguro.
+    
+    Returns:
+        "link", "reflink" ou "copy".
+    """
+    if dest.exists() or dest.is_symlink():
+        dest.unlink()
+    
+    try:
+        os.link(src, dest)
+        return "link"
+    except OSError:
+        pass
+    
+    if sys.platform.startswith("linux"):
+        try:
+            import fcntl
+            with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, dest)
+            return "reflink"
+        except (OSError, ImportError):
+            if dest.exists():
+                dest.unlink()
+    
+    shutil.copy2(src, dest)
+    return "copy"
+
+def _sha256_file(path: str) -> str:
+    """Hash de conteúdo (chave do cache de derivados)."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _load_catalog(json_file: str):
+    """Lê um catalog_*.json (None em caso de erro)."""
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"! Erro ao ler {json_file}: {e}")
+        return None
+
+def collect_data(report_images_path: Path, manifest: dict = None, rescan: bool = False):
+    """
+    Lê os catálogos listados no índice de runs e materializa as imagens no relatório.
+    
+    Com rescan=True, o índice é reconstruído varrendo a pasta RUNS (runs antigos
+    ou copiados manualmente passam a aparecer).
+    
+    Com manifesto, só copia/linka imagens novas ou alteradas e remove as
+    que não são mais referenciadas (runs apagados). O manifesto é atualizado in-place.
+    """
     all_catalogs = []
+    if manifest is None:
+        manifest = {"runs": {}}
+    previous_runs = manifest.get("runs", {})
+    current_runs = {}
+    stats = {"unchanged": 0, "link": 0, "reflink": 0, "copy": 0, "removed": 0}
     
-    # Busca recursiva por arquivos de catálogo catalog_*.json
+    # Catálogos vêm do índice de runs (runs/run_index.json), sem varrer a árvore
     # Padrão: runs/<run_id_folder>/catalog_*.json
-    search_pattern = os.path.join(RUNS_DIR, "**", "catalog_*.json")
-    json_files = glob.glob(search_pattern, recursive=True)
+    index = get_run_index(rescan=rescan, runs_dir=RUNS_DIR)
+    json_files = [os.path.join(RUNS_DIR, folder, entry["catalog"]) for folder, entry in index["runs"].items()]
     
     print(f"> Encontrados {len(json_files)} arquivos de catalogo.")
     
-    for json_file in json_files:
+    # Parse dos JSONs em paralelo (I/O); a materialização das imagens segue em série
+    with ThreadPoolExecutor(max_workers=RUN_INDEX_WORKERS) as executor:
+        loaded = list(executor.map(_load_catalog, json_files))
+    
+    for json_file, data in zip(json_files, loaded):
+        if data is None:
+            continue
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
             run_id = data.get('run_id', 'unknown')
             run_folder = os.path.dirname(json_file)
+            # Chave = pasta do run (como no run_index): run_id tem resolução de 1s
+            # e workers do batch que terminam no mesmo segundo colidiriam
+            previous_images = previous_runs.get(run_folder, {}).get("images", {})
+            run_images = {}
             
             # Processar páginas e imagens
             pages = data.get('pages', [])
@@ -67,13 +195,23 @@ def collect_data(report_images_path: Path):
                             break
                     
                     if src_image_path:
-                        # Para evitar conflito de nomes (01_home.png pode existir em vários runs),
-                        # prefixamos com o run_id
-                        new_filename = f"{run_id}_{original_filename}"
-                        dest_image_path = report_images_path / new_filename
+                        # Imagens são endereçadas por conteúdo: images/<sha256>.png.
+                        # O mesmo print em vários runs (re-catalogação) vira um único arquivo.
+                        signature = _file_signature(src_image_path)
+                        previous = previous_images.get(original_filename)
+                        if isinstance(previous, dict) and previous.get("sig") == signature:
+                            sha256 = previous["sha256"]
+                        else:
+                            sha256 = page.get('sha256') or _sha256_file(src_image_path)
                         
-                        # Copia a imagem
-                        shutil.copy2(src_image_path, dest_image_path)
+                        new_filename = f"{sha256}.png"
+                        dest_image_path = report_images_path / new_filename
+                        if dest_image_path.exists():
+                            stats["unchanged"] += 1
+                        else:
+                            stats[link_or_copy(src_image_path, dest_image_path)] += 1
+                        run_images[original_filename] = {"sig": signature, "sha256": sha256}
+                        page['image_sha256'] = sha256
                         
                         # Atualiza o caminho no JSON para ser relativo ao HTML
                         # HTML está em bi_catalog_report/index.html
@@ -84,48 +222,272 @@ def collect_data(report_images_path: Path):
                         page['screenshot_rel_path'] = "" # Placeholder ou vazio
             
             all_catalogs.append(data)
+            current_runs[run_folder] = {
+                "catalog": json_file,
+                "catalog_mtime_ns": os.stat(json_file).st_mtime_ns,
+                "images": run_images
+            }
             
         except Exception as e:
             print(f"! Erro ao processar {json_file}: {e}")
+    
+    # Remove imagens que não são mais referenciadas (runs apagados ou páginas removidas)
+    referenced = {f"{img['sha256']}.png" for run in current_runs.values() for img in run["images"].values()}
+    for image_file in report_images_path.iterdir():
+        if image_file.is_file() and image_file.name not in referenced:
+            image_file.unlink()
+            stats["removed"] += 1
+    
+    manifest["runs"] = current_runs
+    print(f"> Imagens: {stats['unchanged']} inalteradas, {stats['link']} hardlinks, "
+          f"{stats['reflink']} reflinks, {stats['copy']} copias, {stats['removed']} removidas.")
             
     # Ordenar por data (mais recente primeiro)
     all_catalogs.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
     return all_catalogs
 
-def generate_report():
+def _resolve_derived_format() -> tuple:
+    """Formato dos derivados: AVIF só se o Pillow instalado souber gravar."""
+    from PIL import Image, features
+    if DERIVED_FORMAT.upper() == "AVIF":
+        Image.init()
+        if "AVIF" in Image.SAVE or features.check("avif"):
+            return "AVIF", "avif"
+        print("! Pillow sem suporte a AVIF. Usando WEBP.")
+    return "WEBP", "webp"
+
+def make_derivatives(src: str, thumb_dest: str, web_dest: str, fmt: str) -> bool:
+    """
+    Gera miniatura e versão web de uma imagem (roda em processo separado).
+    
+    Função de módulo (não método/lambda) para ser serializável pelo ProcessPoolExecutor.
+    A miniatura é gravada primeiro: se a versão web falhar, a grade continua leve.
+    """
+    from PIL import Image
+    
+    with Image.open(src) as img:
+        img = img.convert("RGB")
+        
+        # Miniatura: topo da página (prints empilhados podem ter vários viewports de altura)
+        thumb_height = min(img.height, img.width * THUMB_MAX_HEIGHT // THUMB_WIDTH)
+        thumb = img.crop((0, 0, img.width, thumb_height))
+        thumb.thumbnail((THUMB_WIDTH, THUMB_MAX_HEIGHT), Image.LANCZOS)
+        thumb.save(thumb_dest, format=fmt, quality=DERIVED_QUALITY)
+        
+        # Versão web: largura do viewport e altura dentro do limite do formato (mantém a proporção)
+        web = img.copy()
+        if web.width > WEB_MAX_WIDTH or web.height > WEB_MAX_HEIGHT:
+            web.thumbnail((WEB_MAX_WIDTH, WEB_MAX_HEIGHT), Image.LANCZOS)
+        web.save(web_dest, format=fmt, quality=DERIVED_QUALITY)
+    return True
+
+def generate_derivatives(catalog_data: list, report_images_path: Path) -> dict:
+    """
+    Gera derivados web para todas as páginas, em paralelo (ProcessPoolExecutor).
+    
+    Cache por hash de conteúdo: imagens idênticas (ou já processadas em builds
+    anteriores) não são reprocessadas. Derivados órfãos são removidos.
+    Define page['thumbnail_rel_path'] e page['web_rel_path'] (fallback por arquivo: PNG original).
+    """
+    derived_path = report_images_path / DERIVED_DIR
+    derived_path.mkdir(parents=True, exist_ok=True)
+    
+    try:
+        fmt, ext = _resolve_derived_format()
+    except ImportError:
+        print("! Pillow nao instalado. Relatorio usara os PNGs originais.")
+        return {"generated": 0, "cached": 0, "failed": 0}
+    
+    def names(sha):
+        return f"{sha}_thumb.{ext}", f"{sha}_web.{ext}"
+    
+    # Um job por conteúdo único
+    sources = {}
+    for catalog in catalog_data:
+        for page in catalog.get('pages', []):
+            sha = page.get('image_sha256')
+            if sha and sha not in sources:
+                sources[sha] = str(report_images_path / os.path.basename(page['screenshot_rel_path']))
+    
+    pending = {
+        sha: src for sha, src in sources.items()
+        if not all((derived_path / n).exists() for n in names(sha))
+    }
+    
+    failed = set()
+    if pending:
+        print(f"> Gerando derivados ({fmt}) para {len(pending)} imagens em {os.cpu_count()} processos...")
+        with ProcessPoolExecutor() as pool:
+            futures = {
+                sha: pool.submit(make_derivatives, src, *(str(derived_path / n) for n in names(sha)), fmt)
+                for sha, src in pending.items()
+            }
+            for sha, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"! Falha ao gerar derivados de {os.path.basename(pending[sha])}: {e}")
+                    failed.add(sha)
+    
+    # Cada derivado vale por si: uma falha na versão web não descarta a miniatura já gravada
+    def rel_path(name, original):
+        return f"{IMAGES_DIR}/{DERIVED_DIR}/{name}" if (derived_path / name).exists() else original
+    
+    for catalog in catalog_data:
+        for page in catalog.get('pages', []):
+            sha = page.get('image_sha256')
+            original = page.get('screenshot_rel_path', '')
+            if sha:
+                thumb_name, web_name = names(sha)
+                page['thumbnail_rel_path'] = rel_path(thumb_name, original)
+                page['web_rel_path'] = rel_path(web_name, original)
+            else:
+                page['thumbnail_rel_path'] = original
+                page['web_rel_path'] = original
+    
+    # Remove derivados sem referência (runs apagados)
+    valid = {n for sha in sources for n in names(sha)}
+    for derived_file in derived_path.iterdir():
+        if derived_file.name not in valid:
+            derived_file.unlink()
+    
+    stats = {"generated": len(pending) - len(failed), "cached": len(sources) - len(pending), "failed": len(failed)}
+    print(f"> Derivados: {stats['generated']} gerados, {stats['cached']} em cache, {stats['failed']} falhas.")
+    return stats
+
+def measure_page_weight(catalog_data: list, report_path: Path) -> dict:
+    """Peso da grade: bytes que o navegador baixa para exibir os cards (miniatura vs PNG original)."""
+    def size(rel_path):
+        path = report_path / rel_path if rel_path else None
+        return path.stat().st_size if path and path.exists() else 0
+    
+    first_pages = [c['pages'][0] for c in catalog_data if c.get('pages')]
+    weight = {
+        "grid_thumbnails_bytes": sum(size(p.get('thumbnail_rel_path')) for p in first_pages),
+        "grid_original_bytes": sum(size(p.get('screenshot_rel_path')) for p in first_pages)
+    }
+    print(f"> Peso da grade: {weight['grid_thumbnails_bytes'] / 1e6:.2f} MB com miniaturas "
+          f"(vs {weight['grid_original_bytes'] / 1e6:.2f} MB com PNGs originais).")
+    return weight
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Grava só se o conteúdo mudou (preserva mtime/cache do navegador)."""
+    if path.exists() and path.read_text(encoding='utf-8') == content:
+        return False
+    path.write_text(content, encoding='utf-8')
+    return True
+
+def sanitize_shard_id(value: str) -> str:
+    """Restringe o id do shard a caracteres seguros para nome de arquivo/URL."""
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in value)
+    return safe or "unknown"
+
+def build_index_entry(catalog: dict, shard_id: str) -> dict:
+    """Resumo leve de um dashboard para a grade (o detalhe fica no shard)."""
+    pages = catalog.get('pages', [])
+    first_page = pages[0] if pages else {}
+    analysis = first_page.get('analysis', {}) or {}
+    objective = analysis.get('objetivo_macro') or ""
+    llm_metrics = (catalog.get('metrics') or {}).get('llm') or {}
+    if len(objective) > OBJECTIVE_PREVIEW_CHARS:
+        objective = objective[:OBJECTIVE_PREVIEW_CHARS].rstrip() + "…"
+    
+    return {
+        "id": shard_id,
+        "url": catalog.get('url', ''),
+        "timestamp": catalog.get('timestamp', ''),
+        "title": analysis.get('titulo_painel') or catalog.get('url', ''),
+        "domain": analysis.get('dominio_negocio') or 'N/A',
+        "objective": objective,
+        "thumbnail": first_page.get('thumbnail_rel_path') or first_page.get('screenshot_rel_path', ''),
+        "page_count": len(pages),
+        "llm_cost_usd": llm_metrics.get('cost_usd'),
+        "llm_tokens": llm_metrics.get('total_tokens')
+    }
+
+def write_data_shards(report_path: Path, catalog_data: list) -> list:
+    """
+    Emite o índice (data/index.js) e um shard por dashboard (data/catalogs/<id>.js).
+    
+    Os arquivos são scripts JS (não JSON) porque o relatório é aberto via file://,
+    onde fetch() é bloqueado pelo navegador; <script> dinâmico funciona.
+    Shards inalterados não são regravados e shards órfãos são removidos.
+    """
+    data_path = report_path / DATA_DIR
+    shards_path = data_path / SHARDS_DIR
+    shards_path.mkdir(parents=True, exist_ok=True)
+    
+    index = []
+    written = set()
+    changed = 0
+    for catalog in catalog_data:
+        shard_id = sanitize_shard_id(str(catalog.get('run_id', 'unknown')))
+        # run_id é por segundo: desambigua finalizações simultâneas
+        base_id, n = shard_id, 1
+        while shard_id in written:
+            n += 1
+            shard_id = f"{base_id}_{n}"
+        written.add(shard_id)
+        
+        shard_js = f"window.__onCatalogShard({json.dumps(shard_id)}, {json.dumps(catalog, ensure_ascii=False)});\n"
+        changed += _write_if_changed(shards_path / f"{shard_id}.js", shard_js)
+        index.append(build_index_entry(catalog, shard_id))
+    
+    for shard_file in shards_path.glob("*.js"):
+        if shard_file.stem not in written:
+            shard_file.unlink()
+    
+    # Custo de LLM acumulado (só catálogos gerados com contabilidade de tokens)
+    with_usage = [e for e in index if e.get('llm_cost_usd') is not None]
+    if with_usage:
+        print(f"> LLM: ${sum(e['llm_cost_usd'] for e in with_usage):.2f} em "
+              f"{sum(e['llm_tokens'] or 0 for e in with_usage)} tokens ({len(with_usage)} dashboards com métricas).")
+    
+    index_js = f"window.CATALOG_INDEX = {json.dumps(index, ensure_ascii=False)};\n"
+    _write_if_changed(data_path / "index.js", index_js)
+    print(f"> Shards: {len(index)} dashboards ({changed} atualizados).")
+    return index
+
+def generate_report(full_rebuild: bool = False, rescan: bool = False):
     print(">>> Iniciando geracao do relatorio estatico...")
+    started_at = time.perf_counter()
     
     # 1. Setup pastas
-    report_path, images_path = setup_report_dir()
+    report_path, images_path = setup_report_dir(full_rebuild)
     
-    # 2. Coletar dados e copiar assets
-    catalog_data = collect_data(images_path)
+    # 2. Coletar dados e materializar assets (incremental via manifesto)
+    manifest = load_manifest(report_path)
+    catalog_data = collect_data(images_path, manifest, rescan=rescan or full_rebuild)
+    save_manifest(report_path, manifest)
     
     if not catalog_data:
         print("!!! Nenhum dado encontrado. Verifique se ha execucoes na pasta runs.")
         return
+    
+    # 2.1 Miniaturas e versões web (processo paralelo, cache por hash)
+    generate_derivatives(catalog_data, images_path)
+    measure_page_weight(catalog_data, report_path)
 
-    # 3. Ler template e injetar dados
+    # 3. Índice leve + shards por dashboard (carregados sob demanda pelo viewer)
+    index = write_data_shards(report_path, catalog_data)
+
+    # 3.1 Índice de busca full-text (BM25) em shards por prefixo
+    search_index = SearchIndex.build(
+        catalog_data,
+        docs=[{"id": e["id"], "title": e["title"], "url": e["url"]} for e in index]
+    )
+    n_search_shards = search_index.save(report_path / DATA_DIR)
+    print(f"> Busca: {len(search_index.postings)} termos em {n_search_shards} shards.")
+
+    # 4. Copiar template (o HTML não embute mais os dados: tamanho constante)
     try:
         with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
             template_content = f.read()
-            
-        # Serializa dados para JS
-        json_str = json.dumps(catalog_data, ensure_ascii=False)
-        
-        # Injeção simples de string (pode melhorar com jinja2 se necessário, mas str.replace resolve)
-        # O template deve ter: window.CATALOG_DATA = [];
-        final_html = template_content.replace(
-            "window.CATALOG_DATA = [];", 
-            f"window.CATALOG_DATA = {json_str};"
-        )
         
-        # 4. Salvar index.html
         output_file = report_path / "index.html"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(final_html)
+        _write_if_changed(output_file, template_content)
             
-        print(f">>> Relatorio gerado com sucesso!")
+        print(f">>> Relatorio gerado com sucesso em {time.perf_counter() - started_at:.1f}s!")
         print(f">>> Local: {output_file.absolute()}")
         return str(output_file.absolute())
 
@@ -133,4 +495,4 @@ def generate_report():
         print(f"!!! Erro: Template nao encontrado em {TEMPLATE_PATH}")
 
 if __name__ == "__main__":
-    generate_report()
+    generate_report(full_rebuild="--full" in sys.argv, rescan="--rescan" in sys.argv)
@@ -0,0 +1,170 @@
+"""
+Índice persistente das execuções finalizadas (runs/run_index.json).
+
+Mapeia cada pasta de run para URL, título, timestamp, arquivo de catálogo e
+imagens. O Cataloger registra o run ao finalizar o dashboard, então o
+Smart Update e o Reporter não precisam abrir todos os catalog_*.json da
+pasta runs/ a cada chamada.
+
+A varredura completa (rebuild_run_index) só acontece sob demanda ou quando
+o índice ainda não existe, e lê os catálogos em paralelo (thread pool).
+"""
+
+import os
+import json
+import tempfile
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import OUTPUT_DIR, RUN_INDEX_FILE, RUN_INDEX_WORKERS
+from utils import setup_logger
+
+logger = setup_logger("RunIndex")
+
+RUN_INDEX_VERSION = 1
+
+# Serializa leitura-modificação-escrita do índice dentro do processo
+# (reentrante: register_run reconstrói o índice sem soltar o lock)
+_index_lock = threading.RLock()
+
+
+def _empty_index() -> Dict[str, Any]:
+    return {"version": RUN_INDEX_VERSION, "runs": {}}
+
+
+def build_run_entry(catalog_path: Path, catalog: Dict[str, Any]) -> Dict[str, Any]:
+    """Resumo de um run a partir do seu catálogo."""
+    pages = catalog.get("pages", [])
+    first_analysis = (pages[0].get("analysis") or {}) if pages else {}
+    return {
+        "run_id": catalog.get("run_id", ""),
+        "url": (catalog.get("url") or "").strip(),
+        "title": first_analysis.get("titulo_painel", ""),
+        "timestamp": catalog.get("timestamp", ""),
+        "catalog": catalog_path.name,
+        "catalog_mtime_ns": os.stat(catalog_path).st_mtime_ns,
+        "images": [p["filename"] for p in pages if p.get("filename")]
+    }
+
+
+def load_run_index(path: str = RUN_INDEX_FILE) -> Optional[Dict[str, Any]]:
+    """Lê o índice. Retorna None se não existir ou estiver corrompido/desatualizado."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"⚠️ Índice de runs ilegível ({e}). Será reconstruído.")
+        return None
+
+    if index.get("version") != RUN_INDEX_VERSION or not isinstance(index.get("runs"), dict):
+        return None
+    return index
+
+
+def save_run_index(index: Dict[str, Any], path: str = RUN_INDEX_FILE) -> None:
+    """Grava o índice de forma atômica (temporário exclusivo na mesma pasta + rename)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Nome único: processos diferentes (batch) não disputam o mesmo .tmp
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_name)
+        raise
+
+
+def _scan_catalog(catalog_path: Path) -> Optional[Tuple[str, Dict[str, Any]]]:
+    try:
+        with open(catalog_path, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+        return catalog_path.parent.name, build_run_entry(catalog_path, catalog)
+    except Exception as e:
+        logger.warning(f"⚠️ Catálogo ignorado na varredura ({catalog_path}): {e}")
+        return None
+
+
+def rebuild_run_index(runs_dir: str = OUTPUT_DIR, workers: int = RUN_INDEX_WORKERS) -> Dict[str, Any]:
+    """
+    Varredura completa de runs/: lê todos os catalog_*.json em paralelo e regrava o índice.
+
+    Só as pastas de primeiro nível são consideradas (runs/<pasta>/catalog_*.json);
+    pastas WIP ainda não têm catálogo.
+    """
+    catalog_paths = sorted(Path(runs_dir).glob("*/catalog_*.json")) if Path(runs_dir).exists() else []
+    logger.info(f"🔎 Reconstruindo índice de runs: {len(catalog_paths)} catálogos ({workers} threads)...")
+
+    index = _empty_index()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(_scan_catalog, catalog_paths):
+            if result:
+                folder, entry = result
+                index["runs"][folder] = entry
+
+    with _index_lock:
+        save_run_index(index)
+    return index
+
+
+def get_run_index(rescan: bool = False, runs_dir: str = OUTPUT_DIR) -> Dict[str, Any]:
+    """
+    Retorna o índice pronto para uso.
+
+    Reconstrói se pedido (rescan) ou se o índice não existir. Caso contrário,
+    apenas descarta entradas cujo catálogo sumiu (um stat por run, sem parse).
+    """
+    index = None if rescan else load_run_index()
+    if index is None:
+        return rebuild_run_index(runs_dir)
+
+    missing = [
+        folder for folder, entry in index["runs"].items()
+        if not (Path(runs_dir) / folder / entry.get("catalog", "")).exists()
+    ]
+    if missing:
+        unregister_runs(missing)
+        for folder in missing:
+            index["runs"].pop(folder, None)
+    return index
+
+
+def register_run(catalog_path: Path, catalog: Dict[str, Any]) -> None:
+    """Registra (ou atualiza) um run finalizado no índice."""
+    catalog_path = Path(catalog_path)
+    entry = build_run_entry(catalog_path, catalog)
+    # Verificação e reconstrução sob o mesmo lock: finalizadores concorrentes não
+    # disparam varreduras duplicadas nem sobrescrevem o run que outro acabou de registrar
+    with _index_lock:
+        index = load_run_index()
+        if index is None:
+            # Primeiro uso: indexa também os runs anteriores (o atual já está em disco)
+            rebuild_run_index(str(catalog_path.parent.parent))
+            return
+        index["runs"][catalog_path.parent.name] = entry
+        save_run_index(index)
+
+
+def unregister_runs(folders: List[str]) -> None:
+    """Remove pastas do índice (ex: apagadas pelo Smart Update)."""
+    with _index_lock:
+        index = load_run_index()
+        if index is None:
+            return
+        for folder in folders:
+            index["runs"].pop(folder, None)
+        save_run_index(index)
+
+
+def runs_for_url(url: str, index: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Pastas de run associadas a uma URL."""
+    index = index or get_run_index()
+    url = url.strip()
+    return [folder for folder, entry in index["runs"].items() if entry.get("url") == url]
@@ -0,0 +1,294 @@
+"""
+Índice de busca full-text do catálogo (BM25), pré-calculado na geração do relatório.
+
+- Tokenização em português: minúsculas, remoção de acentos, stopwords e
+  um stemmer leve de plurais ("regiões" -> "regiao", "indicadores" -> "indicador").
+- Pesos BM25 por campo (título pesa mais que elementos visuais, etc.).
+- Saída em shards pequenos (por prefixo de 2 letras) que o viewer carrega sob
+  demanda, sem precisar do catálogo completo.
+
+Uso em scripts:
+    from search_index import SearchIndex
+    idx = SearchIndex.load("bi_catalog_report/data")
+    idx.search("receita por região")
+
+Ou via terminal:
+    python search_index.py "receita por região"
+"""
+
+import re
+import sys
+import json
+import math
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+SEARCH_DIR = "search"
+PREFIX_LEN = 2
+
+# BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Peso de cada campo da análise no "documento" do dashboard
+FIELD_WEIGHTS = {
+    "titulo_painel": 3.0,
+    "label": 1.5,
+    "perguntas_respondidas": 2.0,
+    "principais_indicadores": 2.0,
+    "dominio_negocio": 1.5,
+    "objetivo_macro": 1.5,
+    "filtros_visiveis": 1.0,
+    "publico_sugerido": 0.5,
+    "elementos_visuais": 0.5,
+}
+
+STOPWORDS = sorted({
+    "de", "da", "do", "das", "dos", "em", "no", "na", "nos", "nas", "um", "uma", "uns", "umas",
+    "por", "para", "pelo", "pela", "pelos", "pelas", "com", "sem", "ao", "aos", "as", "os",
+    "que", "qual", "quais", "se", "ou", "mais", "menos", "entre", "sobre", "como", "sao", "ser",
+    "esta", "este", "isso", "essa", "esse", "cada", "seu", "sua", "seus", "suas", "ja",
+    "the", "of", "and", "or", "to", "in", "on", "by", "for", "is", "are",
+})
+
+# Stemmer leve de plurais: (sufixo, substituição, tamanho mínimo da palavra). Primeira regra que casar vence.
+STEM_RULES = [
+    ["oes", "ao", 5],   # regioes -> regiao
+    ["aes", "ao", 5],   # paes -> pao
+    ["ais", "al", 5],   # canais -> canal
+    ["eis", "el", 5],   # niveis -> nivel
+    ["ns", "m", 4],     # itens -> item
+    ["res", "r", 5],    # valores -> valor
+    ["zes", "z", 5],    # vezes -> vez
+    ["ses", "s", 5],    # meses -> mes
+    ["s", "", 4],       # vendas -> venda
+]
+# Aplicadas depois das de plural, repetidamente até nenhuma casar: sem "e"/"s" finais,
+# singular e plural coincidem em "-se" (analise/analises -> anali, base/bases -> bas)
+# e em "-ês"/"-ís" (pais/paises -> pai, ingles/ingleses -> ingl)
+STEM_FINAL_RULES = [
+    ["e", "", 4],
+    ["s", "", 4],
+]
+
+_STOPWORDS_SET = set(STOPWORDS)
+_SPLIT_RE = re.compile(r"[^a-z0-9]+")
+
+
+def fold_text(text: str) -> str:
+    """Minúsculas e sem acentos ("Região" -> "regiao")."""
+    decomposed = unicodedata.normalize("NFD", str(text).lower())
+    return "".join(c for c in decomposed if unicodedata.category(c) != "Mn")
+
+
+def _apply_rules(word: str, rules: List[List[Any]]) -> str:
+    for suffix, replacement, min_len in rules:
+        if len(word) >= min_len and word.endswith(suffix):
+            return word[: -len(suffix)] + replacement
+    return word
+
+
+def stem(word: str) -> str:
+    """
+    Aplica a primeira regra de plural que casar e, em seguida, as regras finais até estabilizar.
+
+    >>> [stem(w) for w in ("pais", "paises", "analise", "analises", "cliente", "clientes")]
+    ['pai', 'pai', 'anali', 'anali', 'client', 'client']
+    """
+    word = _apply_rules(word, STEM_RULES)
+    while True:
+        stemmed = _apply_rules(word, STEM_FINAL_RULES)
+        if stemmed == word:
+            return word
+        word = stemmed
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokeniza texto livre (mesmo algoritmo do viewer, ver templates/viewer_template.html)."""
+    return [
+        stem(w) for w in _SPLIT_RE.split(fold_text(text))
+        if len(w) > 1 and w not in _STOPWORDS_SET
+    ]
+
+
+def _field_texts(catalog: Dict[str, Any]):
+    """Gera (campo, texto) para todas as páginas analisadas de um catálogo."""
+    for page in catalog.get("pages", []):
+        yield "label", page.get("label", "")
+        analysis = page.get("analysis") or {}
+        for field in FIELD_WEIGHTS:
+            value = analysis.get(field)
+            if isinstance(value, list):
+                yield field, " ".join(str(v) for v in value)
+            elif value:
+                yield field, str(value)
+
+
+def _write_if_changed(path: Path, content: str) -> None:
+    """Grava só se o conteúdo mudou (preserva mtime/cache do navegador)."""
+    if not path.exists() or path.read_text(encoding="utf-8") != content:
+        path.write_text(content, encoding="utf-8")
+
+
+def _read_js_payload(path: Path, prefix: str) -> Any:
+    """Lê um arquivo de dados JS gerado pelo reporter ("<prefix>(args...);" ou "<prefix> = value;")."""
+    content = path.read_text(encoding="utf-8").strip()
+    body = content[len(prefix):].rstrip(";")
+    if body.startswith("(") and body.endswith(")"):
+        return json.loads("[" + body[1:-1] + "]")[-1]
+    return json.loads(body.lstrip(" ="))
+
+
+class SearchIndex:
+    """
+    Índice invertido com pesos BM25 pré-calculados.
+
+    Attributes:
+        docs: Lista de metadados dos dashboards (id, title, url), na ordem do CATALOG_INDEX.
+        postings: termo -> lista de [doc_idx, peso].
+    """
+
+    def __init__(self, docs: List[Dict[str, Any]], postings: Dict[str, List[List[float]]]):
+        self.docs = docs
+        self.postings = postings
+
+    @classmethod
+    def build(cls, catalogs: List[Dict[str, Any]], docs: Optional[List[Dict[str, Any]]] = None) -> "SearchIndex":
+        """
+        Constrói o índice a partir dos catálogos (formato catalog_*.json).
+
+        Args:
+            catalogs: Catálogos na mesma ordem do índice do viewer.
+            docs: Metadados por catálogo (padrão: id/título/url extraídos do catálogo).
+        """
+        term_freqs = []
+        doc_lengths = []
+        for catalog in catalogs:
+            tf = defaultdict(float)
+            length = 0.0
+            for field, text in _field_texts(catalog):
+                weight = FIELD_WEIGHTS.get(field, 1.0)
+                for token in tokenize(text):
+                    tf[token] += weight
+                    length += weight
+            term_freqs.append(tf)
+            doc_lengths.append(length)
+
+        n_docs = len(catalogs)
+        avg_len = (sum(doc_lengths) / n_docs) if n_docs else 0.0
+
+        doc_freq = defaultdict(int)
+        for tf in term_freqs:
+            for term in tf:
+                doc_freq[term] += 1
+
+        postings = defaultdict(list)
+        for doc_idx, tf in enumerate(term_freqs):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * (doc_lengths[doc_idx] / avg_len if avg_len else 1))
+            for term, freq in tf.items():
+                idf = math.log(1 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                score = idf * freq * (BM25_K1 + 1) / (freq + norm)
+                postings[term].append([doc_idx, round(score, 3)])
+
+        if docs is None:
+            docs = []
+            for catalog in catalogs:
+                first = (catalog.get("pages") or [{}])[0]
+                docs.append({
+                    "id": str(catalog.get("run_id", "")),
+                    "title": (first.get("analysis") or {}).get("titulo_painel") or catalog.get("url", ""),
+                    "url": catalog.get("url", "")
+                })
+
+        return cls(docs, dict(postings))
+
+    def search(self, query: str, top_k: int = 10, prefix_last: bool = False) -> List[Dict[str, Any]]:
+        """
+        Busca os dashboards mais relevantes.
+
+        Args:
+            query: Texto livre ("receita por região").
+            top_k: Máximo de resultados.
+            prefix_last: Trata o último termo como prefixo (busca enquanto digita).
+
+        Returns:
+            Lista de docs com o campo "score", em ordem decrescente.
+        """
+        tokens = tokenize(query)
+        scores = defaultdict(float)
+        for i, token in enumerate(tokens):
+            if prefix_last and i == len(tokens) - 1:
+                terms = [t for t in self.postings if t.startswith(token)]
+            else:
+                terms = [token] if token in self.postings else []
+            for term in terms:
+                for doc_idx, weight in self.postings[term]:
+                    scores[doc_idx] += weight
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+        return [dict(self.docs[doc_idx], score=round(score, 3)) for doc_idx, score in ranked]
+
+    def save(self, data_path: Path) -> int:
+        """
+        Grava o índice em shards JS por prefixo (data/search/<prefixo>.js) + meta.js.
+
+        Returns:
+            Quantidade de shards gravados.
+        """
+        search_path = Path(data_path) / SEARCH_DIR
+        search_path.mkdir(parents=True, exist_ok=True)
+
+        shards = defaultdict(dict)
+        for term, plist in self.postings.items():
+            shards[term[:PREFIX_LEN]][term] = plist
+
+        meta = {
+            "prefix_len": PREFIX_LEN,
+            "stopwords": STOPWORDS,
+            "stem_rules": STEM_RULES,
+            "stem_final_rules": STEM_FINAL_RULES,
+            "docs": self.docs,
+            "shards": sorted(shards)
+        }
+        _write_if_changed(
+            search_path / "meta.js",
+            f"window.__onSearchShard(\"__meta__\", {json.dumps(meta, ensure_ascii=False)});\n"
+        )
+
+        written = set()
+        for prefix, terms in shards.items():
+            shard_file = search_path / f"{prefix}.js"
+            _write_if_changed(
+                shard_file,
+                f"window.__onSearchShard({json.dumps(prefix)}, {json.dumps(terms, separators=(',', ':'))});\n"
+            )
+            written.add(shard_file.name)
+
+        # Remove shards de prefixos que sumiram
+        for shard_file in search_path.glob("*.js"):
+            if shard_file.name != "meta.js" and shard_file.name not in written:
+                shard_file.unlink()
+
+        return len(shards)
+
+    @classmethod
+    def load(cls, data_path: Path) -> "SearchIndex":
+        """Carrega o índice gravado pelo reporter (bi_catalog_report/data)."""
+        search_path = Path(data_path) / SEARCH_DIR
+        meta = _read_js_payload(search_path / "meta.js", "window.__onSearchShard")
+        postings = {}
+        for prefix in meta["shards"]:
+            postings.update(_read_js_payload(search_path / f"{prefix}.js", "window.__onSearchShard"))
+        return cls(meta["docs"], postings)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print('Uso: python search_index.py "texto da busca"')
+        sys.exit(1)
+
+    index = SearchIndex.load(Path("bi_catalog_report") / "data")
+    for result in index.search(" ".join(sys.argv[1:]), prefix_last=True):
+        print(f"{result['score']:>7.3f}  {result['title']}  ({result['url']})")
@@ -0,0 +1,257 @@
+"""
+Instrumentação por fase (spans) e exportação de métricas de execução.
+
+Cada fase relevante (navegação, estabilidade visual, captura, tentativas de
+clique, chamadas ao Gemini) gera um span com duração, atributos (bytes,
+tentativas...) e resultado. Os spans vão para:
+
+- spans.jsonl na pasta do run (ao lado do catálogo), um por dashboard;
+- o agregado do processo (p50/p95 por fase), exibido ao fim do Batch e
+  gravado em runs/batch_metrics_<timestamp>.json;
+- opcionalmente um endpoint HTTP no formato texto do Prometheus (METRICS_PORT).
+
+O dashboard atual é associado aos spans via ContextVar, então workers
+paralelos do Batch não se misturam.
+"""
+
+import json
+import math
+import time
+import asyncio
+import functools
+import threading
+import contextvars
+from collections import defaultdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import METRICS_HOST
+from utils import setup_logger, jsonl_append_prefix
+
+logger = setup_logger("Telemetry")
+
+SPANS_FILENAME = "spans.jsonl"
+
+# Gravador do dashboard em andamento (isolado por task/worker)
+_current_recorder: contextvars.ContextVar = contextvars.ContextVar("span_recorder", default=None)
+
+# Agregado do processo: fase -> durações (s) e contagem de erros
+_process_durations: Dict[str, List[float]] = defaultdict(list)
+_process_errors: Dict[str, int] = defaultdict(int)
+_process_lock = threading.Lock()
+
+
+class SpanRecorder:
+    """Spans de um dashboard (URL), gravados em spans.jsonl ao final."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.spans: List[Dict[str, Any]] = []
+
+    def flush(self, run_dir: Path) -> None:
+        """Acrescenta os spans em <run_dir>/spans.jsonl (retomadas acumulam no mesmo arquivo)."""
+        if not self.spans:
+            return
+        path = Path(run_dir) / SPANS_FILENAME
+        prefix = jsonl_append_prefix(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(prefix + "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in self.spans))
+        self.spans = []
+
+
+def start_recording(url: str) -> SpanRecorder:
+    """Associa um novo gravador ao contexto atual (chamar no início de cada dashboard)."""
+    recorder = SpanRecorder(url)
+    _current_recorder.set(recorder)
+    return recorder
+
+
+def current_dashboard_url() -> Optional[str]:
+    """URL do dashboard em andamento neste contexto (None fora de process_dashboard)."""
+    recorder = _current_recorder.get()
+    return recorder.url if recorder is not None else None
+
+
+def record_span(name: str, duration_s: float, outcome: str = "ok", **attrs: Any) -> None:
+    """Registra um span já medido (no gravador do dashboard e no agregado do processo)."""
+    with _process_lock:
+        _process_durations[name].append(duration_s)
+        if outcome == "error":
+            _process_errors[name] += 1
+
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.spans.append({
+            "name": name,
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "duration_ms": round(duration_s * 1000, 1),
+            "outcome": outcome,
+            "url": recorder.url,
+            **attrs
+        })
+
+
+class span:
+    """
+    Context manager de span.
+
+        with span("navigate", url=url) as s:
+            ...
+            s.set(bytes=len(data), outcome="timeout")
+
+    Exceções marcam outcome="error" (com o tipo) e são propagadas.
+    """
+
+    def __init__(self, name: str, **attrs: Any):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        outcome = self.attrs.pop("outcome", "ok")
+        if exc_type is not None:
+            outcome = "error"
+            self.attrs["error"] = exc_type.__name__
+        record_span(self.name, time.perf_counter() - self._start, outcome, **self.attrs)
+        return False
+
+
+def traced(
+    name: str,
+    result_attrs: Optional[Callable[[Any], Dict[str, Any]]] = None,
+    args_attrs: Optional[Callable[..., Dict[str, Any]]] = None
+):
+    """
+    Decorator que envolve a função (sync ou async) num span.
+
+    Args:
+        name: Nome da fase.
+        result_attrs: Extrai atributos do retorno (ex: bytes da captura, sucesso da navegação).
+        args_attrs: Extrai atributos dos argumentos (recebe os mesmos args da função).
+    """
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **(args_attrs(*args, **kwargs) if args_attrs else {})) as s:
+                    result = await fn(*args, **kwargs)
+                    if result_attrs:
+                        s.set(**result_attrs(result))
+                    return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def sync_wrapper(*args, **kwargs):
+            with span(name, **(args_attrs(*args, **kwargs) if args_attrs else {})) as s:
+                result = fn(*args, **kwargs)
+                if result_attrs:
+                    s.set(**result_attrs(result))
+                return result
+        return sync_wrapper
+    return decorator
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil por nearest-rank (q entre 0 e 100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def process_summary() -> Dict[str, Dict[str, Any]]:
+    """Agregado por fase de tudo que rodou neste processo (p50/p95/total em segundos)."""
+    with _process_lock:
+        durations = {k: list(v) for k, v in _process_durations.items()}
+        errors = dict(_process_errors)
+
+    return {
+        name: {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50_s": round(percentile(values, 50), 3),
+            "p95_s": round(percentile(values, 95), 3),
+            "total_s": round(sum(values), 3)
+        }
+        for name, values in sorted(durations.items())
+    }
+
+
+def log_summary(summary: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+    """Exibe a tabela de fases, ordenada pelo tempo total (onde as horas vão)."""
+    summary = summary if summary is not None else process_summary()
+    if not summary:
+        return
+    logger.info("⏱️ Tempo por fase (p50 / p95 / total):")
+    for name, s in sorted(summary.items(), key=lambda kv: kv[1]["total_s"], reverse=True):
+        errors = f", {s['errors']} erros" if s["errors"] else ""
+        logger.info(f"   {name:<32} {s['p50_s']:>8.2f}s {s['p95_s']:>8.2f}s {s['total_s']:>9.1f}s  ({s['count']}x{errors})")
+
+
+def write_summary(output_dir: str, extra: Optional[Dict[str, Any]] = None) -> Optional[Path]:
+    """
+    Grava o agregado em <output_dir>/batch_metrics_<timestamp>.json.
+
+    Args:
+        extra: Seções adicionais do arquivo (ex: {"llm": resumo de tokens/custo}).
+    """
+    summary = process_summary()
+    if not summary:
+        return None
+    path = Path(output_dir) / f"batch_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"generated_at": datetime.now().isoformat(), "phases": summary, **(extra or {})}
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return path
+
+
+def render_prometheus() -> str:
+    """Agregado no formato texto do Prometheus (summary por fase)."""
+    lines = [
+        "# HELP bi_phase_duration_seconds Duração das fases do cataloger.",
+        "# TYPE bi_phase_duration_seconds summary"
+    ]
+    for name, s in process_summary().items():
+        label = f'phase="{name}"'
+        lines.append(f'bi_phase_duration_seconds{{{label},quantile="0.5"}} {s["p50_s"]}')
+        lines.append(f'bi_phase_duration_seconds{{{label},quantile="0.95"}} {s["p95_s"]}')
+        lines.append(f"bi_phase_duration_seconds_sum{{{label}}} {s['total_s']}")
+        lines.append(f"bi_phase_duration_seconds_count{{{label}}} {s['count']}")
+    lines.append("# HELP bi_phase_errors_total Spans encerrados com erro.")
+    lines.append("# TYPE bi_phase_errors_total counter")
+    for name, s in process_summary().items():
+        lines.append(f'bi_phase_errors_total{{phase="{name}"}} {s["errors"]}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Sem log por scrape
+
+
+def start_metrics_server(port: int, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    """Sobe o endpoint /metrics em thread daemon (não bloqueia o event loop). Padrão: só localhost."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    logger.info(f"📈 Métricas Prometheus em http://{host}:{port}/metrics")
+    return server
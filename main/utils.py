@@ -1,11 +1,14 @@
 import io
+import os
 import re
+import json
 import logging
 import imagehash
 from typing import Optional, List, Union, Tuple
 from urllib.parse import urlparse, parse_qs
 from PIL import Image
 from datetime import datetime
+from pathlib import Path
 from config import ROI_CROP
 
 
@@ -71,23 +74,41 @@ def bytes_to_image(img_bytes: bytes) -> Image.Image:
     """Converte bytes para objeto PIL Image."""
     return Image.open(io.BytesIO(img_bytes)).convert('RGB')
 
-def crop_roi_image(pil_image: Image.Image, nav_type: str = "default") -> Image.Image:
-    """Realiza o crop na imagem baseado no tipo de navegação."""
+def roi_box(width: int, height: int, nav_type: str = "default") -> Tuple[int, int, int, int]:
+    """Retângulo (left, top, right, bottom) da ROI em pixels para o tipo de navegação."""
     crop_coords = ROI_CROP.get(nav_type, ROI_CROP["default"])
-    w, h = pil_image.size
     
-    left = int(w * crop_coords[0])
-    top = int(h * crop_coords[1])
-    right = int(w * crop_coords[2])
-    bottom = int(h * crop_coords[3])
+    left = int(width * crop_coords[0])
+    top = int(height * crop_coords[1])
+    right = int(width * crop_coords[2])
+    bottom = int(height * crop_coords[3])
     
-    return pil_image.crop((left, top, right, bottom))
+    return left, top, right, bottom
+
+def roi_clip(viewport: dict, nav_type: str = "default") -> dict:
+    """ROI da viewport no formato clip do Playwright/CDP ({x, y, width, height})."""
+    left, top, right, bottom = roi_box(viewport["width"], viewport["height"], nav_type)
+    return {"x": left, "y": top, "width": right - left, "height": bottom - top}
+
+def crop_roi_image(pil_image: Image.Image, nav_type: str = "default") -> Image.Image:
+    """Realiza o crop na imagem baseado no tipo de navegação."""
+    w, h = pil_image.size
+    return pil_image.crop(roi_box(w, h, nav_type))
 
 def compute_phash(pil_image: Image.Image, nav_type: str = "default") -> imagehash.ImageHash:
     """Calcula o hash perceptual da imagem (focando na ROI)."""
     roi = crop_roi_image(pil_image, nav_type)
     return imagehash.phash(roi)
 
+def parse_phash(hash_str: str) -> Optional[imagehash.ImageHash]:
+    """Reconstrói o hash perceptual a partir da string hex (ex: checkpoints em disco)."""
+    if not hash_str:
+        return None
+    try:
+        return imagehash.hex_to_hash(hash_str)
+    except (ValueError, TypeError):
+        return None
+
 def sanitize_filename(title: str, max_length: int = 50) -> str:
     """
     Converte um título em nome de arquivo seguro.
@@ -114,6 +135,79 @@ def sanitize_filename(title: str, max_length: int = 50) -> str:
     return safe.lower()
 
 
+def jsonl_append_prefix(path: Path) -> str:
+    """
+    Prefixo para o próximo append num JSONL: "\n" se a última linha ficou sem
+    terminador (crash no meio da escrita), senão "". Sem isso a linha nova seria
+    colada na linha truncada e também se perderia.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return ""
+            f.seek(-1, os.SEEK_END)
+            return "" if f.read(1) == b"\n" else "\n"
+    except FileNotFoundError:
+        return ""
+
+
+def append_jsonl(path: Path, entry: dict) -> None:
+    """Acrescenta uma linha JSON ao arquivo de forma durável (flush + fsync)."""
+    prefix = jsonl_append_prefix(path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(prefix + json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_jsonl(path: Path) -> List[dict]:
+    """
+    Lê um arquivo JSONL (checkpoints incrementais).
+
+    Linhas corrompidas (ex: crash no meio da escrita) são ignoradas; as
+    entradas íntegras depois delas continuam valendo.
+    """
+    entries = []
+    if not path.exists():
+        return entries
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                logging.getLogger("Utils").warning(f"⚠️ Linha corrompida em {path.name}. Ignorando linha.")
+                continue
+    return entries
+
+
+def save_requeue_urls(path: Union[str, Path], urls: List[str]) -> List[str]:
+    """
+    Acrescenta URLs à fila de reprocessamento (sem duplicar, mantendo ordem).
+
+    Returns:
+        Fila completa após a inclusão.
+    """
+    path = Path(path)
+    queue = []
+    if path.exists():
+        try:
+            queue = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            queue = []
+
+    for url in urls:
+        if url not in queue:
+            queue.append(url)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(queue, indent=2), encoding="utf-8")
+    return queue
+
+
 def is_error_screen(pil_image: Image.Image) -> bool:
     """
     Heurística ajustada: tolerar mais branco.